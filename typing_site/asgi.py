@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Jonli reyting (typingapp.live, SSE) shu entry point orqali ishlaydi:
+    uvicorn typing_site.asgi:application --workers 2
 """
 
 import os
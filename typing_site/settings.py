@@ -47,12 +47,14 @@ INSTALLED_APPS = [
 # Middleware
 # =========================
 MIDDLEWARE = [
+    "typingapp.metrics.MetricsMiddleware",  # /metrics uchun: latency, SQL, render, hajm
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # staticni WhiteNoise orqali beramiz
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "typingapp.middleware.PlayerMiddleware",  # request.player (user bilan bitta so'rovda)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -68,7 +70,7 @@ WSGI_APPLICATION = "typing_site.wsgi.application"
 # =========================
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "typingapp.metrics.TimedDjangoTemplates",  # DjangoTemplates + render vaqti
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -88,13 +90,109 @@ TEMPLATES = [
 DB_DIR = Path(os.environ.get("DB_DIR", BASE_DIR / "data"))
 DB_DIR.mkdir(parents=True, exist_ok=True)
 
+# WAL (o'quvchi va yozuvchi bir-birini to'smaydi) fayl sarlavhasiga yoziladi va doimiy saqlanadi —
+# shuning uchun har ulanishda emas, bir marta migratsiyada (typingapp 0019) yoqiladi.
+# Aks holda oddiy `manage.py check` ham repo'dagi data/db.sqlite3 ni o'zgartirardi.
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+
+# Har yangi ulanishda o'rnatiladigan PRAGMA'lar (faqat ulanish darajasidagilar)
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,       # ms — qulf bo'shashini kutish
+    "cache_size": -20000,       # ~20 MB sahifa keshi
+    "mmap_size": 134217728,     # 128 MB
+    "temp_store": "MEMORY",
+}
+SQLITE_INIT_COMMAND = "".join(f"PRAGMA {k}={v};" for k, v in SQLITE_PRAGMAS.items())
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": str(DB_DIR / "db.sqlite3"),
+        "OPTIONS": {
+            "init_command": SQLITE_INIT_COMMAND,
+            # yozish tranzaksiyasi qulfni boshida oladi — busy_timeout ishlaydi, "database is locked" kamayadi
+            "transaction_mode": "IMMEDIATE",
+        },
+    },
+    # Faqat o'qiydigan viewlar uchun alohida ulanish (typingapp.db.ReadOnlyRouter)
+    "readonly": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(DB_DIR / "db.sqlite3"),
+        "OPTIONS": {
+            "init_command": SQLITE_INIT_COMMAND + "PRAGMA query_only=ON;",
+        },
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+DATABASE_ROUTERS = ["typingapp.db.ReadOnlyRouter"]
+
+# =========================
+# Cache (gunicorn workerlari o'rtasida umumiy — fayl asosida)
+# =========================
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", DB_DIR / "cache"))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(CACHE_DIR),
+        "TIMEOUT": 300,
     }
 }
 
+# =========================
+# Natijalarni yozish (write-behind, typingapp.ingest)
+# =========================
+RESULT_INGEST = {
+    "ASYNC": os.environ.get("RESULT_INGEST_ASYNC", "True").lower() in ("1", "true", "yes"),
+    "BATCH_SIZE": int(os.environ.get("RESULT_INGEST_BATCH_SIZE", "50")),
+    "FLUSH_INTERVAL": float(os.environ.get("RESULT_INGEST_FLUSH_INTERVAL", "0.5")),  # sekund
+    "SPOOL_DIR": Path(os.environ.get("RESULT_INGEST_SPOOL_DIR", DB_DIR / "spool")),
+}
+
+# =========================
+# Anti-cheat (typingapp.anticheat, manage.py score_anomalies)
+# =========================
+# anomaly_score >= 1 — run shubhali. Har bir mezon o'z chegarasiga bo'linadi, eng kattasi olinadi.
+ANTICHEAT = {
+    "MIN_HISTORY": 5,         # shaxsiy baza uchun kamida nechta oldingi run
+    "USER_Z": 4.0,            # userning o'z tarixiga nisbatan z-score chegarasi
+    "POPULATION_Z": 6.0,      # shu musobaqadagi boshqalarga nisbatan (median/MAD) z-score
+    "JUMP_RATIO": 1.6,        # contest wpm / eng yaxshi mashq wpm
+    "WPM_STD_FLOOR": 5.0,     # juda bir xil tarix uchun std pastki chegarasi
+    "ACC_STD_FLOOR": 3.0,
+}
+
+# =========================
+# Chek yuklash (typingapp.uploads, typingapp.thumbnails)
+# =========================
+RECEIPT_UPLOAD = {
+    "MAX_SIZE": int(os.environ.get("RECEIPT_MAX_SIZE", str(5 * 1024 * 1024))),  # bayt
+    "THUMB_SIZE": int(os.environ.get("RECEIPT_THUMB_SIZE", "320")),  # px, uzun tomoni
+    "ASYNC_THUMBNAILS": os.environ.get("RECEIPT_THUMBNAILS_ASYNC", "True").lower() in ("1", "true", "yes"),
+}
+
+# Cheklarni berish (typingapp.sendfile): "" — Django o'zi, "x-accel" — nginx, "x-sendfile" — apache/lighttpd.
+# nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+RECEIPT_SENDFILE = {
+    "BACKEND": os.environ.get("RECEIPT_SENDFILE", ""),
+    "ACCEL_PREFIX": os.environ.get("RECEIPT_ACCEL_PREFIX", "/protected-media/"),
+}
+
+# =========================
+# Metrics (/metrics) — "Authorization: Bearer <token>"; bo'sh bo'lsa endpoint yopiq (404)
+# =========================
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# =========================
+# Auth backends
+# =========================
+AUTHENTICATION_BACKENDS = [
+    "typingapp.backends.PlayerModelBackend",  # user + player bitta so'rovda
+    "django.contrib.auth.backends.ModelBackend",  # eski sessiyalar shu yo'l bilan saqlangan
+]
+
 # =========================
 # Password validation
 # =========================
@@ -122,6 +220,10 @@ STATICFILES_DIRS = [BASE_DIR / "static"]        # agar /static kataloging bo'lsa
 STATICFILES_DIRS = [BASE_DIR / "static"] if (BASE_DIR / "static").exists() else []
 
 STORAGES = {
+    # STORAGES berilganda "default" ham aniq ko'rsatilishi shart (aks holda FileField ishlamaydi)
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
@@ -1,6 +1,16 @@
 # typingapp/admin.py
-from django.contrib import admin
+import os
+
+from django.contrib import admin, messages
 from django import forms
+from django.core.paginator import Paginator
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Substr
+from django.forms.models import BaseInlineFormSet
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils import timezone
 
@@ -12,11 +22,17 @@ from .models import (
     Text,
     Player,
     PracticeRun,
+    PracticeBest,
+    PracticeDaily,
     # Premium musobaqa modullari:
     Contest,
     ContestEntry,
+    ContestFinalStanding,
     ContestRun,
+    ReceiptBlob,
 )
+from .cache import bump_version, contest_start_scope
+from .settlement import SettlementError, settle
 
 # ----- Admin titles -----
 admin.site.site_header = "Typing Tutor Admin"
@@ -50,14 +66,48 @@ class TextInline(admin.TabularInline):
     show_change_link = True
 
 
+class RecentRunsFormSet(BaseInlineFormSet):
+    """Faqat bitta sahifa runlar (OFFSET/LIMIT) — og'ir player sahifasi hamma runlarni yuklamasin."""
+    page = 1
+    per_page = 50
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_queryset"):
+            qs = super().get_queryset()
+            start = (self.page - 1) * self.per_page
+            # Bitta ortiqcha qator — keyingi sahifa bormi, bilish uchun
+            rows = list(qs[start:start + self.per_page + 1])
+            self.has_next = len(rows) > self.per_page
+            self._page_queryset = rows[: self.per_page]
+        return self._page_queryset
+
+
 class PracticeRunInline(admin.TabularInline):
     model = PracticeRun
+    formset = RecentRunsFormSet
+    template = "admin/typingapp/player/runs_inline.html"
+    verbose_name_plural = "So'nggi natijalar"
     extra = 0
     can_delete = False
     readonly_fields = ("center", "language", "level", "duration", "wpm", "accuracy", "final_score", "created_at")
     ordering = ("-created_at",)
     fields = ("center", "language", "level", "duration", "wpm", "accuracy", "final_score", "created_at")
 
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        # __str__ (player.user) va readonly FK ustunlari uchun — har qator uchun alohida so'rov bo'lmasin
+        return super().get_queryset(request).select_related("player__user", "center", "language", "level", "duration")
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            formset.page = max(1, int(request.GET.get("runs_page", 1)))
+        except ValueError:
+            formset.page = 1
+        return formset
+
 
 # ==================
 # Center admin
@@ -68,9 +118,12 @@ class CenterAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     ordering = ("name",)
 
-    @admin.display(description="Natijalar soni")
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(runs_total=Count("runs"))
+
+    @admin.display(description="Natijalar soni", ordering="runs_total")
     def runs_count(self, obj):
-        return obj.runs.count()
+        return obj.runs_total
 
 
 # ==================
@@ -83,9 +136,12 @@ class LanguageAdmin(admin.ModelAdmin):
     ordering = ("name",)
     inlines = [TextInline]
 
-    @admin.display(description="Matnlar soni")
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(texts_total=Count("texts"))
+
+    @admin.display(description="Matnlar soni", ordering="texts_total")
     def texts_count(self, obj):
-        return obj.texts.count()
+        return obj.texts_total
 
 
 # ==================
@@ -114,14 +170,25 @@ class LevelAdmin(admin.ModelAdmin):
 @admin.register(Text)
 class TextAdmin(admin.ModelAdmin):
     form = TextForm
-    list_display = ("id", "title", "language", "level", "preview")
+    list_display = ("id", "title", "language", "level", "word_count", "char_count", "preview")
     list_filter = ("language", "level")
     search_fields = ("title", "content")
     ordering = ("language__name", "level__name", "title")
+    readonly_fields = ("word_count", "char_count", "content_hash")
+    list_select_related = ("language", "level")
+
+    def get_queryset(self, request):
+        # Ro'yxatda uzun matnlar to'liq o'qilmaydi — preview tayyor normalized'dan kesib olinadi
+        qs = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith("_changelist"):
+            qs = qs.defer("content", "normalized", "offsets_blob").annotate(preview_head=Substr("normalized", 1, 61))
+        return qs
 
     @admin.display(description="Matn preview")
     def preview(self, obj):
-        s = (obj.content or "").strip().replace("\n", " ")
+        s = getattr(obj, "preview_head", None)
+        if s is None:
+            s = obj.normalized
         return (s[:60] + "…") if len(s) > 60 else s
 
 
@@ -131,33 +198,40 @@ class TextAdmin(admin.ModelAdmin):
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     # Username’ni ko‘rsatamiz; “name” ixtiyoriy maydon – reklama uchun xolos
-    list_display = ("id", "username", "created_at", "runs_count", "best_score_badge")
+    list_display = ("id", "username", "created_at", "runs_count", "best_score_badge", "avg_wpm", "last_run_at")
     search_fields = ("user__username", "name")
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
     inlines = [PracticeRunInline]
     list_per_page = 25
+    list_select_related = ("user",)
+    # Hisoblagichlar run yozilganda yangilanadi (Player.record_runs)
+    readonly_fields = ("runs_count", "best_score", "wpm_total", "last_run_at")
 
     @admin.display(description="Username", ordering="user__username")
     def username(self, obj):
         return obj.user.username
 
-    @admin.display(description="Mashqlar soni")
+    @admin.display(description="Mashqlar soni", ordering="runs_count")
     def runs_count(self, obj):
-        return obj.runs.count()
+        return obj.runs_count
 
-    @admin.display(description="Eng yaxshi ball")
+    @admin.display(description="Eng yaxshi ball", ordering="best_score")
     def best_score_badge(self, obj):
-        best = obj.runs.order_by("-final_score").first()
-        if not best:
+        best = obj.best_score
+        if best is None:
             return "-"
         # Decimal bo'lsa ham solishtirish normal ishlaydi:
-        color = "#198754" if best.final_score >= 60 else "#0d6efd" if best.final_score >= 40 else "#6c757d"
+        color = "#198754" if best >= 60 else "#0d6efd" if best >= 40 else "#6c757d"
         return format_html(
             '<span style="padding:.2rem .5rem;border-radius:.5rem;background:{};color:#fff;">{} ball</span>',
-            color, best.final_score
+            color, best
         )
 
+    @admin.display(description="O'rtacha WPM")
+    def avg_wpm(self, obj):
+        return obj.avg_wpm if obj.avg_wpm is not None else "-"
+
 
 # ====================
 # PracticeRun admin
@@ -182,6 +256,7 @@ class PracticeRunAdmin(admin.ModelAdmin):
     readonly_fields = ("player", "center", "language", "level", "duration", "wpm", "accuracy", "final_score", "created_at")
     ordering = ("-final_score", "-created_at")
     list_per_page = 25
+    list_select_related = ("player__user", "center", "language", "level", "duration")
 
     @admin.display(description="Foydalanuvchi", ordering="player__user__username")
     def player_username(self, obj):
@@ -192,6 +267,36 @@ class PracticeRunAdmin(admin.ModelAdmin):
         return obj.duration.seconds if obj.duration else "-"
 
 
+# ====================
+# PracticeBest admin (faqat o'qish)
+# ====================
+@admin.register(PracticeBest)
+class PracticeBestAdmin(admin.ModelAdmin):
+    list_display = ("id", "player", "center", "language", "level", "duration", "wpm", "accuracy", "final_score", "created_at")
+    list_filter = ("center", "language", "level", "duration")
+    search_fields = ("player__user__username",)
+    list_select_related = ("player__user", "center", "language", "level", "duration")
+    readonly_fields = ("player", "center", "language", "level", "duration", "run", "wpm", "accuracy", "final_score", "created_at")
+    ordering = ("-final_score", "-created_at")
+    list_per_page = 25
+
+
+# ====================
+# PracticeDaily admin (faqat o'qish, progress sahifasi uchun yig'indi)
+# ====================
+@admin.register(PracticeDaily)
+class PracticeDailyAdmin(admin.ModelAdmin):
+    list_display = ("id", "player", "day", "language", "duration", "runs_count", "wpm_best", "wpm_mean", "wpm_p90", "acc_mean", "acc_p90")
+    list_filter = ("language", "duration")
+    search_fields = ("player__user__username",)
+    list_select_related = ("player__user", "language", "duration")
+    date_hierarchy = "day"
+    exclude = ("wpm_hist", "acc_hist")
+    readonly_fields = ("player", "day", "language", "duration", "runs_count", "wpm_best", "wpm_total", "wpm_p90", "acc_best", "acc_total", "acc_p90")
+    ordering = ("-day",)
+    list_per_page = 25
+
+
 # ============================
 # PREMIUM: Contest (manual to'lov)
 # ============================
@@ -202,48 +307,175 @@ class ContestAdmin(admin.ModelAdmin):
     search_fields = ("title", "description")
     date_hierarchy = "start_at"
     ordering = ("-created_at",)
+    readonly_fields = ("settled_at",)
+    actions = ["settle_contests"]
+
+    @admin.action(description="Yakunlash (SETTLED): yakuniy reyting va sovrinlar")
+    def settle_contests(self, request, queryset):
+        for contest in queryset:
+            try:
+                count = settle(contest)
+            except SettlementError as exc:
+                self.message_user(request, f"{contest.title}: {exc}", level=messages.ERROR)
+            else:
+                self.message_user(request, f"{contest.title}: yakunlandi, {count} ta ishtirokchi.")
+
+
+@admin.register(ContestFinalStanding)
+class ContestFinalStandingAdmin(admin.ModelAdmin):
+    """Yakuniy reyting — faqat ko'rish uchun (typingapp.settlement yozadi)."""
+    list_display = ("contest", "rank", "username", "center_name", "final_score", "accuracy", "wpm", "prize", "created_at")
+    list_filter = ("contest",)
+    search_fields = ("username",)
+    ordering = ("contest", "rank")
+    list_select_related = ("contest",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+APPROVE_MESSAGE = "To'lov tasdiqlandi."
+REJECT_MESSAGE = "Chek noto'g'ri yoki o'qilmaydi. Iltimos, qayta yuklang."
+
+def review_entries(queryset, status, reviewer, default_message):
+    """Arizalar holatini bitta UPDATE bilan o'zgartiradi; bo'sh review_message default bilan to'ldiriladi."""
+    with transaction.atomic():
+        scopes = [contest_start_scope(cid) for cid in queryset.order_by().values_list("contest_id", flat=True).distinct()]
+        updated = queryset.order_by().update(
+            status=status,
+            reviewed_by=reviewer,
+            reviewed_at=timezone.now(),
+            review_message=Case(
+                When(review_message="", then=Value(default_message)),
+                default=F("review_message"),
+                output_field=models.TextField(),
+            ),
+        )
+        # update() post_save yubormaydi — start paketlarini shu yerda eskirtiramiz.
+        # UPDATE'dan keyin va commit'dan keyin: oraliqda yig'ilgan paket eski ro'yxat bilan yangi versiyani olmasin
+        transaction.on_commit(lambda: bump_version(*scopes))
+    return updated
+
+
+class ReusedReceiptFilter(admin.SimpleListFilter):
+    title = "Chek"
+    parameter_name = "reused"
+
+    def lookups(self, request, model_admin):
+        return (("1", "Qayta ishlatilgan"),)
+
+    def queryset(self, request, queryset):
+        if self.value() == "1":
+            return queryset.filter(receipt_blob__refcount__gt=1)
+        return queryset
 
 
 @admin.register(ContestEntry)
 class ContestEntryAdmin(admin.ModelAdmin):
-    list_display = ("id", "contest", "user", "status", "created_at", "reviewed_at", "telegram", "phone")
-    list_filter  = ("status", "contest")
-    search_fields = ("user__username", "telegram", "phone")
-    readonly_fields = ("created_at", "reviewed_at", "reviewed_by")
-    fields = ("contest", "user", "telegram", "phone", "receipt", "status", "review_message", "reviewed_by", "reviewed_at", "created_at")
+    list_display = ("id", "contest", "user", "status", "created_at", "reviewed_at", "telegram", "phone", "receipt_reuse")
+    list_filter  = ("status", ReusedReceiptFilter, "contest")
+    # sha256 bo'yicha qidiruv — shu chek qaysi arizalarda borligini darhol topish
+    search_fields = ("user__username", "telegram", "phone", "=receipt_blob__sha256")
+    list_select_related = ("contest", "user", "receipt_blob")
+    readonly_fields = ("created_at", "reviewed_at", "reviewed_by", "receipt_blob", "receipt_preview")
+    fields = ("contest", "user", "telegram", "phone", "receipt", "receipt_preview", "receipt_blob", "status", "review_message", "reviewed_by", "reviewed_at", "created_at")
     ordering = ("-created_at",)
     actions = ["approve_entries", "reject_entries"]
+    review_per_page = 50
+
+    @admin.display(description="Preview")
+    def receipt_preview(self, obj):
+        blob = obj.receipt_blob
+        if blob is None or not blob.thumbnail:
+            return "-"
+        return format_html(
+            '<a href="{}" target="_blank"><img src="{}" alt="chek" style="max-width:320px;"></a>',
+            reverse("typingapp:receipt_file", args=[obj.id]), reverse("typingapp:receipt_preview", args=[obj.id]),
+        )
+
+    @admin.display(description="Chek", ordering="receipt_blob__refcount")
+    def receipt_reuse(self, obj):
+        blob = obj.receipt_blob
+        if blob is None or blob.refcount <= 1:
+            return "-"
+        url = reverse("admin:typingapp_contestentry_changelist")
+        return format_html('<a href="{}?q={}" style="color:#dc3545;">×{} qayta</a>', url, blob.sha256, blob.refcount)
 
     @admin.action(description="Tasdiqlash (APPROVED)")
     def approve_entries(self, request, queryset):
-        updated = 0
-        for e in queryset:
-            e.status = ContestEntry.APPROVED
-            e.reviewed_by = request.user
-            e.reviewed_at = timezone.now()
-            if not e.review_message:
-                e.review_message = "To'lov tasdiqlandi."
-            e.save()
-            updated += 1
+        updated = review_entries(queryset, ContestEntry.APPROVED, request.user, APPROVE_MESSAGE)
         self.message_user(request, f"{updated} ta ariza tasdiqlandi.")
 
     @admin.action(description="Rad etish (REJECTED) — default sabab bilan")
     def reject_entries(self, request, queryset):
-        updated = 0
-        for e in queryset:
-            e.status = ContestEntry.REJECTED
-            e.reviewed_by = request.user
-            e.reviewed_at = timezone.now()
-            if not e.review_message:
-                e.review_message = "Chek noto'g'ri yoki o'qilmaydi. Iltimos, qayta yuklang."
-            e.save()
-            updated += 1
+        updated = review_entries(queryset, ContestEntry.REJECTED, request.user, REJECT_MESSAGE)
         self.message_user(request, f"{updated} ta ariza rad etildi.")
 
+    # ----- Ko'rik navbati: SUBMITTED arizalar, chek preview bilan -----
+    def get_urls(self):
+        urls = [
+            path("review/", self.admin_site.admin_view(self.review_queue_view), name="typingapp_contestentry_review"),
+        ]
+        return urls + super().get_urls()
+
+    def review_queue_view(self, request):
+        if not self.has_change_permission(request):
+            return redirect("admin:index")
+
+        qs = ContestEntry.objects.filter(status=ContestEntry.SUBMITTED).select_related("user", "contest", "receipt_blob")
+        contest_id = request.GET.get("contest") or request.POST.get("contest")
+        if contest_id and contest_id.isdigit():
+            qs = qs.filter(contest_id=contest_id)
+        else:
+            contest_id = ""
+
+        if request.method == "POST":
+            ids = [i for i in request.POST.getlist("ids") if i.isdigit()]
+            # Faqat hali SUBMITTED bo'lganlar — boshqa admin ulgurgan bo'lsa, qayta yozilmaydi
+            selected = qs.filter(pk__in=ids)
+            if request.POST.get("action") == "approve":
+                updated = review_entries(selected, ContestEntry.APPROVED, request.user, APPROVE_MESSAGE)
+                self.message_user(request, f"{updated} ta ariza tasdiqlandi.")
+            elif request.POST.get("action") == "reject":
+                updated = review_entries(selected, ContestEntry.REJECTED, request.user, REJECT_MESSAGE)
+                self.message_user(request, f"{updated} ta ariza rad etildi.")
+            url = reverse("admin:typingapp_contestentry_review")
+            return redirect(f"{url}?contest={contest_id}" if contest_id else url)
+
+        page = Paginator(qs.order_by("created_at", "id"), self.review_per_page).get_page(request.GET.get("page"))
+        for entry in page:
+            entry.receipt_ext = os.path.splitext(entry.receipt.name)[1].lstrip(".").upper()
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Cheklarni ko'rib chiqish",
+            "page": page,
+            "contest_id": contest_id,
+            "contests": Contest.objects.filter(entries__status=ContestEntry.SUBMITTED).distinct().order_by("-start_at"),
+        }
+        return TemplateResponse(request, "admin/typingapp/contestentry/review_queue.html", context)
+
+
+@admin.register(ReceiptBlob)
+class ReceiptBlobAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha256", "size", "refcount", "created_at")
+    search_fields = ("=sha256",)
+    readonly_fields = ("sha256", "name", "size", "refcount", "created_at")
+    ordering = ("-refcount", "-created_at")
+
+    def has_add_permission(self, request):
+        return False
+
 
 @admin.register(ContestRun)
 class ContestRunAdmin(admin.ModelAdmin):
-    list_display = ("id", "contest", "user", "final_score", "wpm", "accuracy", "suspicious", "created_at")
+    list_display = ("id", "contest", "user", "final_score", "wpm", "accuracy", "suspicious", "anomaly_score", "created_at")
     list_filter  = ("contest", "suspicious")
     search_fields = ("user__username",)
     date_hierarchy = "created_at"
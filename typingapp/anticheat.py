@@ -0,0 +1,143 @@
+# typingapp/anticheat.py
+"""
+Statistik anti-cheat: musobaqa runlarini userning tarixi va boshqa ishtirokchilar bilan solishtiradi.
+
+contest_result faqat qat'iy qoidani tekshiradi (wpm > 200 yoki accuracy < 40). Bu yerda esa
+butun musobaqa bitta vektorlashgan o'tishda (NumPy) baholanadi:
+  * shaxsiy baza — userning PracticeRun va boshqa musobaqalardagi (shubhasiz) ContestRun
+    tarixi: o'rtacha va std (wpm, accuracy) → z-score;
+  * umumiy baza — shu musobaqadagi runlar: median va MAD (robust) → z-score;
+  * sakrash — contest wpm / eng yaxshi mashq wpm.
+Har bir mezon settings.ANTICHEAT dagi chegarasiga bo'linadi va eng kattasi anomaly_score
+bo'ladi: >= 1 — run shubhali. Baholash faqat bayroq qo'yadi, hech qachon olib tashlamaydi
+(admin qo'lda tekshiradi). Runlar bazadan Decimal'siz, xom kursor bilan o'qiladi.
+
+NumPy ixtiyoriy: o'rnatilmagan bo'lsa, manage.py score_anomalies ishlamaydi, sayt esa ishlayveradi.
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .models import ContestRun, PracticeRun
+
+try:
+    import numpy as np
+except ImportError:  # NumPy o'rnatilmagan — anti-cheat bosqichi o'chiq
+    np = None
+
+MAD_SCALE = 1.4826  # MAD → normal taqsimotdagi std
+FLAG_BATCH = 500
+
+
+def _conf(name, default):
+    return getattr(settings, "ANTICHEAT", {}).get(name, default)
+
+
+def _mean_std(index, values, counts):
+    """Guruh bo'yicha o'rtacha va std (bincount bilan, Python tsiklisiz)."""
+    size = len(counts)
+    total = np.bincount(index, weights=values, minlength=size)
+    squares = np.bincount(index, weights=values * values, minlength=size)
+    safe = np.maximum(counts, 1)
+    mean = total / safe
+    std = np.sqrt(np.maximum(squares / safe - mean * mean, 0.0))
+    return mean, std
+
+
+def score_runs(run_user, run_wpm, run_acc, hist_user, hist_wpm, hist_acc, hist_practice):
+    """
+    Vektorlashgan baholash. run_* — baholanadigan runlar, hist_* — tarix
+    (hist_practice=True — PracticeRun). Natija: har run uchun anomaly_score (float64).
+    """
+    min_history = _conf("MIN_HISTORY", 5)
+    wpm_floor = _conf("WPM_STD_FLOOR", 5.0)
+    acc_floor = _conf("ACC_STD_FLOOR", 3.0)
+
+    users, inverse = np.unique(np.concatenate([run_user, hist_user]), return_inverse=True)
+    r = inverse[: len(run_user)]
+    h = inverse[len(run_user):]
+    size = len(users)
+
+    # Shaxsiy baza: tezlik, yoki tezlik va aniqlik birga keskin oshsa
+    counts = np.bincount(h, minlength=size)
+    wpm_mean, wpm_std = _mean_std(h, hist_wpm, counts)
+    acc_mean, acc_std = _mean_std(h, hist_acc, counts)
+    z_wpm = (run_wpm - wpm_mean[r]) / np.maximum(wpm_std[r], wpm_floor)
+    z_acc = (run_acc - acc_mean[r]) / np.maximum(acc_std[r], acc_floor)
+    user_z = np.where(counts[r] >= min_history, np.maximum(z_wpm, (z_wpm + z_acc) / 2), 0.0)
+
+    # Umumiy baza: shu musobaqadagi runlar (median/MAD — cheaterlar bazani siljitmaydi)
+    if len(run_wpm):
+        median = np.median(run_wpm)
+        mad = np.median(np.abs(run_wpm - median)) * MAD_SCALE
+        pop_z = (run_wpm - median) / max(mad, wpm_floor)
+    else:
+        pop_z = np.zeros(0)
+
+    # Mashqdan musobaqaga sakrash
+    best = np.zeros(size)
+    np.maximum.at(best, h[hist_practice], hist_wpm[hist_practice])
+    run_best = best[r]
+    jump = np.where(run_best > 0, run_wpm / np.where(run_best > 0, run_best, 1.0), 0.0)
+
+    score = np.maximum.reduce([
+        user_z / _conf("USER_Z", 4.0),
+        pop_z / _conf("POPULATION_Z", 6.0),
+        (jump - 1.0) / (_conf("JUMP_RATIO", 1.6) - 1.0),
+    ])
+    return np.maximum(score, 0.0)
+
+
+def _fetch(queryset, *fields):
+    """values_list so'rovini xom kursor bilan (Decimal'ga aylantirmasdan) float64 massivga o'qiydi."""
+    sql, params = queryset.order_by().values_list(*fields).query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if not rows:
+        return np.empty((0, len(fields)))
+    return np.array(rows, dtype=np.float64)
+
+
+def score_contest(contest):
+    """Musobaqaning hamma runlarini baholaydi. Natija: (baholangan runlar, yangi shubhali runlar)."""
+    if np is None:
+        raise RuntimeError("Anti-cheat uchun NumPy kerak: pip install numpy")
+
+    runs = _fetch(ContestRun.objects.filter(contest=contest), "id", "user_id", "wpm", "accuracy")
+    if not len(runs):
+        return 0, 0
+
+    entrants = ContestRun.objects.filter(contest=contest).values("user_id")
+    practice = _fetch(PracticeRun.objects.filter(player__user_id__in=entrants), "player__user_id", "wpm", "accuracy")
+    other = _fetch(
+        ContestRun.objects.filter(user_id__in=entrants, suspicious=False).exclude(contest=contest),
+        "user_id", "wpm", "accuracy",
+    )
+    history = np.concatenate([practice, other])
+    is_practice = np.arange(len(history)) < len(practice)
+
+    scores = score_runs(
+        runs[:, 1].astype(np.int64), runs[:, 2], runs[:, 3],
+        history[:, 0].astype(np.int64), history[:, 1], history[:, 2], is_practice,
+    )
+    run_ids = runs[:, 0].astype(np.int64)
+    return len(run_ids), _apply(run_ids, scores)
+
+
+def _apply(run_ids, scores):
+    """anomaly_score'ni bitta executemany bilan yozadi, score >= 1 bo'lganlarga bayroq qo'yadi."""
+    alias = router.db_for_write(ContestRun)
+    connection = connections[alias]
+    qn = connection.ops.quote_name
+    sql = f"UPDATE {qn(ContestRun._meta.db_table)} SET {qn('anomaly_score')} = %s WHERE {qn('id')} = %s"
+    flagged = run_ids[scores >= 1.0].tolist()
+
+    newly = 0
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, zip(np.round(scores, 3).tolist(), run_ids.tolist()))
+        for start in range(0, len(flagged), FLAG_BATCH):
+            newly += ContestRun.objects.using(alias).filter(
+                id__in=flagged[start:start + FLAG_BATCH], suspicious=False
+            ).update(suspicious=True)
+    return newly
@@ -0,0 +1,15 @@
+# typingapp/backends.py
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+
+
+class PlayerModelBackend(ModelBackend):
+    """ModelBackend, lekin sessiondan user olinganda Player ham shu so'rovda (JOIN) keladi."""
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("player").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,58 @@
+# typingapp/cache.py
+"""
+Versiyalangan kesh yordamchilari.
+
+Har bir "scope" (masalan, global reyting yoki bitta musobaqa reytingi) uchun
+keshda versiya hisoblagichi saqlanadi. O'quvchilar kalitga versiyani qo'shadi,
+yozuvchilar esa versiyani oshiradi — eski yozuvlar o'z-o'zidan eskirib qoladi.
+"""
+from django.core.cache import cache
+
+# Reyting fragmentlari uchun TTL (sekund). Versiya o'zgarsa, TTL kutilmaydi.
+LEADERBOARD_TIMEOUT = 300
+
+_VERSION_PREFIX = "typingapp:ver:"
+
+# Text indeksi scope'i (typingapp.texts)
+TEXTS_SCOPE = "texts"
+
+# Language/Level/Duration/Center snapshot scope'i (typingapp.refdata)
+REFDATA_SCOPE = "refdata"
+
+
+def leaderboard_scope(center_id=None):
+    """Mashq reytingi scope'i: global yoki bitta markaz."""
+    if center_id:
+        return f"leaderboard:center:{center_id}"
+    return "leaderboard"
+
+
+def contest_scope(contest_id):
+    """Musobaqa reytingi scope'i."""
+    return f"contest:{contest_id}"
+
+
+def contest_start_scope(contest_id):
+    """Musobaqa start paketi scope'i (typingapp.startpack): musobaqa va arizalar."""
+    return f"contest:{contest_id}:start"
+
+
+def get_version(scope):
+    """Scope versiyasini qaytaradi (yo'q bo'lsa 1 dan boshlaydi)."""
+    key = _VERSION_PREFIX + scope
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(*scopes):
+    """Berilgan scope'lar versiyasini oshiradi — eski kesh yozuvlari ishlatilmay qoladi."""
+    for scope in scopes:
+        key = _VERSION_PREFIX + scope
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Kalit hali yo'q: o'quvchilar 1 ni ko'rgan bo'lishi mumkin, shuning uchun 2 dan boshlaymiz
+            cache.set(key, 2, timeout=None)
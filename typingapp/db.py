@@ -0,0 +1,44 @@
+# typingapp/db.py
+"""
+Faqat o'qiydigan viewlarni "readonly" ulanishga yo'naltirish.
+
+@read_only_db bilan belgilangan view bajarilayotganda (contextvar orqali) barcha
+o'qishlar "readonly" aliasga ketadi; yozishlar doim "default" da qoladi.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+READONLY_ALIAS = "readonly"
+
+_read_only = ContextVar("typingapp_read_only_db", default=False)
+
+
+def read_only_db(view_func):
+    """View ichidagi o'qish so'rovlarini "readonly" ulanishga yuboradi."""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return _wrapped
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and READONLY_ALIAS in settings.DATABASES:
+            return READONLY_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ikkala alias bitta fayl — bog'lanishlar ruxsat etiladi
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READONLY_ALIAS
@@ -0,0 +1,400 @@
+# typingapp/ingest.py
+"""
+Natijalarni yozish (write-behind).
+
+result_view va contest_result natijani darhol qabul qiladi: yozuv avval diskdagi
+spool faylga (fsync bilan) qo'shiladi, keyin xotiradagi navbatga tushadi. Fon oqimi
+navbatni kichik partiyalarda (BATCH_SIZE yoki FLUSH_INTERVAL, qaysi biri oldin)
+bitta transaksiyada bulk_create qiladi — SQLite yozish qulfi har natija uchun
+emas, har partiya uchun bir marta olinadi.
+
+Worker yiqilsa, spool fayllar qoladi va keyingi ishga tushgan process ularni
+qayta yozadi (at-least-once: commit va faylni o'chirish orasida yiqilsa,
+partiya ikki marta yozilishi mumkin).
+
+ASYNC=False bo'lsa, natija so'rov ichida xuddi shu yo'l bilan (1 ta qatorli partiya) yoziladi.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import live
+from .cache import bump_version, contest_scope, leaderboard_scope
+from .models import ContestRun, ContestStanding, Player, PracticeBest, PracticeDaily, PracticeRun
+
+logger = logging.getLogger(__name__)
+
+PRACTICE = "practice"
+CONTEST = "contest"
+
+_PRACTICE_FIELDS = ("player_id", "center_id", "language_id", "level_id", "duration_id")
+_CONTEST_FIELDS = ("contest_id", "user_id", "center_id", "suspicious")
+_SCORE_FIELDS = ("wpm", "accuracy", "final_score")
+
+
+def _conf(name, default):
+    return getattr(settings, "RESULT_INGEST", {}).get(name, default)
+
+
+# =========================
+# Partiyani yozish
+# =========================
+def write_batch(records):
+    """Yozuvlarni bitta transaksiyada bazaga yozadi (runlar + best/standing + player hisoblagichlari va kunlik yig'indi + kesh versiyasi)."""
+    practice, contest = [], []
+    for rec in records:
+        scores = {k: Decimal(rec[k]) for k in _SCORE_FIELDS}
+        # Qabul qilingan vaqt — flush yoki qayta yozish (replay) vaqti emas; eski spool'larda bo'lmasligi mumkin
+        scores["created_at"] = parse_datetime(rec["created_at"]) if rec.get("created_at") else timezone.now()
+        if rec["kind"] == PRACTICE:
+            practice.append(PracticeRun(**{k: rec.get(k) for k in _PRACTICE_FIELDS}, **scores))
+        else:
+            contest.append(ContestRun(**{k: rec.get(k) for k in _CONTEST_FIELDS}, **scores))
+
+    scopes = set()
+    with transaction.atomic():
+        practice = PracticeRun.objects.bulk_create(practice)
+        for run in practice:
+            PracticeBest.record(run)
+            scopes.add(leaderboard_scope())
+            if run.center_id:
+                scopes.add(leaderboard_scope(run.center_id))
+        Player.record_runs(practice)
+        PracticeDaily.record_runs(practice)
+        contest_ids = set()
+        for run in ContestRun.objects.bulk_create(contest):
+            ContestStanding.record(run)
+            scopes.add(contest_scope(run.contest_id))
+            contest_ids.add(run.contest_id)
+
+        def _after_commit():
+            # bulk_create post_save yubormaydi — reyting keshini shu yerda eskirtiramiz
+            bump_version(*scopes)
+            live.notify(contest_ids)
+        transaction.on_commit(_after_commit)
+    return len(practice) + len(contest)
+
+
+# =========================
+# Metrikalar (process bo'yicha)
+# =========================
+class IngestStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.batches = 0
+        self.rows = 0
+        self.failures = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.last_flush_seconds = 0.0
+
+    def observe_flush(self, size, seconds):
+        with self.lock:
+            self.batches += 1
+            self.rows += size
+            self.last_batch_size = size
+            self.max_batch_size = max(self.max_batch_size, size)
+            self.last_flush_seconds = seconds
+            self.flush_seconds_total += seconds
+            self.flush_seconds_max = max(self.flush_seconds_max, seconds)
+
+    def snapshot(self):
+        with self.lock:
+            data = {k: v for k, v in vars(self).items() if k != "lock"}
+        data["avg_batch_size"] = (data["rows"] / data["batches"]) if data["batches"] else 0.0
+        data["avg_flush_seconds"] = (data["flush_seconds_total"] / data["batches"]) if data["batches"] else 0.0
+        return data
+
+
+stats = IngestStats()
+
+
+# =========================
+# Spool + fon oqimi
+# =========================
+class ResultIngestor:
+    def __init__(self, spool_dir, batch_size, flush_interval):
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cond = threading.Condition()
+        self.queue = []
+        self.pid = os.getpid()
+        self.seq = 0
+        self.spool = None
+        self.pending_files = []  # yozilmagan partiyalar spool fayllari
+        self.inflight = []       # flush() hozir yozayotgan partiya (navbatdan olingan, hali commit bo'lmagan)
+        self.lock_file = None
+        self.thread = None
+        self.stopped = False
+
+    # --- spool fayllar: spool-<pid>-<seq>.jsonl, egasi spool-<pid>.lock ni ushlab turadi ---
+    def _spool_path(self, pid, seq):
+        return self.spool_dir / f"spool-{pid}-{seq}.jsonl"
+
+    def _open_spool(self):
+        self.seq += 1
+        self.spool = open(self._spool_path(self.pid, self.seq), "a", encoding="utf-8")
+
+    def start(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.lock_file = open(self.spool_dir / f"spool-{self.pid}.lock", "w")
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            self.recover()
+        except Exception:
+            # start() so'rov ichida chaqiriladi — qayta yozish xatosi natijalarni qabul qilishni to'xtatmasin
+            logger.exception("ingest: spool fayllarni qayta yozib bo'lmadi, fayllar diskda qoldi")
+        self._open_spool()
+        self.thread = threading.Thread(target=self._run, name="result-ingest", daemon=True)
+        self.thread.start()
+
+    def recover(self):
+        """Yiqilgan processlardan (lock bo'sh) qolgan spool fayllarni qayta yozadi."""
+        for lock_path in sorted(glob.glob(str(self.spool_dir / "spool-*.lock"))):
+            pid = Path(lock_path).stem.split("-", 1)[1]
+            own = pid == str(self.pid)
+            if not own:
+                with open(lock_path, "a") as fh:
+                    try:
+                        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # tirik process
+                    self._replay(pid)
+                    os.unlink(lock_path)
+            else:
+                # PID qayta ishlatilgan: avvalgi hayotdan qolgan fayllar
+                self._replay(pid)
+
+    def _replay(self, pid):
+        adopted = {fh.name for fh in self.pending_files}
+        for path in sorted(glob.glob(str(self.spool_dir / f"spool-{pid}-*.jsonl"))):
+            if path in adopted:
+                continue  # shu recover() ichida navbatga olingan yozuvlar fayli
+            records = []
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # yiqilish paytida chala yozilgan oxirgi qator
+                        logger.warning("ingest: %s dagi buzilgan qator tashlab ketildi", path)
+            total, pending = len(records), list(records)
+            try:
+                self._write(pending)
+            except Exception:
+                # Yozilmaganlari o'z navbatimizga o'tadi — fon oqimi keyinroq qayta urinadi
+                logger.exception("ingest: %s ni qayta yozib bo'lmadi, %d ta natija navbatga olindi", path, len(pending))
+                self.queue.extend(pending)
+                self.pending_files.append(self._respool(pending))
+            if total - len(pending):
+                logger.warning("ingest: %s dan %d ta natija qayta ishlandi", path, total - len(pending))
+            os.unlink(path)
+
+    def _respool(self, records):
+        """Yozuvlarni yangi spool faylga (fsync bilan) ko'chiradi; fayl flush()da yopilib o'chiriladi."""
+        self.seq += 1
+        fh = open(self._spool_path(self.pid, self.seq), "a", encoding="utf-8")
+        fh.writelines(json.dumps(rec, separators=(",", ":")) + "\n" for rec in records)
+        fh.flush()
+        os.fsync(fh.fileno())
+        return fh
+
+    def _write(self, pending):
+        """pending'ni yozadi; bazaga tushgan (yoki dead-letter'ga ketgan) yozuvlar ro'yxatdan olib tashlanadi."""
+        try:
+            write_batch(pending)
+        except IntegrityError:
+            # Bitta buzuq yozuv (masalan, o'chirilgan player) butun navbatni to'xtatmasin
+            self._write_one_by_one(pending)
+        else:
+            del pending[:]
+
+    def submit(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.cond:
+            self.spool.write(line)
+            self.spool.flush()
+            os.fsync(self.spool.fileno())
+            self.queue.append(record)
+            if len(self.queue) >= self.batch_size:
+                self.cond.notify()
+        with stats.lock:
+            stats.accepted += 1
+
+    def flush(self):
+        """Navbatdagi hamma yozuvlarni yozadi. Xato bo'lsa yozuvlar navbatda (va spool diskda) qoladi."""
+        with self.cond:
+            if not self.queue:
+                return 0
+            batch, self.queue = self.queue, []
+            files, self.pending_files = self.pending_files + [self.spool], []
+            self._open_spool()
+            # _write yozilganlarini shu ro'yxatdan o'chiradi — count_pending ularni ikki marta sanamaydi
+            pending = self.inflight = list(batch)
+
+        started = time.monotonic()
+        try:
+            close_old_connections()
+            self._write(pending)
+        except Exception:
+            logger.exception("ingest: %d ta natijani yozib bo'lmadi, keyinroq qayta urinamiz", len(pending))
+            with stats.lock:
+                stats.failures += 1
+            with self.cond:
+                if len(pending) < len(batch):
+                    # Bir qismi allaqachon commit bo'lgan — qayta yozilmasligi uchun spool faqat qolganlar bilan
+                    old_files, files = files, [self._respool(pending)]
+                    for fh in old_files:
+                        fh.close()
+                        os.unlink(fh.name)
+                self.queue[:0] = pending
+                self.pending_files[:0] = files
+                self.inflight = []
+            return 0
+
+        with self.cond:
+            self.inflight = []
+        elapsed = time.monotonic() - started
+        stats.observe_flush(len(batch), elapsed)
+        logger.info("ingest: batch=%d flush=%.1fms", len(batch), elapsed * 1000)
+        for fh in files:
+            fh.close()
+            os.unlink(fh.name)
+        return len(batch)
+
+    def count_pending(self, kind, **fields):
+        """Bazaga hali yozilmagan (navbatdagi va yozilayotgan) yozuvlar soni — fields bo'yicha filtrlab."""
+        with self.cond:
+            records = self.queue + self.inflight
+        return sum(1 for rec in records if rec["kind"] == kind and all(rec.get(k) == v for k, v in fields.items()))
+
+    def _write_one_by_one(self, pending):
+        """Har yozuv alohida tranzaksiyada; yozilgani darhol pending'dan olinadi (xato bo'lsa qolgani qoladi)."""
+        dead = []
+        try:
+            while pending:
+                try:
+                    write_batch(pending[:1])
+                except IntegrityError:
+                    dead.append(pending[0])
+                del pending[0]
+        finally:
+            if dead:
+                path = self.spool_dir / f"dead-{self.pid}.jsonl"
+                with open(path, "a", encoding="utf-8") as fh:
+                    fh.writelines(json.dumps(rec, separators=(",", ":")) + "\n" for rec in dead)
+                logger.error("ingest: %d ta yozuv bazaga sig'madi, %s ga ko'chirildi", len(dead), path)
+
+    def _run(self):
+        while not self.stopped:
+            with self.cond:
+                if len(self.queue) < self.batch_size:
+                    self.cond.wait(self.flush_interval)
+            self.flush()
+
+    def stop(self):
+        self.stopped = True
+        with self.cond:
+            self.cond.notify()
+        if self.thread:
+            self.thread.join(timeout=self.flush_interval * 4)
+        self.flush()
+        if not self.queue and self.lock_file:
+            # Hammasi yozildi — bo'sh spool va lock fayl kerak emas
+            self.spool.close()
+            os.unlink(self.spool.name)
+            os.unlink(self.lock_file.name)
+            self.lock_file.close()
+            self.lock_file = None
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor():
+    """Shu process uchun ingestor (fork'dan keyin yangisi yaratiladi)."""
+    global _ingestor
+    if _ingestor is None or _ingestor.pid != os.getpid():
+        with _ingestor_lock:
+            if _ingestor is None or _ingestor.pid != os.getpid():
+                ingestor = ResultIngestor(
+                    spool_dir=_conf("SPOOL_DIR", Path(settings.DB_DIR) / "spool"),
+                    batch_size=_conf("BATCH_SIZE", 50),
+                    flush_interval=_conf("FLUSH_INTERVAL", 0.5),
+                )
+                ingestor.start()
+                atexit.register(ingestor.stop)
+                _ingestor = ingestor
+    return _ingestor
+
+
+def flush():
+    """Navbatni darhol yozadi (masalan, testlarda yoki process to'xtashida)."""
+    if _ingestor is not None and _ingestor.pid == os.getpid():
+        return _ingestor.flush()
+    return 0
+
+
+def pending_contest_runs(contest_id, user_id):
+    """Shu processda qabul qilingan, lekin hali bazada yo'q musobaqa natijalari soni (urinishlar limiti uchun)."""
+    if _ingestor is None or _ingestor.pid != os.getpid():
+        return 0
+    return _ingestor.count_pending(CONTEST, contest_id=contest_id, user_id=user_id)
+
+
+def _submit(record):
+    if _conf("ASYNC", True):
+        get_ingestor().submit(record)
+    else:
+        started = time.monotonic()
+        write_batch([record])
+        stats.observe_flush(1, time.monotonic() - started)
+
+
+# =========================
+# Public API
+# =========================
+def submit_practice(*, player, center, language, level, duration, wpm, accuracy, final_score):
+    _submit({
+        "kind": PRACTICE,
+        "created_at": timezone.now().isoformat(),
+        "player_id": player.id,
+        "center_id": center.id if center else None,
+        "language_id": language.id if language else None,
+        "level_id": level.id if level else None,
+        "duration_id": duration.id if duration else None,
+        "wpm": str(wpm),
+        "accuracy": str(accuracy),
+        "final_score": str(final_score),
+    })
+
+
+def submit_contest(*, contest, user, center, wpm, accuracy, final_score, suspicious):
+    _submit({
+        "kind": CONTEST,
+        "created_at": timezone.now().isoformat(),
+        "contest_id": contest.id,
+        "user_id": user.id,
+        "center_id": center.id if center else None,
+        "suspicious": bool(suspicious),
+        "wpm": str(wpm),
+        "accuracy": str(accuracy),
+        "final_score": str(final_score),
+    })
@@ -0,0 +1,198 @@
+# typingapp/live.py
+"""
+Musobaqa reytingi uchun jonli efir (SSE, faqat ASGI ostida).
+
+Har bir process'da har bir musobaqa uchun bitta Hub bor:
+  * reyting (ContestStanding, is_latest=True) xotirada — mijozlar bazaga so'rov yubormaydi;
+  * "contest:<id>" kesh versiyasi o'zgarganda (yangi natija — istalgan process'da) Hub
+    reytingni BITTA so'rov bilan qayta o'qiydi, eskisi bilan solishtiradi va faqat
+    o'zgargan qatorlarni (yangi o'rni bilan) barcha obunachilarga tarqatadi;
+  * shu process'da yozilgan natija (typingapp.ingest) Hub'ni darhol uyg'otadi,
+    boshqa process'lardagisi POLL_INTERVAL ichida ko'rinadi.
+
+Mijoz ulanganda bitta "snapshot" (tayyor JSON, hamma uchun bitta), keyin "update" hodisalarini oladi.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import contest_scope, get_version
+from .models import ContestStanding
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0        # sekund — boshqa process'lardagi natijalar shu kechikish bilan
+MIN_RELOAD_INTERVAL = 0.5  # qisqa vaqtdagi ko'p natija — bitta qayta o'qish
+HEARTBEAT = 15.0
+QUEUE_SIZE = 64            # sekin mijoz navbati to'lsa, u uziladi (qayta ulanib snapshot oladi)
+
+_CLOSE = object()
+
+
+def _row(standing):
+    return {
+        "id": standing.user_id,
+        "u": standing.username,
+        "c": standing.center.name if standing.center_id else None,
+        "wpm": str(standing.wpm),
+        "acc": str(standing.accuracy),
+        "score": str(standing.final_score),
+        "at": timezone.localtime(standing.created_at).strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def _load_standings(contest_id):
+    """Umumiy reyting (har user uchun oxirgi urinish), contest_leaderboard tartibida."""
+    close_old_connections()
+    try:
+        qs = (ContestStanding.objects.filter(contest_id=contest_id, is_latest=True)
+              .annotate(username=F("user__username"))
+              .select_related("center")
+              .order_by("-final_score", "-created_at"))
+        return [_row(s) for s in qs]
+    finally:
+        close_old_connections()
+
+
+def _diff(old_rows, new_rows):
+    """
+    Ma'lumoti o'zgargan/yangi qatorlar (yangi rank bilan) va chiqib ketgan user ID'lar.
+    Faqat o'rni surilgan qatorlar yuborilmaydi — mijoz o'zgarganlarini olib tashlab,
+    rank o'sish tartibida qayta qo'yadi va qolganlari o'z-o'zidan suriladi.
+    """
+    old = {r["id"]: r for r in old_rows}
+    changed = []
+    for rank, row in enumerate(new_rows, start=1):
+        prev = old.pop(row["id"], None)
+        if prev is None or any(prev[k] != v for k, v in row.items()):
+            changed.append(dict(row, rank=rank))
+    return changed, list(old)
+
+
+class Hub:
+    def __init__(self, contest_id, loop):
+        self.contest_id = contest_id
+        self.loop = loop
+        self.subscribers = set()
+        self.rows = []          # rank bilan
+        self.snapshot = ""      # tayyor SSE matni
+        self.version = None
+        self.wake = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.task = None
+
+    # --- obuna ---
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self.wake.set()  # _run tugaydi
+
+    def _publish(self, message):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Sekin mijoz: navbatni bo'shatib, uzamiz
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_CLOSE)
+
+    # --- yangilash ---
+    async def _reload(self):
+        version = await sync_to_async(get_version, thread_sensitive=False)(contest_scope(self.contest_id))
+        if version == self.version:
+            return
+        rows = await sync_to_async(_load_standings, thread_sensitive=False)(self.contest_id)
+        self.version = version
+        changed, removed = _diff(self.rows, rows)
+        self.rows = [dict(row, rank=rank) for rank, row in enumerate(rows, start=1)]
+        self.snapshot = _event("snapshot", self.rows)
+        if self.ready.is_set() and (changed or removed):
+            self._publish(_event("update", {"changed": changed, "removed": removed}))
+        self.ready.set()
+
+    async def _run(self):
+        try:
+            while self.subscribers:
+                try:
+                    await self._reload()
+                except Exception:
+                    logger.exception("live: contest #%s reytingini o'qib bo'lmadi", self.contest_id)
+                try:
+                    await asyncio.wait_for(self.wake.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+                await asyncio.sleep(MIN_RELOAD_INTERVAL)
+        finally:
+            # Obunachi qolmadi — keyingi obunachi yangi snapshot'dan boshlaydi
+            self.ready.clear()
+            self.version = None
+            self.rows = []
+
+    def notify(self):
+        """Istalgan oqimdan chaqirsa bo'ladi: yangi natija bor."""
+        try:
+            self.loop.call_soon_threadsafe(self.wake.set)
+        except RuntimeError:
+            pass  # event loop yopilgan
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+_hubs = {}
+_hubs_lock = threading.Lock()
+
+
+def get_hub(contest_id):
+    loop = asyncio.get_running_loop()
+    with _hubs_lock:
+        hub = _hubs.get(contest_id)
+        if hub is None or hub.loop is not loop:
+            hub = _hubs[contest_id] = Hub(contest_id, loop)
+        return hub
+
+
+def notify(contest_ids):
+    """typingapp.ingest: commit'dan keyin — shu process'dagi tinglovchilarni darhol uyg'otadi."""
+    for contest_id in contest_ids:
+        hub = _hubs.get(contest_id)
+        if hub is not None and hub.subscribers:
+            hub.notify()
+
+
+async def stream(contest_id):
+    """SSE oqimi: retry, snapshot, keyin update'lar va heartbeat."""
+    hub = get_hub(contest_id)
+    queue = hub.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        await hub.ready.wait()
+        yield hub.snapshot
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if message is _CLOSE:
+                return
+            yield message
+    finally:
+        hub.unsubscribe(queue)
@@ -0,0 +1,150 @@
+# typingapp/management/commands/benchsqlite.py
+"""
+SQLite profili uchun benchmark: bir vaqtda o'qish (reyting) va yozish (natija) o'tkazuvchanligi.
+
+Vaqtinchalik bazada ikki holat solishtiriladi:
+  * before — SQLite standarti (journal_mode=DELETE, synchronous=FULL)
+  * after  — settings.SQLITE_JOURNAL_MODE + SQLITE_PRAGMAS (WAL, busy_timeout, mmap, cache, synchronous=NORMAL)
+
+    python manage.py benchsqlite --seconds 5 --readers 4 --writers 2
+"""
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+BEFORE_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+_SCHEMA = """
+CREATE TABLE run (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id INTEGER NOT NULL,
+    center_id INTEGER,
+    final_score DECIMAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX run_score ON run (final_score DESC, created_at DESC);
+CREATE INDEX run_center_score ON run (center_id, final_score DESC, created_at DESC);
+"""
+
+
+def _connect(path, pragmas):
+    # isolation_level=None — tranzaksiyalarni o'zimiz boshqaramiz (Django kabi)
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    for key, value in pragmas.items():
+        conn.execute(f"PRAGMA {key}={value}")
+    return conn
+
+
+class Command(BaseCommand):
+    help = "SQLite: standart va WAL profili bo'yicha parallel o'qish/yozish o'tkazuvchanligi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5.0, help="Har bir holat davomiyligi.")
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--rows", type=int, default=50000, help="Boshlang'ich runlar soni.")
+
+    def handle(self, *args, **opts):
+        after_pragmas = {"journal_mode": getattr(settings, "SQLITE_JOURNAL_MODE", "WAL"),
+                         **getattr(settings, "SQLITE_PRAGMAS", {})}
+        results = []
+        for label, pragmas in (("before", BEFORE_PRAGMAS), ("after", after_pragmas)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = str(Path(tmp) / "bench.sqlite3")
+                self._seed(path, pragmas, opts["rows"])
+                results.append((label, self._run(path, pragmas, opts)))
+
+        header = ("profil", "o'qish/s", "yozish/s", "locked", "o'qish p95 ms", "yozish p95 ms")
+        self.stdout.write("{:<8} {:>10} {:>10} {:>8} {:>14} {:>14}".format(*header))
+        for label, r in results:
+            self.stdout.write(
+                f"{label:<8} {r['reads'] / r['seconds']:>10.1f} {r['writes'] / r['seconds']:>10.1f} "
+                f"{r['locked']:>8} {r['read_p95'] * 1000:>14.2f} {r['write_p95'] * 1000:>14.2f}"
+            )
+
+    def _seed(self, path, pragmas, rows):
+        conn = _connect(path, pragmas)
+        conn.executescript(_SCHEMA)
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO run (player_id, center_id, final_score, created_at) VALUES (?, ?, ?, datetime('now'))",
+            ((random.randint(1, 5000), random.randint(1, 20), round(random.uniform(0, 120), 2)) for _ in range(rows)),
+        )
+        conn.execute("COMMIT")
+        conn.close()
+
+    def _run(self, path, pragmas, opts):
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = {"reads": 0, "writes": 0, "locked": 0}
+        read_lat, write_lat = [], []
+
+        def reader():
+            conn = _connect(path, pragmas)
+            n, lat = 0, []
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                conn.execute(
+                    "SELECT id, player_id, final_score FROM run WHERE center_id = ? "
+                    "ORDER BY final_score DESC, created_at DESC LIMIT 200",
+                    (random.randint(1, 20),),
+                ).fetchall()
+                lat.append(time.perf_counter() - t0)
+                n += 1
+            with lock:
+                totals["reads"] += n
+                read_lat.extend(lat)
+            conn.close()
+
+        def writer():
+            conn = _connect(path, pragmas)
+            n, locked, lat = 0, 0, []
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "INSERT INTO run (player_id, center_id, final_score, created_at) VALUES (?, ?, ?, datetime('now'))",
+                        (random.randint(1, 5000), random.randint(1, 20), round(random.uniform(0, 120), 2)),
+                    )
+                    conn.execute("COMMIT")
+                    n += 1
+                    lat.append(time.perf_counter() - t0)
+                except sqlite3.OperationalError:
+                    locked += 1
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+            with lock:
+                totals["writes"] += n
+                totals["locked"] += locked
+                write_lat.extend(lat)
+            conn.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(opts["readers"])]
+        threads += [threading.Thread(target=writer) for _ in range(opts["writers"])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(opts["seconds"])
+        stop.set()
+        for t in threads:
+            t.join()
+
+        def p95(values):
+            if not values:
+                return 0.0
+            values.sort()
+            return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+        totals.update(
+            seconds=time.perf_counter() - started,
+            read_p95=p95(read_lat),
+            write_p95=p95(write_lat),
+        )
+        return totals
@@ -0,0 +1,343 @@
+# typingapp/management/commands/benchtyping.py
+"""
+Har bir URL uchun latency benchmark (test client bilan).
+
+Vaqtinchalik test bazasi yaratiladi, sozlanadigan hajmdagi ma'lumot bilan to'ldiriladi,
+keyin typingapp/urls.py dagi har bir route bir necha marta chaqiriladi va
+p50/p95/p99 latency hamda SQL so'rovlar soni chiqariladi.
+
+    python manage.py benchtyping --users 200 --runs 20000 --iterations 30
+    python manage.py benchtyping --save-baseline            # joriy natijani baseline sifatida saqlash
+    python manage.py benchtyping --baseline bench.json      # baseline'dan oshsa — xato (exit 1)
+
+Bench prod keshiga tegmasligi uchun vaqtinchalik LocMemCache, cheklar uchun vaqtinchalik
+MEDIA_ROOT ishlatiladi, natijalar esa sinxron yoziladi (RESULT_INGEST ASYNC=False) — so'rovlar
+soni barqaror bo'lsin. typingapp/urls.py dagi har bir URL nomi uchun route bo'lishi shart:
+yangi URL qo'shilib, bu yerda unutilsa, bench xato bilan to'xtaydi.
+"""
+import asyncio
+import json
+import random
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import resolve
+from django.utils import timezone
+
+from typingapp import urls as typingapp_urls
+from typingapp.cache import bump_version, contest_start_scope
+from typingapp.models import (
+    Center,
+    Contest,
+    ContestEntry,
+    ContestRun,
+    ContestStanding,
+    Duration,
+    Language,
+    Level,
+    PracticeBest,
+    PracticeDaily,
+    Player,
+    PracticeRun,
+    ReceiptBlob,
+    Text,
+)
+from typingapp.storage import get_receipt_storage
+from typingapp.thumbnails import thumb_name
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "bench_baseline.json"
+
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchtyping"}}
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+class Command(BaseCommand):
+    help = "Har bir typingapp route uchun p50/p95/p99 latency va SQL so'rovlar soni; baseline bilan solishtiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--centers", type=int, default=5)
+        parser.add_argument("--texts", type=int, default=100, help="Har (til, daraja) uchun matnlar soni.")
+        parser.add_argument("--runs", type=int, default=20000, help="PracticeRun soni.")
+        parser.add_argument("--contest-runs", type=int, default=5000)
+        parser.add_argument("--iterations", type=int, default=30, help="Har route necha marta chaqiriladi.")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON fayli.")
+        parser.add_argument("--save-baseline", action="store_true", help="Natijani baseline sifatida yozish.")
+        parser.add_argument("--tolerance", type=float, default=0.5, help="p95 uchun ruxsat etilgan o'sish (0.5 = +50%%).")
+        parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                            help="Bundan kichik p95 o'sishi shovqin deb hisoblanadi.")
+        parser.add_argument("--json", dest="json_out", help="Natijani JSON faylga ham yozish.")
+
+    def handle(self, *args, **opts):
+        random.seed(0)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            ingest_conf = dict(getattr(settings, "RESULT_INGEST", {}), ASYNC=False)
+            upload_conf = dict(getattr(settings, "RECEIPT_UPLOAD", {}), ASYNC_THUMBNAILS=False)
+            with tempfile.TemporaryDirectory(prefix="benchtyping-") as media_root, \
+                    override_settings(CACHES=BENCH_CACHES, RESULT_INGEST=ingest_conf,
+                                      RECEIPT_UPLOAD=upload_conf, MEDIA_ROOT=media_root):
+                ctx = self._seed(opts)
+                results = self._bench(ctx, opts)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        self._report(results)
+        if opts["json_out"]:
+            Path(opts["json_out"]).write_text(json.dumps(results, indent=2))
+        if opts["save_baseline"]:
+            Path(opts["baseline"]).write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Baseline saqlandi: {opts['baseline']}"))
+            return
+        self._compare(results, opts)
+
+    # =========================
+    # Seed
+    # =========================
+    def _seed(self, opts):
+        now = timezone.now()
+        centers = Center.objects.bulk_create([Center(name=f"Markaz {i}") for i in range(opts["centers"])])
+        languages = Language.objects.bulk_create([Language(name=n) for n in ("O'zbek", "Rus", "Ingliz")])
+        levels = Level.objects.bulk_create([Level(name=n) for n in ("Oson", "O'rta", "Qiyin")])
+        durations = Duration.objects.bulk_create([Duration(seconds=s) for s in (30, 60, 120)])
+
+        words = "salom dunyo klaviatura tezlik aniqlik matn mashq natija reyting musobaqa".split()
+        texts = [
+            Text(language=lang, level=lvl, title=f"{lang.name} {lvl.name} {i}",
+                 content=" ".join(random.choice(words) for _ in range(120)))
+            for lang in languages for lvl in levels for i in range(opts["texts"])
+        ]
+        for text in texts:
+            text.compute_artifacts()  # bulk_create save() ni chaqirmaydi
+        Text.objects.bulk_create(texts, batch_size=500)
+
+        users = [User(username=f"bench{i}") for i in range(opts["users"])]
+        for u in users:
+            u.set_unusable_password()
+        User.objects.bulk_create(users, batch_size=500)
+        users = list(User.objects.filter(username__startswith="bench").order_by("id"))
+        # bulk_create signal yubormaydi — playerlarni o'zimiz yaratamiz
+        Player.objects.bulk_create([Player(user=u, name=u.username) for u in users], batch_size=500)
+        players = list(Player.objects.filter(user__in=users))
+
+        runs = []
+        for i in range(opts["runs"]):
+            wpm = Decimal(random.randint(10, 120))
+            acc = Decimal(random.randint(60, 100))
+            runs.append(PracticeRun(
+                player=random.choice(players), center=random.choice(centers),
+                language=random.choice(languages), level=random.choice(levels), duration=random.choice(durations),
+                wpm=wpm, accuracy=acc, final_score=(wpm * acc / 100).quantize(Decimal("0.01")),
+            ))
+        runs = PracticeRun.objects.bulk_create(runs, batch_size=1000)
+        self._seed_bests(runs)
+        Player.rebuild_stats()
+        PracticeDaily.record_runs(runs)
+
+        lang, lvl, dur = languages[0], levels[0], durations[1]
+        contest = Contest.objects.create(
+            title="Bench", start_at=now - timedelta(hours=1), end_at=now + timedelta(hours=1),
+            language=lang, level=lvl, duration=dur, status=Contest.RUNNING,
+        )
+        ContestEntry.objects.bulk_create(
+            [ContestEntry(user=u, contest=contest, receipt="receipts/bench.pdf", status=ContestEntry.APPROVED) for u in users],
+            batch_size=500,
+        )
+        # bulk_create signal yubormaydi — start paketini o'zimiz eskirtiramiz
+        bump_version(contest_start_scope(contest.id))
+        contest_runs = []
+        for i in range(opts["contest_runs"]):
+            wpm = Decimal(random.randint(10, 120))
+            acc = Decimal(random.randint(60, 100))
+            contest_runs.append(ContestRun(
+                contest=contest, user=random.choice(users), center=random.choice(centers),
+                wpm=wpm, accuracy=acc, final_score=(wpm * acc / 100).quantize(Decimal("0.01")),
+            ))
+        for run in ContestRun.objects.bulk_create(contest_runs, batch_size=1000):
+            ContestStanding.record(run)
+
+        return {
+            "user": users[0], "center": centers[0], "language": lang, "level": lvl, "duration": dur, "contest": contest,
+            "text": Text.objects.filter(language=lang, level=lvl).order_by("id").first(),
+            "entry": self._seed_receipt(ContestEntry.objects.get(contest=contest, user=users[0])),
+        }
+
+    def _seed_receipt(self, entry):
+        """Birinchi userning arizasiga haqiqiy chek fayli (~64 KB) va preview (vaqtinchalik MEDIA_ROOT'da)."""
+        entry.receipt.save("bench.pdf", ContentFile(random.randbytes(64 * 1024)))  # post_save → ReceiptBlob
+        entry.refresh_from_db()
+        blob = entry.receipt_blob
+        if not blob.thumbnail:
+            # Preview yasash bench mavzusi emas (Pillow/pdftoppm bo'lmasligi mumkin) — faqat berish o'lchanadi
+            name = get_receipt_storage().save_derived(thumb_name(blob.sha256), random.randbytes(8 * 1024))
+            ReceiptBlob.objects.filter(pk=blob.pk).update(thumbnail=name)
+        return entry
+
+    def _seed_bests(self, runs):
+        best = {}
+        for run in runs:
+            key = (run.player_id, run.center_id, run.language_id, run.level_id, run.duration_id)
+            if key not in best or run.final_score > best[key].final_score:
+                best[key] = run
+        PracticeBest.objects.bulk_create(
+            [
+                PracticeBest(
+                    player_id=r.player_id, center_id=r.center_id, language_id=r.language_id, level_id=r.level_id,
+                    duration_id=r.duration_id, run=r, wpm=r.wpm, accuracy=r.accuracy, final_score=r.final_score,
+                    created_at=r.created_at,
+                )
+                for r in best.values()
+            ],
+            batch_size=1000,
+        )
+
+    # =========================
+    # Bench
+    # =========================
+    def _routes(self, ctx):
+        lang, lvl, dur, center, contest = ctx["language"], ctx["level"], ctx["duration"], ctx["center"], ctx["contest"]
+        text, entry = ctx["text"], ctx["entry"]
+        result_post = {"lang_id": lang.id, "level_id": lvl.id, "duration": dur.seconds, "wpm": "55.5", "accuracy": "97.2"}
+        contest_post = {"wpm": "60", "accuracy": "95"}
+        # (nom, method, url, data, kutilgan status); "sse" — birinchi snapshot'gacha, logout — oxirida
+        return [
+            ("register", "get", "/register/", None, 200),
+            ("login", "get", "/login/", None, 200),
+            ("home", "get", "/", None, 200),
+            ("center_list", "get", "/centers/", None, 200),
+            ("center_pick", "get", f"/centers/pick/{center.id}/", None, 302),
+            ("leaderboard", "get", "/leaderboard/", None, 200),
+            ("leaderboard_filter", "get", f"/leaderboard/?center={center.id}", None, 200),
+            ("leaderboard_center", "get", f"/leaderboard/{center.id}/", None, 200),
+            ("select_language", "get", "/languages/", None, 200),
+            ("select_level", "get", f"/levels/{lang.id}/", None, 200),
+            ("select_time", "get", f"/select-time/{lang.id}/{lvl.id}/", None, 200),
+            ("typing_practice", "get", f"/typing/{lang.id}/{lvl.id}/{dur.seconds}/", None, 200),
+            ("text_random", "get", f"/texts/random/{lang.id}/{lvl.id}/", None, 302),
+            ("text_payload", "get", f"/texts/{text.id}/", None, 200),
+            ("text_words", "get", f"/texts/{text.id}/words/?start=50&count=50", None, 200),
+            ("result", "post", "/result/", result_post, 200),
+            ("progress", "get", "/progress/", None, 200),
+            ("progress_filter", "get", f"/progress/?days=30&lang={lang.id}&duration={dur.seconds}", None, 200),
+            ("contests_list", "get", "/contests/", None, 200),
+            ("contest_detail", "get", f"/contests/{contest.id}/", None, 200),
+            ("contest_join", "get", f"/contests/{contest.id}/join/", None, 302),
+            ("contest_start", "get", f"/contests/{contest.id}/start/", None, 200),
+            ("contest_result", "post", f"/contests/{contest.id}/result/", contest_post, 200),
+            ("contest_leaderboard", "get", f"/contests/{contest.id}/leaderboard/", None, 200),
+            ("contest_leaderboard_filter", "get", f"/contests/{contest.id}/leaderboard/?center={center.id}", None, 200),
+            ("contest_live", "sse", f"/contests/{contest.id}/live/", None, 200),
+            ("receipt_file", "get", f"/receipts/{entry.id}/", None, 200),
+            ("receipt_preview", "get", f"/receipts/{entry.id}/preview/", None, 200),
+            ("healthz", "get", "/healthz", None, 200),
+            ("logout", "get", "/logout/", None, 302),
+        ]
+
+    def _check_coverage(self, routes):
+        """typingapp/urls.py dagi har bir URL nomi kamida bitta route bilan o'lchanishi kerak."""
+        covered = {resolve(url.split("?", 1)[0]).url_name for _, _, url, _, _ in routes}
+        missing = sorted(p.name for p in typingapp_urls.urlpatterns if p.name not in covered)
+        if missing:
+            raise CommandError("benchtyping: route yo'q URL'lar: " + ", ".join(missing))
+
+    async def _sse(self, client, url):
+        """SSE javobini birinchi snapshot'gacha (retry + snapshot) o'qiydi va ulanishni yopadi."""
+        resp = await client.get(url)
+        if resp.status_code == 200:
+            chunks = aiter(resp.streaming_content)
+            try:
+                for _ in range(2):
+                    await anext(chunks)
+            finally:
+                await chunks.aclose()
+        return resp
+
+    def _bench(self, ctx, opts):
+        client = Client()
+        client.force_login(ctx["user"])
+        client.get(f"/centers/pick/{ctx['center'].id}/")
+        async_client = AsyncClient()
+        async_client.cookies = client.cookies
+        loop = asyncio.new_event_loop()  # SSE hub'lari bitta loop'da yashaydi
+
+        routes = self._routes(ctx)
+        self._check_coverage(routes)
+        results = {}
+        for name, method, url, data, status in routes:
+            if method == "sse":
+                call = lambda url: loop.run_until_complete(self._sse(async_client, url))  # noqa: E731
+            else:
+                call = getattr(client, method)
+            for _ in range(opts["warmup"]):
+                call(url, data) if data else call(url)
+
+            timings, queries = [], []
+            for _ in range(opts["iterations"]):
+                with CaptureQueriesContext(connections["default"]) as q_default, \
+                        CaptureQueriesContext(connections["readonly"]) as q_readonly:
+                    t0 = time.perf_counter()
+                    resp = call(url, data) if data else call(url)
+                    timings.append(time.perf_counter() - t0)
+                if resp.status_code != status:
+                    raise CommandError(f"{name}: {url} → {resp.status_code} (kutilgan {status})")
+                queries.append(len(q_default) + len(q_readonly))
+
+            results[name] = {
+                "p50_ms": round(_percentile(timings, 50) * 1000, 3),
+                "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+                "p99_ms": round(_percentile(timings, 99) * 1000, 3),
+                "queries": max(queries),
+            }
+        loop.close()
+        return results
+
+    # =========================
+    # Hisobot / baseline
+    # =========================
+    def _report(self, results):
+        self.stdout.write(f"{'route':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL':>5}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<28} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['queries']:>5}")
+
+    def _compare(self, results, opts):
+        path = Path(opts["baseline"])
+        if not path.exists():
+            self.stdout.write(f"Baseline topilmadi ({path}) — solishtirilmadi. --save-baseline bilan yarating.")
+            return
+        baseline = json.loads(path.read_text())
+        failures = []
+        for name, r in results.items():
+            base = baseline.get(name)
+            if not base:
+                continue
+            limit = max(base["p95_ms"] * (1 + opts["tolerance"]), base["p95_ms"] + opts["min_delta_ms"])
+            if r["p95_ms"] > limit:
+                failures.append(f"{name}: p95 {r['p95_ms']:.2f}ms > {limit:.2f}ms (baseline {base['p95_ms']:.2f}ms)")
+            if r["queries"] > base["queries"]:
+                failures.append(f"{name}: SQL {r['queries']} > baseline {base['queries']}")
+        if failures:
+            raise CommandError("Performance regressiya:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Baseline doirasida."))
@@ -0,0 +1,29 @@
+# typingapp/management/commands/build_thumbnails.py
+"""
+Preview'i yo'q chek bloblari uchun preview yasaydi (fon navbatidan yo'qolgan ishlar, eski cheklar).
+
+    python manage.py build_thumbnails [--limit 500]
+"""
+from django.core.management.base import BaseCommand
+
+from typingapp.models import ReceiptBlob
+from typingapp.thumbnails import build
+
+
+class Command(BaseCommand):
+    help = "Chek bloblari uchun yetishmayotgan preview'larni yasaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=0, help="Ko'pi bilan nechta blob (0 = hammasi)")
+
+    def handle(self, *args, **opts):
+        ids = ReceiptBlob.objects.filter(thumbnail="").order_by("id").values_list("id", flat=True)
+        if opts["limit"]:
+            ids = ids[: opts["limit"]]
+        done = skipped = 0
+        for blob_id in list(ids):
+            if build(blob_id):
+                done += 1
+            else:
+                skipped += 1
+        self.stdout.write(f"Preview: {done} ta yasaldi, {skipped} ta o'tkazib yuborildi.")
@@ -0,0 +1,76 @@
+# typingapp/management/commands/dedupe_receipts.py
+"""
+Eski (receipts/%Y/%m/%d/ dagi) cheklarni content-addressed storage'ga ko'chiradi.
+
+Har bir fayl hash'lanadi va receipts/sha256/... ga bir marta yoziladi; bir xil
+baytli cheklar (masalan, Malumotnoma.pdf va Malumotnoma_s5CGxvc.pdf) bitta blobga
+ishora qiladi. Ko'chirilgan eski fayllar o'chiriladi (--keep bo'lsa qoladi).
+
+    python manage.py dedupe_receipts [--dry-run] [--keep]
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from typingapp.models import ContestEntry
+from typingapp.storage import get_receipt_storage, receipt_digest
+
+
+def _sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class Command(BaseCommand):
+    help = "Eski cheklarni sha256 bo'yicha bitta nusxaga keltiradi (ReceiptBlob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Hech narsani o'zgartirmay, hisobot beradi")
+        parser.add_argument("--keep", action="store_true", help="Eski fayllarni o'chirmaslik")
+
+    def handle(self, *args, **opts):
+        storage = get_receipt_storage()
+        entries = ContestEntry.objects.filter(receipt_blob__isnull=True).exclude(receipt="").order_by("id")
+
+        migrated, missing, legacy, digests = 0, 0, set(), {}
+        for entry in entries.iterator():
+            name = entry.receipt.name
+            if receipt_digest(name):
+                # Fayl allaqachon hash nomida, faqat blob yozuvi yo'q
+                if not opts["dry_run"]:
+                    entry.save(update_fields=["receipt"])
+                migrated += 1
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f"  #{entry.id}: {name} topilmadi")
+                missing += 1
+                continue
+
+            path = storage.path(name)
+            digests.setdefault(_sha256(path), set()).add(path)
+            if not opts["dry_run"]:
+                with transaction.atomic(), open(path, "rb") as fh:
+                    entry.receipt.name = storage.save(name, File(fh))
+                    entry.save(update_fields=["receipt"])
+            legacy.add(path)
+            migrated += 1
+
+        sizes = {path: os.path.getsize(path) for path in legacy}
+        total = sum(sizes.values())
+        unique = sum(sizes[next(iter(paths))] for paths in digests.values())
+        if not opts["dry_run"] and not opts["keep"]:
+            for path in legacy:
+                os.unlink(path)
+
+        self.stdout.write(
+            f"Arizalar: {migrated} ko'chirildi, {missing} fayl topilmadi. "
+            f"Eski fayllar: {len(legacy)} → {len(digests)} noyob blob, "
+            f"{total - unique} bayt tejaldi."
+            + (" (dry-run)" if opts["dry_run"] else "")
+        )
@@ -0,0 +1,162 @@
+# typingapp/management/commands/import_texts.py
+"""
+Katta korpus faylidan Text'larni oqim bo'yicha import qiladi.
+
+    python manage.py import_texts corpus.txt --language "O'zbek" --level Oson
+    python manage.py import_texts corpus.jsonl --language 1 --level 2 --format jsonl
+    cat corpus.txt | python manage.py import_texts - --language 1 --level 2 --separator "---"
+
+Formatlar:
+  * text  — parchalar ajratuvchi qator bilan bo'lingan (standart: bo'sh qator);
+  * jsonl — har qatorda {"content": "...", "title": "..."} (title ixtiyoriy).
+
+Fayl qatorma-qator o'qiladi, parchalar BATCH tadan bulk_create qilinadi (har batch — alohida
+tranzaksiya), shuning uchun xotira fayl hajmiga bog'liq emas. Takrorlar content_hash
+(normalized matn sha256) bo'yicha tashlab yuboriladi — bazadagilar ham, fayl ichidagilar ham.
+"""
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from typingapp.cache import TEXTS_SCOPE, bump_version
+from typingapp.models import Language, Level, Text
+
+
+def _lookup(model, value):
+    """ID yoki nom (katta-kichik harfsiz) bo'yicha."""
+    qs = model.objects.filter(pk=value) if value.isdigit() else model.objects.filter(name__iexact=value)
+    obj = qs.first()
+    if obj is None:
+        raise CommandError(f"{model.__name__} topilmadi: {value}")
+    return obj
+
+
+def _text_passages(stream, separator):
+    """Ajratuvchi qatorgacha bo'lgan qatorlar — bitta parcha (title yo'q)."""
+    lines = []
+    for line in stream:
+        if line.strip() == separator:
+            if lines:
+                yield None, "".join(lines)
+                lines = []
+        else:
+            lines.append(line)
+    if lines:
+        yield None, "".join(lines)
+
+
+def _jsonl_passages(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            raise CommandError(f"{number}-qator: JSON emas ({exc})")
+        if not isinstance(item, dict) or not isinstance(item.get("content"), str):
+            raise CommandError(f"{number}-qator: \"content\" maydoni kerak")
+        yield item.get("title") or None, item["content"]
+
+
+class Command(BaseCommand):
+    help = "Korpus faylidan (text yoki JSONL) Text'larni ommaviy import qiladi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fayl yo'li yoki '-' (stdin)")
+        parser.add_argument("--language", required=True, help="Language ID yoki nomi")
+        parser.add_argument("--level", required=True, help="Level ID yoki nomi")
+        parser.add_argument("--format", choices=("auto", "text", "jsonl"), default="auto",
+                            help="auto — .jsonl kengaytmasi bo'yicha")
+        parser.add_argument("--separator", default="", help="text formatida parchalar ajratuvchisi (standart: bo'sh qator)")
+        parser.add_argument("--title-prefix", default="", help="Sarlavhasiz parchalarga: '<prefix> <n>'")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Bazaga yozmasdan hisobot beradi")
+
+    def handle(self, *args, **opts):
+        language = _lookup(Language, opts["language"])
+        level = _lookup(Level, opts["level"])
+
+        path = opts["path"]
+        fmt = opts["format"]
+        if fmt == "auto":
+            fmt = "jsonl" if path.endswith(".jsonl") else "text"
+
+        if path == "-":
+            stream, total_bytes = sys.stdin, 0
+        else:
+            try:
+                stream = open(path, encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(str(exc))
+            total_bytes = os.path.getsize(path)
+
+        try:
+            passages = _jsonl_passages(stream) if fmt == "jsonl" else _text_passages(stream, opts["separator"].strip())
+            self.import_passages(passages, language, level, opts, stream, total_bytes)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def import_passages(self, passages, language, level, opts, stream, total_bytes):
+        self.stats = {"read": 0, "created": 0, "duplicates": 0, "empty": 0}
+        self.started = time.perf_counter()
+        batch = []
+        for title, content in passages:
+            self.stats["read"] += 1
+            text = Text(language=language, level=level, content=content,
+                        title=(title or (f"{opts['title_prefix']} {self.stats['read']}" if opts["title_prefix"] else ""))[:200])
+            text.compute_artifacts()
+            if not text.word_count:
+                self.stats["empty"] += 1
+                continue
+            batch.append(text)
+            if len(batch) >= opts["batch_size"]:
+                self.flush(batch, opts["dry_run"])
+                self.progress(stream, total_bytes)
+                batch = []
+        if batch:
+            self.flush(batch, opts["dry_run"])
+
+        if self.stats["created"] and not opts["dry_run"]:
+            # bulk_create post_save yubormaydi — matn indekslari shu yerda eskirtiriladi
+            bump_version(TEXTS_SCOPE)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f"{'[dry-run] ' if opts['dry_run'] else ''}{self.stats['read']} ta parcha o'qildi: "
+            f"{self.stats['created']} ta yangi, {self.stats['duplicates']} ta takror, "
+            f"{self.stats['empty']} ta bo'sh — {elapsed:.1f}s"
+        )
+
+    def flush(self, batch, dry_run):
+        """Batch ichidagi va bazadagi takrorlarni olib tashlab, bitta tranzaksiyada yozadi."""
+        unique = {}
+        for text in batch:
+            unique.setdefault(text.content_hash, text)
+        with transaction.atomic():
+            existing = set(
+                Text.objects.filter(content_hash__in=list(unique)).values_list("content_hash", flat=True)
+            )
+            new = [text for digest, text in unique.items() if digest not in existing]
+            if new and not dry_run:
+                Text.objects.bulk_create(new)
+        self.stats["created"] += len(new)
+        self.stats["duplicates"] += len(batch) - len(new)
+
+    def progress(self, stream, total_bytes):
+        elapsed = time.perf_counter() - self.started
+        rate = self.stats["read"] / elapsed if elapsed else 0
+        done = ""
+        if total_bytes:
+            try:
+                done = f"{min(stream.buffer.tell() / total_bytes, 1):.0%}, "
+            except (AttributeError, OSError, ValueError):
+                pass
+        self.stderr.write(
+            f"  {done}{self.stats['read']} o'qildi, {self.stats['created']} yangi, "
+            f"{self.stats['duplicates']} takror ({rate:,.0f}/s)"
+        )
@@ -0,0 +1,46 @@
+# typingapp/management/commands/settle_contests.py
+"""
+Musobaqalarni yakunlaydi: yakuniy reyting snapshot'i, sovrinlar, status=SETTLED (typingapp.settlement).
+
+    python manage.py settle_contests 12 15      # aniq musobaqalar
+    python manage.py settle_contests --due      # FINISHED va vaqti tugagan RUNNING musobaqalar
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from typingapp.models import Contest
+from typingapp.settlement import SettlementError, settle
+
+
+class Command(BaseCommand):
+    help = "Musobaqalarni yakunlaydi va g'oliblarni aniqlaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("contest_ids", nargs="*", type=int)
+        parser.add_argument("--due", action="store_true", help="Yakunlanishi kerak bo'lgan hamma musobaqalar")
+
+    def handle(self, *args, **opts):
+        if opts["contest_ids"]:
+            contests = Contest.objects.filter(id__in=opts["contest_ids"]).order_by("id")
+        elif opts["due"]:
+            contests = (Contest.objects.filter(status=Contest.FINISHED)
+                        | Contest.objects.filter(status=Contest.RUNNING, end_at__lt=timezone.now())).order_by("id")
+        else:
+            raise CommandError("Musobaqa ID'lari yoki --due kerak.")
+
+        failed = 0
+        for contest in contests:
+            started = time.perf_counter()
+            try:
+                count = settle(contest)
+            except SettlementError as exc:
+                failed += 1
+                self.stderr.write(f"#{contest.id} {contest.title}: {exc}")
+                continue
+            self.stdout.write(
+                f"#{contest.id} {contest.title}: {count} ta ishtirokchi, {time.perf_counter() - started:.2f}s"
+            )
+        if failed:
+            raise CommandError(f"{failed} ta musobaqa yakunlanmadi.")
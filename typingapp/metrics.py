@@ -0,0 +1,219 @@
+# typingapp/metrics.py
+"""
+Prometheus formatidagi metrikalar (/metrics).
+
+MetricsMiddleware har bir view nomi bo'yicha yig'adi:
+  * so'rov latency histogrammasi
+  * SQL so'rovlar soni va vaqti
+  * template render vaqti (TimedDjangoTemplates backend orqali)
+  * javob hajmi
+Bundan tashqari, SQLite yozish qulfini kutish vaqti (BEGIN IMMEDIATE davomiyligi)
+alohida histogrammada — u fon oqimlarini (typingapp.ingest) ham qamrab oladi.
+
+Qiymatlar process xotirasida; har bir gunicorn worker o'z qatorlarini pid label bilan beradi.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LOCK_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _fmt_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _fmt_labels(pairs):
+    if not pairs:
+        return ""
+    inner = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + inner + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket_0..bucket_n, sum, count]
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            base = tuple(const_labels) + tuple(zip(self.labelnames, labels))
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_fmt_labels(base + (('le', _fmt_value(bound)),))} {series[i]}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(base + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(base)} {_fmt_value(float(series[-2]))}")
+            lines.append(f"{self.name}_count{_fmt_labels(base)} {series[-1]}")
+        return lines
+
+
+# =========================
+# Registry
+# =========================
+REQUEST_LATENCY = Histogram(
+    "typing_request_duration_seconds", "So'rov latency (view bo'yicha).", LATENCY_BUCKETS, ("view", "method")
+)
+SQL_QUERIES = Histogram(
+    "typing_request_sql_queries", "Bitta so'rovdagi SQL so'rovlar soni.", QUERY_COUNT_BUCKETS, ("view",)
+)
+SQL_TIME = Histogram(
+    "typing_request_sql_seconds", "Bitta so'rovdagi SQL vaqti.", LATENCY_BUCKETS, ("view",)
+)
+RENDER_TIME = Histogram(
+    "typing_request_render_seconds", "Bitta so'rovdagi template render vaqti.", LATENCY_BUCKETS, ("view",)
+)
+RESPONSE_SIZE = Histogram(
+    "typing_response_size_bytes", "Javob hajmi.", SIZE_BUCKETS, ("view",)
+)
+LOCK_WAIT = Histogram(
+    "typing_sqlite_lock_wait_seconds", "SQLite yozish qulfini kutish (BEGIN IMMEDIATE).", LOCK_WAIT_BUCKETS, ("alias",)
+)
+
+HISTOGRAMS = [REQUEST_LATENCY, SQL_QUERIES, SQL_TIME, RENDER_TIME, RESPONSE_SIZE, LOCK_WAIT]
+
+
+class _RequestStats:
+    __slots__ = ("queries", "sql_seconds", "render_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+_current = ContextVar("typingapp_request_stats", default=None)
+
+
+# =========================
+# SQL: har bir ulanishga doimiy execute_wrapper
+# =========================
+def _sql_wrapper(alias):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = _current.get()
+            if stats is not None:
+                stats.queries += 1
+                stats.sql_seconds += elapsed
+            if sql.startswith("BEGIN"):
+                LOCK_WAIT.observe(elapsed, alias)
+    return wrapper
+
+
+@receiver(connection_created)
+def _install_sql_wrapper(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_sql_wrapper(connection.alias))
+
+
+# =========================
+# Template render vaqti
+# =========================
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.render_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, render vaqtini joriy so'rov metrikasiga qo'shadi."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+# =========================
+# Middleware
+# =========================
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unmatched"
+        REQUEST_LATENCY.observe(elapsed, view, request.method)
+        SQL_QUERIES.observe(stats.queries, view)
+        SQL_TIME.observe(stats.sql_seconds, view)
+        RENDER_TIME.observe(stats.render_seconds, view)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), view)
+        return response
+
+
+# =========================
+# Eksport
+# =========================
+def render_prometheus():
+    const = (("pid", os.getpid()),)
+    lines = []
+    for hist in HISTOGRAMS:
+        lines.extend(hist.render(const))
+
+    # Natijalarni yozish navbati (typingapp.ingest)
+    from .ingest import stats as ingest_stats
+    snap = ingest_stats.snapshot()
+    labels = _fmt_labels(const)
+    for name, key, kind, help_text in (
+        ("typing_ingest_accepted_total", "accepted", "counter", "Qabul qilingan natijalar."),
+        ("typing_ingest_rows_total", "rows", "counter", "Bazaga yozilgan natijalar."),
+        ("typing_ingest_batches_total", "batches", "counter", "Yozilgan partiyalar."),
+        ("typing_ingest_failures_total", "failures", "counter", "Muvaffaqiyatsiz flushlar."),
+        ("typing_ingest_flush_seconds_total", "flush_seconds_total", "counter", "Flushlarga ketgan umumiy vaqt."),
+        ("typing_ingest_flush_seconds_max", "flush_seconds_max", "gauge", "Eng uzoq flush."),
+        ("typing_ingest_last_batch_size", "last_batch_size", "gauge", "Oxirgi partiya hajmi."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name}{labels} {_fmt_value(snap[key])}"]
+    return "\n".join(lines) + "\n"
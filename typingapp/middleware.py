@@ -0,0 +1,31 @@
+# typingapp/middleware.py
+from django.utils.functional import SimpleLazyObject
+
+from .models import Player
+
+
+def _resolve_player(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    try:
+        # PlayerModelBackend user bilan birga yuklagan — qo'shimcha so'rov yo'q
+        return user.player
+    except Player.DoesNotExist:
+        # Eski userlar (signaldan oldin yaratilgan) uchun zaxira yo'l
+        player, _ = Player.objects.get_or_create(
+            user=user,
+            defaults={"name": user.get_full_name() or user.username},
+        )
+        return player
+
+
+class PlayerMiddleware:
+    """request.player — joriy userning Player'i (lazy). AuthenticationMiddleware'dan keyin turadi."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.player = SimpleLazyObject(lambda: _resolve_player(request))
+        return self.get_response(request)
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:55
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_bests(apps, schema_editor):
+    PracticeRun = apps.get_model("typingapp", "PracticeRun")
+    PracticeBest = apps.get_model("typingapp", "PracticeBest")
+
+    # Runlar ball bo'yicha kamayib boradi — har kesim uchun birinchi uchragan run eng yaxshisi.
+    seen = set()
+    batch = []
+    runs = (PracticeRun.objects
+            .order_by("-final_score", "-created_at")
+            .values_list("id", "player_id", "center_id", "language_id", "level_id", "duration_id",
+                         "wpm", "accuracy", "final_score", "created_at"))
+    for (rid, pid, cid, lid, lvid, did, wpm, acc, score, created) in runs.iterator():
+        key = (pid, cid, lid, lvid, did)
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(PracticeBest(
+            player_id=pid, center_id=cid, language_id=lid, level_id=lvid, duration_id=did,
+            run_id=rid, wpm=wpm, accuracy=acc, final_score=score, created_at=created,
+        ))
+        if len(batch) >= 500:
+            PracticeBest.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PracticeBest.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0007_contest_contestrun_contestentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeBest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wpm', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=6)),
+                ('accuracy', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('final_score', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=7)),
+                ('created_at', models.DateTimeField()),
+                ('center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bests', to='typingapp.center')),
+                ('duration', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.duration')),
+                ('language', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.language')),
+                ('level', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.level')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bests', to='typingapp.player')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='typingapp.practicerun')),
+            ],
+            options={
+                'ordering': ('-final_score', '-created_at'),
+                'indexes': [models.Index(fields=['-final_score', '-created_at'], name='typingapp_p_final_s_35ef5a_idx'), models.Index(fields=['center', '-final_score', '-created_at'], name='typingapp_p_center__966de0_idx'), models.Index(fields=['player', 'center', 'language', 'level', 'duration'], name='typingapp_p_player__45327e_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_bests, migrations.RunPython.noop),
+    ]
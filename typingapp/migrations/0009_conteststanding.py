@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:58
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_standings(apps, schema_editor):
+    ContestRun = apps.get_model("typingapp", "ContestRun")
+    ContestStanding = apps.get_model("typingapp", "ContestStanding")
+
+    # Vaqt bo'yicha o'sib boradi — oxirgi yozilgan qiymat oxirgi urinish bo'ladi
+    by_center = {}
+    latest = {}
+    runs = ContestRun.objects.order_by("created_at", "id")
+    for run in runs.iterator():
+        by_center[(run.contest_id, run.user_id, run.center_id)] = run
+        latest[(run.contest_id, run.user_id)] = run.id
+
+    ContestStanding.objects.bulk_create(
+        [
+            ContestStanding(
+                contest_id=run.contest_id, user_id=run.user_id, center_id=run.center_id, run_id=run.id,
+                wpm=run.wpm, accuracy=run.accuracy, final_score=run.final_score, created_at=run.created_at,
+                is_latest=(latest[(run.contest_id, run.user_id)] == run.id),
+            )
+            for run in by_center.values()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0008_practicebest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContestStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wpm', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=6)),
+                ('accuracy', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('final_score', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=7)),
+                ('is_latest', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.center')),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='typingapp.contest')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='typingapp.contestrun')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-final_score', '-created_at'),
+                'indexes': [models.Index(fields=['contest', 'is_latest', '-final_score', '-created_at'], name='typingapp_c_contest_645b6d_idx'), models.Index(fields=['contest', 'center', '-final_score', '-created_at'], name='typingapp_c_contest_9c2aae_idx'), models.Index(fields=['contest', 'user'], name='typingapp_c_contest_8f5f51_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
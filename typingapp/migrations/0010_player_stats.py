@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:07
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_player_stats(apps, schema_editor):
+    Player = apps.get_model("typingapp", "Player")
+    PracticeRun = apps.get_model("typingapp", "PracticeRun")
+
+    runs = PracticeRun.objects.filter(player=OuterRef("pk")).order_by().values("player")
+    Player.objects.update(
+        runs_count=Coalesce(Subquery(runs.annotate(v=Count("id")).values("v")), 0),
+        best_score=Subquery(runs.annotate(v=Max("final_score")).values("v")),
+        wpm_total=Coalesce(Subquery(runs.annotate(v=Sum("wpm")).values("v")), Decimal("0.00")),
+        last_run_at=Subquery(runs.annotate(v=Max("created_at")).values("v")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0009_conteststanding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='best_score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='runs_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='wpm_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14),
+        ),
+        migrations.RunPython(backfill_player_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0010_player_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contestentry',
+            index=models.Index(fields=['status', 'created_at'], name='typingapp_c_status_20fae4_idx'),
+        ),
+    ]
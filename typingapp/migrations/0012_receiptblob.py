@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:11
+
+import django.db.models.deletion
+import typingapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0011_contestentry_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.AlterField(
+            model_name='contestentry',
+            name='receipt',
+            field=models.FileField(storage=typingapp.storage.get_receipt_storage, upload_to='receipts/'),
+        ),
+        migrations.AddField(
+            model_name='contestentry',
+            name='receipt_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='typingapp.receiptblob'),
+        ),
+    ]
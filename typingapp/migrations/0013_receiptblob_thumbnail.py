@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0012_receiptblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receiptblob',
+            name='thumbnail',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0013_receiptblob_thumbnail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contest',
+            name='settled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ContestFinalStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('username', models.CharField(max_length=150)),
+                ('center_name', models.CharField(blank=True, max_length=150)),
+                ('wpm', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('accuracy', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('final_score', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('prize', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.center')),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_standings', to='typingapp.contest')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='typingapp.contestrun')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('contest', 'rank'),
+                'indexes': [models.Index(fields=['contest', 'center', 'rank'], name='typingapp_c_contest_6b48b7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contest', 'rank'), name='final_standing_contest_rank')],
+            },
+        ),
+    ]
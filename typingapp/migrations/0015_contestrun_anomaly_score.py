@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0014_contest_settlement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contestrun',
+            name='anomaly_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
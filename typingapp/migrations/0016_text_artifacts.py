@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:26
+
+import hashlib
+import sys
+from array import array
+
+from django.db import migrations, models
+
+
+def backfill_text_artifacts(apps, schema_editor):
+    # Text.compute_artifacts nusxasi (migratsiyada model metodlari yo'q)
+    Text = apps.get_model("typingapp", "Text")
+    for text in Text.objects.order_by("id").iterator():
+        normalized = " ".join((text.content or "").split())
+        offsets = array("I")
+        if normalized:
+            offsets.append(0)
+            offsets.extend(i + 1 for i, ch in enumerate(normalized) if ch == " ")
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        Text.objects.filter(pk=text.pk).update(
+            normalized=normalized,
+            word_count=len(offsets),
+            char_count=len(normalized),
+            offsets_blob=offsets.tobytes(),
+            content_hash=hashlib.sha256(normalized.encode()).hexdigest(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0015_contestrun_anomaly_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='text',
+            name='char_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='text',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='text',
+            name='normalized',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='text',
+            name='offsets_blob',
+            field=models.BinaryField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='text',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_text_artifacts, migrations.RunPython.noop),
+    ]
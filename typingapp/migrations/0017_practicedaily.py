@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:32
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _p90(hist):
+    # typingapp.models.hist_percentile nusxasi (migratsiyada model kodi yo'q)
+    total = sum(hist.values())
+    rank = -(-total * 90 // 100)
+    seen = 0
+    for bucket, n in sorted(hist.items(), key=lambda item: int(item[0])):
+        seen += n
+        if seen >= rank:
+            return Decimal(int(bucket)).quantize(Decimal("0.01"))
+    return Decimal("0.00")
+
+
+def backfill_practice_daily(apps, schema_editor):
+    # Runlar player bo'yicha ketma-ket o'qiladi — xotirada faqat bitta playerning kunlari turadi
+    PracticeRun = apps.get_model("typingapp", "PracticeRun")
+    PracticeDaily = apps.get_model("typingapp", "PracticeDaily")
+    rows, player_id = {}, None
+
+    def flush():
+        for row in rows.values():
+            row.wpm_p90 = _p90(row.wpm_hist)
+            row.acc_p90 = _p90(row.acc_hist)
+        PracticeDaily.objects.bulk_create(rows.values(), batch_size=500)
+        rows.clear()
+
+    runs = (PracticeRun.objects.order_by("player_id", "id")
+            .values_list("player_id", "language_id", "duration_id", "wpm", "accuracy", "created_at"))
+    for pid, language_id, duration_id, wpm, acc, created_at in runs.iterator(chunk_size=2000):
+        if pid != player_id:
+            flush()
+            player_id = pid
+        key = (timezone.localdate(created_at), language_id, duration_id)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = PracticeDaily(
+                player_id=pid, day=key[0], language_id=language_id, duration_id=duration_id,
+                wpm_hist={}, acc_hist={},
+            )
+        row.runs_count += 1
+        row.wpm_best = max(row.wpm_best, wpm)
+        row.acc_best = max(row.acc_best, acc)
+        row.wpm_total += wpm
+        row.acc_total += acc
+        row.wpm_hist[str(int(wpm))] = row.wpm_hist.get(str(int(wpm)), 0) + 1
+        row.acc_hist[str(int(acc))] = row.acc_hist.get(str(int(acc)), 0) + 1
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0016_text_artifacts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('runs_count', models.PositiveIntegerField(default=0)),
+                ('wpm_best', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=6)),
+                ('wpm_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('wpm_p90', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=6)),
+                ('acc_best', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('acc_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('acc_p90', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('wpm_hist', models.JSONField(blank=True, default=dict)),
+                ('acc_hist', models.JSONField(blank=True, default=dict)),
+                ('duration', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.duration')),
+                ('language', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='typingapp.language')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily', to='typingapp.player')),
+            ],
+            options={
+                'ordering': ('player', 'day'),
+                'indexes': [models.Index(fields=['player', 'day'], name='typingapp_p_player__e9e9d3_idx'), models.Index(fields=['player', 'language', 'duration', 'day'], name='typingapp_p_player__3a156a_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_practice_daily, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0017_practicedaily'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contestrun',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='practicerun',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def set_journal_mode(apps, schema_editor):
+    # journal_mode fayl sarlavhasida saqlanadi — bir marta yoqish kifoya (settings.SQLITE_JOURNAL_MODE)
+    connection = schema_editor.connection
+    mode = getattr(settings, "SQLITE_JOURNAL_MODE", "")
+    if connection.vendor != "sqlite" or not mode:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode={mode}")
+
+
+class Migration(migrations.Migration):
+    # PRAGMA journal_mode tranzaksiya ichida o'zgarmaydi
+    atomic = False
+
+    dependencies = [
+        ('typingapp', '0018_run_created_at_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Gistogrammalar butun sonli kalitlardan 0.01 qadamli kalitlarga o'tadi ("<qiymat × 100>")
+# — p90 runlarning aniq persentiliga teng bo'lsin. Kunlik qatorlar runlardan qayta yig'iladi.
+
+from decimal import Decimal
+from django.db import migrations
+from django.utils import timezone
+
+
+def _bucket(value):
+    # typingapp.models.hist_bucket nusxasi (migratsiyada model kodi yo'q)
+    return str(int((Decimal(value) * 100).to_integral_value()))
+
+
+def _p90(hist):
+    # typingapp.models.hist_percentile nusxasi
+    total = sum(hist.values())
+    rank = -(-total * 90 // 100)
+    seen = 0
+    for bucket, n in sorted(hist.items(), key=lambda item: int(item[0])):
+        seen += n
+        if seen >= rank:
+            break
+    return Decimal(int(bucket)).scaleb(-2)
+
+
+def rebuild_practice_daily(apps, schema_editor):
+    # 0017 dagi backfill bilan bir xil: runlar player bo'yicha ketma-ket o'qiladi
+    PracticeRun = apps.get_model("typingapp", "PracticeRun")
+    PracticeDaily = apps.get_model("typingapp", "PracticeDaily")
+    PracticeDaily.objects.all().delete()
+    rows, player_id = {}, None
+
+    def flush():
+        for row in rows.values():
+            row.wpm_p90 = _p90(row.wpm_hist)
+            row.acc_p90 = _p90(row.acc_hist)
+        PracticeDaily.objects.bulk_create(rows.values(), batch_size=500)
+        rows.clear()
+
+    runs = (PracticeRun.objects.order_by("player_id", "id")
+            .values_list("player_id", "language_id", "duration_id", "wpm", "accuracy", "created_at"))
+    for pid, language_id, duration_id, wpm, acc, created_at in runs.iterator(chunk_size=2000):
+        if pid != player_id:
+            flush()
+            player_id = pid
+        key = (timezone.localdate(created_at), language_id, duration_id)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = PracticeDaily(
+                player_id=pid, day=key[0], language_id=language_id, duration_id=duration_id,
+                wpm_hist={}, acc_hist={},
+            )
+        row.runs_count += 1
+        row.wpm_best = max(row.wpm_best, wpm)
+        row.acc_best = max(row.acc_best, acc)
+        row.wpm_total += wpm
+        row.acc_total += acc
+        row.wpm_hist[_bucket(wpm)] = row.wpm_hist.get(_bucket(wpm), 0) + 1
+        row.acc_hist[_bucket(acc)] = row.acc_hist.get(_bucket(acc), 0) + 1
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0019_sqlite_journal_mode'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_practice_daily, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:00
+
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+
+SLICE = ("player_id", "center_id", "language_id", "level_id", "duration_id")
+
+
+def dedupe_practice_best(apps, schema_editor):
+    # Parallel record() qo'ygan dublikatlardan faqat eng yaxshisi qoladi (constraint'dan oldin)
+    PracticeBest = apps.get_model("typingapp", "PracticeBest")
+    dupes = PracticeBest.objects.values(*SLICE).annotate(n=Count("id")).filter(n__gt=1)
+    for key in dupes:
+        key.pop("n")
+        rows = PracticeBest.objects.filter(**key).order_by("-final_score", "-created_at", "id")
+        keep = rows.values_list("id", flat=True)[0]
+        rows.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('typingapp', '0020_practicedaily_hist_precision'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_practice_best, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='practicebest',
+            constraint=models.UniqueConstraint(
+                models.F('player'), Coalesce('center', Value(0)), Coalesce('language', Value(0)),
+                Coalesce('level', Value(0)), Coalesce('duration', Value(0)), name='practice_best_slice',
+            ),
+        ),
+    ]
@@ -1,11 +1,21 @@
 # typingapp/models.py
+import hashlib
+import itertools
+import operator
+import sys
+from array import array
 from decimal import Decimal
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from .cache import REFDATA_SCOPE, TEXTS_SCOPE, bump_version, contest_scope, contest_start_scope, leaderboard_scope
+from .storage import get_receipt_storage, receipt_digest
+
 
 # -------------------------
 # O'quv markazi
@@ -45,12 +55,44 @@ class Level(models.Model):
         return self.name
 
 
+def normalize_text(content):
+    """Bo'shliqlarni bitta probelga keltiradi (brauzerdagi .replace(/\s+/g,' ').trim() bilan bir xil)."""
+    return " ".join((content or "").split())
+
+
+def word_offsets(normalized):
+    """Har bir so'z boshining normalized matndagi indeksi (array('I'))."""
+    if not normalized:
+        return array("I")
+    # i-so'z boshi = oldingi so'zlar uzunliklari yig'indisi + i ta probel (C darajasidagi iteratorlar)
+    lengths = map(len, normalized.split(" ")[:-1])
+    return array("I", map(operator.add, itertools.accumulate(lengths, initial=0), itertools.count()))
+
+
+def offsets_from_bytes(data):
+    """offsets_blob (yoki uning bo'lagi) → array('I')."""
+    offsets = array("I")
+    offsets.frombytes(bytes(data or b""))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
 class Text(models.Model):
     language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name="texts")
     level = models.ForeignKey(Level, on_delete=models.SET_NULL, null=True, blank=True, related_name="texts")
     title = models.CharField(max_length=200, blank=True)
     content = models.TextField()
 
+    # save() da content'dan hisoblanadi — sahifalar va admin shularni ishlatadi
+    normalized = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    char_count = models.PositiveIntegerField(default=0, editable=False)
+    offsets_blob = models.BinaryField(blank=True, editable=False)  # word_offsets, uint32 little-endian
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)  # sha256(normalized)
+
+    ARTIFACT_FIELDS = ("normalized", "word_count", "char_count", "offsets_blob", "content_hash")
+
     def __str__(self) -> str:
         if self.title:
             return self.title
@@ -58,6 +100,29 @@ class Text(models.Model):
         lvl = self.level.name if self.level_id else "-"
         return f"{lang} / {lvl}"
 
+    def save(self, *args, **kwargs):
+        self.compute_artifacts()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | set(self.ARTIFACT_FIELDS)
+        super().save(*args, **kwargs)
+
+    def compute_artifacts(self):
+        """content → normalized, so'z/belgi soni, so'z offsetlari, hash. bulk_create'dan oldin ham chaqiring."""
+        self.normalized = normalize_text(self.content)
+        offsets = word_offsets(self.normalized)
+        self.word_count = len(offsets)
+        self.char_count = len(self.normalized)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        self.offsets_blob = offsets.tobytes()
+        self.content_hash = hashlib.sha256(self.normalized.encode()).hexdigest()
+
+    @property
+    def offsets(self):
+        """So'z offsetlari (array('I'))."""
+        return offsets_from_bytes(self.offsets_blob)
+
 
 # -------------------------
 # Foydalanuvchi profili
@@ -69,6 +134,12 @@ class Player(models.Model):
     name = models.CharField(max_length=120, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalizatsiya: PracticeRun yozilganda shu transaksiyada yangilanadi (admin, profil uchun)
+    runs_count  = models.PositiveIntegerField(default=0)
+    best_score  = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    wpm_total   = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ("-created_at",)
 
@@ -76,6 +147,42 @@ class Player(models.Model):
         # Reyting va admin ko'rinishida nik ko'rinsin
         return self.user.username
 
+    @property
+    def avg_wpm(self):
+        if not self.runs_count:
+            return None
+        return (self.wpm_total / self.runs_count).quantize(Decimal("0.01"))
+
+    @classmethod
+    def record_runs(cls, runs):
+        """Yangi runlar bo'yicha hisoblagichlarni oshiradi: har bir player uchun bitta UPDATE."""
+        per_player = {}
+        for run in runs:
+            n, total, best, last = per_player.get(run.player_id, (0, Decimal("0"), run.final_score, run.created_at))
+            per_player[run.player_id] = (
+                n + 1, total + run.wpm, max(best, run.final_score), max(last, run.created_at),
+            )
+        for player_id, (n, total, best, last) in per_player.items():
+            cls.objects.filter(pk=player_id).update(
+                runs_count=F("runs_count") + n,
+                wpm_total=F("wpm_total") + total,
+                best_score=Greatest(Coalesce("best_score", best), best),
+                # Qayta yozilgan (replay) yoki kechikkan partiya vaqtni orqaga surmasin
+                last_run_at=Greatest(Coalesce("last_run_at", last), last),
+            )
+
+    @classmethod
+    def rebuild_stats(cls, player_ids=None):
+        """Hisoblagichlarni PracticeRun'lardan qayta hisoblaydi (o'chirishdan keyin yoki to'liq tuzatish)."""
+        runs = PracticeRun.objects.filter(player=OuterRef("pk")).order_by().values("player")
+        qs = cls.objects.all() if player_ids is None else cls.objects.filter(pk__in=player_ids)
+        return qs.update(
+            runs_count=Coalesce(Subquery(runs.annotate(v=Count("id")).values("v")), 0),
+            best_score=Subquery(runs.annotate(v=Max("final_score")).values("v")),
+            wpm_total=Coalesce(Subquery(runs.annotate(v=Sum("wpm")).values("v")), Decimal("0.00")),
+            last_run_at=Subquery(runs.annotate(v=Max("created_at")).values("v")),
+        )
+
 
 # -------------------------
 # Mashq natijalari
@@ -93,7 +200,7 @@ class PracticeRun(models.Model):
     accuracy    = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))  # 0..100
     final_score = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal("0.00"))
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # ingest: natija qabul qilingan vaqt
 
     class Meta:
         ordering = ("-final_score", "-created_at")
@@ -110,6 +217,200 @@ class PracticeRun(models.Model):
         return f"{u} | {lang}/{lvl} | {dur} | {self.final_score}"
 
 
+# -------------------------
+# Eng yaxshi natija (reyting uchun denormalizatsiya)
+# -------------------------
+class PracticeBest(models.Model):
+    """
+    Har bir player uchun (center, language, level, duration) kesimidagi eng yaxshi run.
+    PracticeRun yozilganda shu transaksiyada yangilanadi — reyting shu jadvaldan o'qiladi.
+    """
+    player   = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="bests")
+    center   = models.ForeignKey(Center,   on_delete=models.SET_NULL, null=True, blank=True, related_name="bests")
+    language = models.ForeignKey(Language, on_delete=models.SET_NULL, null=True, blank=True)
+    level    = models.ForeignKey(Level,    on_delete=models.SET_NULL, null=True, blank=True)
+    duration = models.ForeignKey(Duration, on_delete=models.SET_NULL, null=True, blank=True)
+    run      = models.ForeignKey(PracticeRun, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    wpm         = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal("0.00"))
+    accuracy    = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))
+    final_score = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal("0.00"))
+
+    created_at = models.DateTimeField()  # eng yaxshi run vaqti
+
+    class Meta:
+        ordering = ("-final_score", "-created_at")
+        indexes = [
+            models.Index(fields=["-final_score", "-created_at"]),
+            models.Index(fields=["center", "-final_score", "-created_at"]),
+            models.Index(fields=["player", "center", "language", "level", "duration"]),
+        ]
+        constraints = [
+            # NULL kesimlar (markazsiz player, o'chirilgan til...) ham bitta qator bo'lsin — shuning uchun Coalesce
+            models.UniqueConstraint(
+                "player", *(Coalesce(name, Value(0)) for name in ("center", "language", "level", "duration")),
+                name="practice_best_slice",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        u = self.player.user.username if self.player_id else "—"
+        return f"{u} | best {self.final_score}"
+
+    @classmethod
+    def record(cls, run):
+        """Yangi run bo'yicha eng yaxshi natijani yangilaydi (transaction ichida chaqiring)."""
+        key = {
+            "player_id": run.player_id,
+            "center_id": run.center_id,
+            "language_id": run.language_id,
+            "level_id": run.level_id,
+            "duration_id": run.duration_id,
+        }
+        fields = {
+            "run": run,
+            "wpm": run.wpm,
+            "accuracy": run.accuracy,
+            "final_score": run.final_score,
+            "created_at": run.created_at,
+        }
+        # Shartli UPDATE bazada atomar: SQLite'da select_for_update yo'q, shuning uchun o'qib-yozmaymiz
+        if cls.objects.filter(**key, final_score__lt=run.final_score).update(**fields):
+            return
+        if cls.objects.filter(**key).exists():
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**key, **fields)
+        except IntegrityError:
+            # parallel record() qatorni birinchi qo'ydi (practice_best_slice) — endi faqat yaxshiroq bo'lsa yangilaymiz
+            cls.objects.filter(**key, final_score__lt=run.final_score).update(**fields)
+
+    @classmethod
+    def rebuild(cls, player_id, center_id, language_id, level_id, duration_id):
+        """Bitta kesim uchun eng yaxshi natijani qolgan runlardan qayta topadi (masalan, run o'chirilganda)."""
+        key = {
+            "player_id": player_id,
+            "center_id": center_id,
+            "language_id": language_id,
+            "level_id": level_id,
+            "duration_id": duration_id,
+        }
+        cls.objects.filter(**key).delete()
+        run = PracticeRun.objects.filter(**key).order_by("-final_score", "-created_at").first()
+        if run is not None:
+            cls.record(run)
+
+
+# -------------------------
+# Kunlik yig'indi (progress sahifasi uchun)
+# -------------------------
+def hist_bucket(value):
+    """Gistogramma kaliti: qiymat 0.01 birlikda (bazadagi aniqlik) — p90 runlarnikidan farq qilmaydi."""
+    # DecimalField saqlashdagidek yaxlitlanadi (bulk_create'dan oldingi runlarda ko'proq xona bo'lishi mumkin)
+    return str(int((Decimal(value) * 100).to_integral_value()))
+
+
+def hist_percentile(hist, q):
+    """{"<qiymat × 100>": soni} gistogrammasidan q-persentil (nearest-rank, aniq)."""
+    total = sum(hist.values())
+    if not total:
+        return Decimal("0.00")
+    rank = -(-total * q // 100)  # ceil(total * q / 100)
+    seen = 0
+    for bucket, n in sorted(hist.items(), key=lambda item: int(item[0])):
+        seen += n
+        if seen >= rank:
+            break
+    return Decimal(int(bucket)).scaleb(-2)
+
+
+def hist_merge(target, hist):
+    for bucket, n in hist.items():
+        target[bucket] = target.get(bucket, 0) + n
+    return target
+
+
+class PracticeDaily(models.Model):
+    """
+    Player'ning kunlik mashq yig'indisi: har (player, kun, language, duration) uchun bitta qator.
+    PracticeRun yozilganda shu transaksiyada yangilanadi — progress sahifasi xom runlarni emas,
+    shu jadvalni o'qiydi. p90 uchun 0.01 qadamli gistogramma saqlanadi (kunlarni birlashtirsa ham bo'ladi).
+    """
+    player   = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="daily")
+    day      = models.DateField()  # TIME_ZONE bo'yicha mahalliy sana
+    language = models.ForeignKey(Language, on_delete=models.SET_NULL, null=True, blank=True)
+    duration = models.ForeignKey(Duration, on_delete=models.SET_NULL, null=True, blank=True)
+
+    runs_count = models.PositiveIntegerField(default=0)
+    wpm_best   = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal("0.00"))
+    wpm_total  = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    wpm_p90    = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal("0.00"))
+    acc_best   = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))
+    acc_total  = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    acc_p90    = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))
+    wpm_hist   = models.JSONField(default=dict, blank=True)  # {"<wpm × 100>": soni}
+    acc_hist   = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ("player", "day")
+        indexes = [
+            models.Index(fields=["player", "day"]),
+            models.Index(fields=["player", "language", "duration", "day"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.player_id} | {self.day} | {self.runs_count} run"
+
+    @property
+    def wpm_mean(self):
+        return (self.wpm_total / self.runs_count).quantize(Decimal("0.01")) if self.runs_count else None
+
+    @property
+    def acc_mean(self):
+        return (self.acc_total / self.runs_count).quantize(Decimal("0.01")) if self.runs_count else None
+
+    def add_runs(self, runs):
+        wpm_hist, acc_hist = dict(self.wpm_hist), dict(self.acc_hist)
+        for run in runs:
+            wpm, acc = run.wpm, run.accuracy
+            self.wpm_best = max(self.wpm_best, wpm)
+            self.acc_best = max(self.acc_best, acc)
+            self.runs_count += 1
+            self.wpm_total += wpm
+            self.acc_total += acc
+            hist_merge(wpm_hist, {hist_bucket(wpm): 1})
+            hist_merge(acc_hist, {hist_bucket(acc): 1})
+        self.wpm_hist, self.acc_hist = wpm_hist, acc_hist
+        self.wpm_p90 = hist_percentile(wpm_hist, 90)
+        self.acc_p90 = hist_percentile(acc_hist, 90)
+
+    @classmethod
+    def record_runs(cls, runs):
+        """Yangi runlarni kunlik qatorlarga qo'shadi: har kesim uchun bitta o'qish + yozish (transaction ichida)."""
+        groups = {}
+        for run in runs:
+            key = (run.player_id, timezone.localdate(run.created_at), run.language_id, run.duration_id)
+            groups.setdefault(key, []).append(run)
+        for (player_id, day, language_id, duration_id), items in groups.items():
+            row = (
+                cls.objects.select_for_update()
+                .filter(player_id=player_id, day=day, language_id=language_id, duration_id=duration_id)
+                .first()
+            ) or cls(player_id=player_id, day=day, language_id=language_id, duration_id=duration_id)
+            row.add_runs(items)
+            row.save()
+
+    @classmethod
+    def rebuild(cls, player_id, day, language_id, duration_id):
+        """Bitta kesim qatorini runlardan qayta hisoblaydi (masalan, run o'chirilganda)."""
+        cls.objects.filter(player_id=player_id, day=day, language_id=language_id, duration_id=duration_id).delete()
+        runs = PracticeRun.objects.filter(
+            player_id=player_id, language_id=language_id, duration_id=duration_id, created_at__date=day,
+        ).only("player_id", "language_id", "duration_id", "wpm", "accuracy", "created_at")
+        cls.record_runs(runs)
+
+
 # -------------------------
 # Avto-Player: yangi User yaratilsa, Player ham yaratiladi
 # -------------------------
@@ -159,6 +460,7 @@ class Contest(models.Model):
     prize3 = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("50000.00"))
 
     status = models.CharField(max_length=12, choices=STATUSES, default=DRAFT)
+    settled_at = models.DateTimeField(null=True, blank=True)  # typingapp.settlement
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -174,6 +476,54 @@ class Contest(models.Model):
         return self.status in {self.RUNNING} and self.start_at <= now <= self.end_at
 
 
+class ReceiptBlob(models.Model):
+    """
+    Bitta noyob chek fayli (typingapp.storage). Bir xil baytli cheklar bitta blobga
+    ishora qiladi; refcount > 1 — chek bir nechta arizada qayta ishlatilgan.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)  # storage'dagi yo'l
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    thumbnail = models.CharField(max_length=255, blank=True)  # kichik JPEG preview (typingapp.thumbnails)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self): return f"{self.sha256[:12]}… ×{self.refcount}"
+
+    @classmethod
+    def acquire(cls, name):
+        """Fayl uchun blobni topadi/yaratadi va havolalar sonini oshiradi. Hash'siz nom bo'lsa — None."""
+        digest = receipt_digest(name)
+        if not digest:
+            return None
+        blob, _ = cls.objects.get_or_create(
+            sha256=digest, defaults={"name": name, "size": get_receipt_storage().size(name)}
+        )
+        cls.objects.filter(pk=blob.pk).update(refcount=F("refcount") + 1)
+        blob.refcount += 1
+        return blob
+
+    @classmethod
+    def release(cls, blob_id):
+        """Havolalar sonini kamaytiradi; 0 ga tushsa blob va fayl o'chiriladi (commit'dan keyin)."""
+        cls.objects.filter(pk=blob_id).update(refcount=F("refcount") - 1)
+        orphan = cls.objects.filter(pk=blob_id, refcount=0).first()
+        if orphan is None:
+            return
+        orphan.delete()
+
+        def _delete_file():
+            # Shu orada xuddi shu chek qayta yuklangan bo'lsa, faylga tegmaymiz
+            if not cls.objects.filter(sha256=orphan.sha256).exists():
+                get_receipt_storage().delete(orphan.name)
+                if orphan.thumbnail:
+                    get_receipt_storage().delete(orphan.thumbnail)
+        transaction.on_commit(_delete_file)
+
+
 class ContestEntry(models.Model):
     SUBMITTED = "SUBMITTED"  # chek yuklangan, ko'rikda
     APPROVED  = "APPROVED"   # to'lov tasdiqlandi → typingga ruxsat
@@ -188,8 +538,9 @@ class ContestEntry(models.Model):
     telegram = models.CharField(max_length=64, blank=True)
     phone    = models.CharField(max_length=32, blank=True)
 
-    # to'lov dalili (screenshot/pdf)
-    receipt = models.FileField(upload_to="receipts/%Y/%m/%d/")
+    # to'lov dalili (screenshot/pdf) — content-addressed: receipts/sha256/<ab>/<digest><ext>
+    receipt = models.FileField(upload_to="receipts/", storage=get_receipt_storage)
+    receipt_blob = models.ForeignKey(ReceiptBlob, on_delete=models.PROTECT, null=True, blank=True, related_name="entries")
 
     # admin moderatsiya
     status = models.CharField(max_length=10, choices=STATUSES, default=SUBMITTED)
@@ -202,6 +553,10 @@ class ContestEntry(models.Model):
     class Meta:
         unique_together = (("user", "contest"),)  # bitta musobaqaga bitta ariza
         ordering = ("-created_at",)
+        indexes = [
+            # admin ko'rik navbati: status=SUBMITTED, eng eskisi birinchi
+            models.Index(fields=["status", "created_at"]),
+        ]
 
     def __str__(self): return f"{self.user.username} → {self.contest.title} [{self.status}]"
 
@@ -216,10 +571,230 @@ class ContestRun(models.Model):
     final_score = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal("0.00"))
 
     suspicious  = models.BooleanField(default=False)
-    created_at  = models.DateTimeField(auto_now_add=True)
+    anomaly_score = models.FloatField(null=True, blank=True)  # typingapp.anticheat; >= 1 — shubhali
+    created_at  = models.DateTimeField(default=timezone.now, editable=False)  # ingest: natija qabul qilingan vaqt
 
     class Meta:
         ordering = ("-created_at",)
 
     def __str__(self):
-        return f"{self.contest.title} | {self.user.username} | {self.final_score}"
\ No newline at end of file
+        return f"{self.contest.title} | {self.user.username} | {self.final_score}"
+
+
+class ContestStanding(models.Model):
+    """
+    Musobaqa reytingi uchun tayyor holat: har (contest, user, center) uchun bitta qator —
+    shu markazdagi OXIRGI urinish. is_latest=True — userning umumiy oxirgi urinishi.
+    contest_result har run yozganda shu jadvalni yangilaydi.
+    """
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name="standings")
+    user    = models.ForeignKey(User, on_delete=models.CASCADE)
+    center  = models.ForeignKey("typingapp.Center", on_delete=models.SET_NULL, null=True, blank=True)
+    run     = models.ForeignKey(ContestRun, on_delete=models.CASCADE, related_name="+")
+
+    wpm         = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal("0.00"))
+    accuracy    = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))
+    final_score = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal("0.00"))
+
+    is_latest  = models.BooleanField(default=True)
+    created_at = models.DateTimeField()  # standing run vaqti
+
+    class Meta:
+        ordering = ("-final_score", "-created_at")
+        indexes = [
+            models.Index(fields=["contest", "is_latest", "-final_score", "-created_at"]),
+            models.Index(fields=["contest", "center", "-final_score", "-created_at"]),
+            models.Index(fields=["contest", "user"]),
+        ]
+
+    def __str__(self):
+        return f"{self.contest_id} | {self.user_id} | {self.final_score}"
+
+    @classmethod
+    def record(cls, run):
+        """Yangi ContestRun bo'yicha standing'ni yangilaydi (transaction ichida chaqiring)."""
+        fields = {
+            "run": run,
+            "wpm": run.wpm,
+            "accuracy": run.accuracy,
+            "final_score": run.final_score,
+            "created_at": run.created_at,
+            "is_latest": True,
+        }
+        # Yangi run — userning umumiy oxirgi urinishi
+        cls.objects.filter(contest_id=run.contest_id, user_id=run.user_id, is_latest=True).update(is_latest=False)
+        updated = cls.objects.filter(
+            contest_id=run.contest_id, user_id=run.user_id, center_id=run.center_id
+        ).update(**fields)
+        if not updated:
+            cls.objects.create(contest_id=run.contest_id, user_id=run.user_id, center_id=run.center_id, **fields)
+
+    @classmethod
+    def rebuild(cls, contest_id, user_id):
+        """Bitta user uchun standinglarni runlardan qayta hisoblaydi (masalan, run o'chirilganda)."""
+        cls.objects.filter(contest_id=contest_id, user_id=user_id).delete()
+        runs = ContestRun.objects.filter(contest_id=contest_id, user_id=user_id).order_by("created_at", "id")
+        for run in runs:
+            cls.record(run)
+
+
+class ContestFinalStanding(models.Model):
+    """
+    Yakunlangan (SETTLED) musobaqaning o'zgarmas reytingi va sovrinlari (typingapp.settlement).
+    Nik va markaz nomi ham nusxalanadi — keyin o'zgarsa ham natija o'sha holicha qoladi.
+    """
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name="final_standings")
+    rank    = models.PositiveIntegerField()
+    user    = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    username = models.CharField(max_length=150)
+    center  = models.ForeignKey("typingapp.Center", on_delete=models.SET_NULL, null=True, blank=True)
+    center_name = models.CharField(max_length=150, blank=True)
+    run     = models.ForeignKey(ContestRun, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    wpm         = models.DecimalField(max_digits=6, decimal_places=2)
+    accuracy    = models.DecimalField(max_digits=5, decimal_places=2)
+    final_score = models.DecimalField(max_digits=7, decimal_places=2)
+    prize       = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    created_at = models.DateTimeField()  # hisobga olingan run vaqti
+
+    class Meta:
+        ordering = ("contest", "rank")
+        constraints = [
+            models.UniqueConstraint(fields=["contest", "rank"], name="final_standing_contest_rank"),
+        ]
+        indexes = [
+            models.Index(fields=["contest", "center", "rank"]),
+        ]
+
+    def __str__(self):
+        return f"{self.contest_id} | #{self.rank} {self.username} | {self.final_score}"
+
+
+# -------------------------
+# Reyting keshini yangilash: yangi natija → scope versiyasi oshadi
+# -------------------------
+@receiver(post_save, sender=PracticeRun)
+def _bump_leaderboard_version(sender, instance, created, **kwargs):
+    if created:
+        scopes = [leaderboard_scope()]
+        if instance.center_id:
+            scopes.append(leaderboard_scope(instance.center_id))
+        # commitdan keyin — aks holda o'quvchi eski ma'lumotni yangi versiya bilan keshlab qo'yadi
+        transaction.on_commit(lambda: bump_version(*scopes))
+
+
+@receiver(post_save, sender=ContestRun)
+def _bump_contest_leaderboard_version(sender, instance, created, **kwargs):
+    if created:
+        scope = contest_scope(instance.contest_id)
+        transaction.on_commit(lambda: bump_version(scope))
+
+
+@receiver(post_delete, sender=ContestRun)
+def _rebuild_contest_standing(sender, instance, **kwargs):
+    # Admin run o'chirsa — standing oldingi urinishga qaytadi
+    ContestStanding.rebuild(instance.contest_id, instance.user_id)
+    # start paketidagi urinishlar soni ham qayta sanaladi
+    scopes = (contest_scope(instance.contest_id), contest_start_scope(instance.contest_id))
+    transaction.on_commit(lambda: bump_version(*scopes))
+
+
+# -------------------------
+# Player hisoblagichlari, reyting va kunlik yig'indi: run o'chirilganda qayta hisoblanadi
+# -------------------------
+@receiver(post_delete, sender=PracticeRun)
+def _rebuild_player_stats(sender, instance, origin=None, **kwargs):
+    # Player/User o'chirilayotgan bo'lsa (CASCADE), har bir run uchun hisoblash shart emas
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model in (Player, User):
+        return
+    Player.rebuild_stats([instance.player_id])
+    # Reyting (PracticeBest) o'chirilgan runni ko'rsatmasin — masalan, admin cheaterni o'chirsa
+    PracticeBest.rebuild(
+        instance.player_id, instance.center_id, instance.language_id, instance.level_id, instance.duration_id,
+    )
+    scopes = [leaderboard_scope()]
+    if instance.center_id:
+        scopes.append(leaderboard_scope(instance.center_id))
+    transaction.on_commit(lambda: bump_version(*scopes))
+    PracticeDaily.rebuild(
+        instance.player_id, timezone.localdate(instance.created_at), instance.language_id, instance.duration_id,
+    )
+
+
+# -------------------------
+# Chek bloblari: havolalar soni (typingapp.storage)
+# -------------------------
+@receiver(post_save, sender=ContestEntry)
+def _track_receipt_blob(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_id = instance.receipt_blob_id
+    digest = receipt_digest(instance.receipt.name)
+    if old_id and instance.receipt_blob.sha256 == digest:
+        return
+    if not old_id and not digest:
+        return
+    blob = ReceiptBlob.acquire(instance.receipt.name)
+    ContestEntry.objects.filter(pk=instance.pk).update(receipt_blob=blob)
+    instance.receipt_blob = blob
+    if old_id:
+        ReceiptBlob.release(old_id)
+
+
+@receiver(post_save, sender=ReceiptBlob)
+def _schedule_receipt_thumbnail(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        from .thumbnails import schedule
+        schedule(instance.pk)
+
+
+@receiver(post_delete, sender=ContestEntry)
+def _release_receipt_blob(sender, instance, **kwargs):
+    if instance.receipt_blob_id:
+        ReceiptBlob.release(instance.receipt_blob_id)
+
+
+# -------------------------
+# Musobaqa start paketi (typingapp.startpack)
+# -------------------------
+@receiver(post_save, sender=Contest)
+def _refresh_contest_start(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Paket shu yerda yig'ilmaydi: keyin bulk_create qilingan arizalar signal yubormaydi va
+    # oldindan yig'ilgan paket ularni ko'rmay qolardi. Birinchi contest_start so'rovi yig'adi.
+    scope = contest_start_scope(instance.pk)
+    transaction.on_commit(lambda: bump_version(scope))
+
+
+@receiver(post_save, sender=ContestEntry)
+@receiver(post_delete, sender=ContestEntry)
+def _bump_contest_start_version(sender, instance, **kwargs):
+    scope = contest_start_scope(instance.contest_id)
+    transaction.on_commit(lambda: bump_version(scope))
+
+
+# -------------------------
+# Text indeksini yangilash (typingapp.texts)
+# -------------------------
+@receiver(post_save, sender=Text)
+@receiver(post_delete, sender=Text)
+def _bump_texts_version(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version(TEXTS_SCOPE))
+
+
+# -------------------------
+# Ma'lumotnoma keshini yangilash (typingapp.refdata)
+# -------------------------
+@receiver(post_save, sender=Language)
+@receiver(post_save, sender=Level)
+@receiver(post_save, sender=Duration)
+@receiver(post_save, sender=Center)
+@receiver(post_delete, sender=Language)
+@receiver(post_delete, sender=Level)
+@receiver(post_delete, sender=Duration)
+@receiver(post_delete, sender=Center)
+def _bump_refdata_version(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version(REFDATA_SCOPE))
@@ -0,0 +1,97 @@
+# typingapp/pagination.py
+"""
+Reyting uchun keyset (cursor) pagination: (final_score, created_at, id) bo'yicha kamayish tartibida.
+
+OFFSET ishlatilmaydi — keyingi sahifa oxirgi qatordan keyingi qiymatlar bilan
+filtrlanadi va (-final_score, -created_at) indeksidan o'qiladi. Shu sababli
+chuqur sahifalar ham birinchi sahifa kabi arzon.
+
+Cursor imzolangan (django.core.signing, salt'da scope — masalan, markaz): u kesh kalitiga
+kiradi va o'rin raqami (offset) ni olib yuradi — soxta yoki boshqa reytingdan olingan
+cursor noto'g'ri raqamlarni keshga yozmasligi kerak.
+"""
+import base64
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core import signing
+from django.db.models import Q
+
+PAGE_SIZE = 200
+
+KEYSET_ORDERING = ("-final_score", "-created_at", "-id")
+
+
+def _signer(scope):
+    return signing.Signer(salt=f"typingapp.pagination:{scope}")
+
+
+def encode_cursor(row, offset, scope=""):
+    """Oxirgi qator + shu paytgacha ko'rsatilgan qatorlar soni → URL uchun imzolangan token."""
+    raw = f"{row.final_score}|{row.created_at.isoformat()}|{row.id}|{offset}"
+    return _signer(scope).sign(base64.urlsafe_b64encode(raw.encode()).decode().rstrip("="))
+
+
+def decode_cursor(token, scope=""):
+    """Token → (final_score, created_at, id, offset) yoki None (yaroqsiz yoki imzo mos kelmasa)."""
+    if not token:
+        return None
+    try:
+        token = _signer(scope).unsign(token)
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        score, created, pk, offset = raw.split("|")
+        return Decimal(score), datetime.fromisoformat(created), int(pk), int(offset)
+    except (signing.BadSignature, ValueError, InvalidOperation, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """
+    Bitta sahifa. Qatorlar lazy o'qiladi — kesh fragmenti topilsa, so'rov umuman bajarilmaydi.
+    offset — sahifadagi birinchi qatorning o'rni (reyting raqami uchun).
+    invalid — cursor berilgan, lekin yaroqsiz (view uni keshlamasdan rad etadi).
+    """
+
+    def __init__(self, qs, cursor=None, page_size=PAGE_SIZE, scope=""):
+        self.page_size = page_size
+        self.scope = scope
+        self.cursor = cursor or ""
+        self.offset = 0
+        qs = qs.order_by(*KEYSET_ORDERING)
+        key = decode_cursor(cursor, scope)
+        self.invalid = bool(cursor) and key is None
+        if key:
+            score, created, pk, self.offset = key
+            # final_score__lte — SQLite indeksda shu nuqtadan boshlab o'qishi (SEARCH) uchun
+            qs = qs.filter(final_score__lte=score).filter(
+                Q(final_score__lt=score)
+                | Q(final_score=score, created_at__lt=created)
+                | Q(final_score=score, created_at=created, id__lt=pk)
+            )
+        else:
+            self.cursor = ""
+        self._qs = qs
+        self._rows = None
+        self._next_cursor = None
+
+    def _fetch(self):
+        if self._rows is None:
+            # Bitta ortiqcha qator — keyingi sahifa bormi, bilish uchun
+            rows = list(self._qs[: self.page_size + 1])
+            if len(rows) > self.page_size:
+                rows = rows[: self.page_size]
+                self._next_cursor = encode_cursor(rows[-1], self.offset + self.page_size, self.scope)
+            self._rows = rows
+
+    @property
+    def rows(self):
+        self._fetch()
+        return self._rows
+
+    @property
+    def next_cursor(self):
+        self._fetch()
+        return self._next_cursor
+
+    def __iter__(self):
+        return iter(self.rows)
@@ -0,0 +1,75 @@
+# typingapp/refdata.py
+"""
+Ma'lumotnoma jadvallari keshi: Language, Level, Duration, Center.
+
+Jadvallar kichik va deyarli o'zgarmaydi, lekin har so'rovda o'qiladi. Ular process
+xotirasida bitta snapshot sifatida saqlanadi; admin biror qatorni saqlasa yoki
+o'chirsa (post_save/post_delete), "refdata" scope versiyasi oshadi va har bir
+worker snapshotni qayta yuklaydi. Barqaror holatda bazaga so'rov yo'q.
+"""
+import threading
+
+from django.http import Http404
+
+from .cache import REFDATA_SCOPE, get_version
+from .models import Center, Duration, Language, Level
+
+
+class RefData:
+    def __init__(self):
+        self.languages = list(Language.objects.order_by("name"))
+        self.levels = list(Level.objects.order_by("name"))
+        self.durations = list(Duration.objects.order_by("seconds"))
+        self.centers = list(Center.objects.order_by("name"))
+
+        self.languages_by_id = {x.id: x for x in self.languages}
+        self.levels_by_id = {x.id: x for x in self.levels}
+        self.durations_by_id = {x.id: x for x in self.durations}
+        self.durations_by_seconds = {x.seconds: x for x in self.durations}
+        self.centers_by_id = {x.id: x for x in self.centers}
+
+    @staticmethod
+    def _lookup(mapping, key):
+        try:
+            return mapping.get(int(key))
+        except (TypeError, ValueError):
+            return None
+
+    def language(self, pk):
+        return self._lookup(self.languages_by_id, pk)
+
+    def level(self, pk):
+        return self._lookup(self.levels_by_id, pk)
+
+    def duration(self, pk):
+        return self._lookup(self.durations_by_id, pk)
+
+    def duration_by_seconds(self, seconds):
+        return self._lookup(self.durations_by_seconds, seconds)
+
+    def center(self, pk):
+        return self._lookup(self.centers_by_id, pk)
+
+
+_lock = threading.Lock()
+_snapshot = None
+_snapshot_version = None
+
+
+def get_refdata():
+    """Joriy snapshot (versiya o'zgargan bo'lsa qayta yuklanadi)."""
+    global _snapshot, _snapshot_version
+    version = get_version(REFDATA_SCOPE)
+    if version != _snapshot_version:
+        with _lock:
+            if version != _snapshot_version:
+                _snapshot = RefData()
+                _snapshot_version = version
+    return _snapshot
+
+
+def get_or_404(obj):
+    """get_object_or_404 o'rniga: snapshotdan topilmasa 404."""
+    if obj is None:
+        raise Http404("Topilmadi.")
+    return obj
@@ -0,0 +1,127 @@
+# typingapp/sendfile.py
+"""
+Yopiq fayllarni (cheklar) berish: ruxsat viewda tekshiriladi, fayl esa shu yerda.
+
+  * If-None-Match / If-Modified-Since → 304
+  * Range: bytes=a-b (bitta oraliq, If-Range bilan) → 206 / 416
+  * FileResponse — fayl bo'laklab uzatiladi (to'liq javobda wsgi.file_wrapper/sendfile ishlatiladi)
+  * RECEIPT_SENDFILE["BACKEND"] = "x-accel" (nginx) yoki "x-sendfile" (apache/lighttpd) bo'lsa,
+    Django faqat sarlavha qaytaradi — faylni, Range va 304 ni front proxy beradi.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK = 64 * 1024
+
+
+def _conf(name, default):
+    return getattr(settings, "RECEIPT_SENDFILE", {}).get(name, default)
+
+
+def parse_range(header, size):
+    """
+    "bytes=a-b" → (start, end) (end ham kiradi); yaroqsiz yoki bir nechta oraliq → None (to'liq fayl);
+    qanoatlantirib bo'lmaydigan oraliq → False (416).
+    """
+    m = _RANGE_RE.match(header.replace(" ", ""))
+    if not m:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — oxirgi N bayt
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return False
+    return start, end
+
+
+class _RangeFile:
+    """Fayldan [start, end] oraliqni o'qiydigan file-like (FileResponse uchun)."""
+
+    def __init__(self, fh, start, end):
+        self.fh = fh
+        self.fh.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def _content_disposition(filename):
+    return f"inline; filename*=UTF-8''{quote(filename)}"
+
+
+def serve_private_file(request, root, name, *, content_type, filename, etag=None):
+    """root ichidagi name faylini javob sifatida beradi. etag — kontent hash bo'lsa, eng yaxshisi."""
+    path = os.path.join(root, name)
+    stat = os.stat(path)
+    etag = quote_etag(etag or f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+    last_modified = int(stat.st_mtime)
+
+    backend = _conf("BACKEND", "")
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        if backend == "x-accel":
+            response["X-Accel-Redirect"] = _conf("ACCEL_PREFIX", "/protected-media/").rstrip("/") + "/" + quote(name)
+        else:
+            response["X-Sendfile"] = path
+        response["Content-Disposition"] = _content_disposition(filename)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=3600"
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and request.method in ("GET", "HEAD"):
+        if_range = request.headers.get("If-Range")
+        if not if_range or if_range == etag or if_range == http_date(last_modified):
+            byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    fh = open(path, "rb")
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(fh, start, end), status=206, content_type=content_type)
+        response.block_size = _CHUNK
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(fh, content_type=content_type)
+        response.block_size = _CHUNK
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = _content_disposition(filename)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, max-age=3600"
+    return response
@@ -0,0 +1,104 @@
+# typingapp/settlement.py
+"""
+Musobaqani yakunlash: yakuniy reyting va sovrinlar.
+
+Qoidalar (reyting sahifasidagidek — har user uchun OXIRGI urinish):
+  * faqat APPROVED arizasi bor userlar, suspicious=True runlar hisobga olinmaydi;
+  * userning hisobga olinadigan runi — eng oxirgisi (created_at, keyin id bo'yicha);
+  * tartib: final_score ↓, accuracy ↓, wpm ↓, run vaqti ↑ (natijaga avval erishgan), run id ↑ —
+    teng ochko bo'lsa ham o'rinlar har safar bir xil chiqadi;
+  * ishtirokchilar soni min_participants dan kam bo'lsa — yakunlanmaydi;
+  * 1–3 o'rinlarga prize1/prize2/prize3.
+
+ContestRun bitta so'rov bilan, tartiblanmasdan, bir marta o'qiladi (100k+ run — bir necha soniya).
+Natija ContestFinalStanding'ga yoziladi va musobaqa SETTLED bo'ladi — shundan keyin
+reyting sahifasi faqat shu snapshot'ni o'qiydi.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_version, contest_scope, contest_start_scope
+from .models import Contest, ContestEntry, ContestFinalStanding, ContestRun
+from .refdata import get_refdata
+
+SETTLEABLE = (Contest.FINISHED, Contest.RUNNING)
+BATCH_SIZE = 1000
+
+
+class SettlementError(Exception):
+    """Musobaqani yakunlab bo'lmaydi (holati, vaqti yoki ishtirokchilar soni)."""
+
+
+def _rank_key(run):
+    run_id, _user_id, _center_id, wpm, accuracy, final_score, created_at = run
+    return (-final_score, -accuracy, -wpm, created_at, run_id)
+
+
+def compute_standings(contest):
+    """[(rank, username, run), ...] — run: (id, user_id, center_id, wpm, accuracy, final_score, created_at)."""
+    usernames = dict(
+        ContestEntry.objects.filter(contest=contest, status=ContestEntry.APPROVED)
+        .order_by().values_list("user_id", "user__username")
+    )
+
+    latest = {}
+    runs = (ContestRun.objects.filter(contest=contest, suspicious=False).order_by()
+            .values_list("id", "user_id", "center_id", "wpm", "accuracy", "final_score", "created_at"))
+    for run in runs.iterator(chunk_size=5000):
+        user_id = run[1]
+        if user_id not in usernames:
+            continue
+        prev = latest.get(user_id)
+        if prev is None or (run[6], run[0]) > (prev[6], prev[0]):
+            latest[user_id] = run
+
+    ordered = sorted(latest.values(), key=_rank_key)
+    return [(rank, usernames[run[1]], run) for rank, run in enumerate(ordered, start=1)]
+
+
+def settle(contest):
+    """
+    Musobaqani yakunlaydi: snapshot + sovrinlar, status=SETTLED.
+    Yozilgan qatorlar sonini qaytaradi; yakunlab bo'lmasa SettlementError.
+    """
+    now = timezone.now()
+    if contest.status not in SETTLEABLE:
+        raise SettlementError(f"{contest.status} holatidagi musobaqani yakunlab bo'lmaydi.")
+    if contest.status == Contest.RUNNING and now < contest.end_at:
+        raise SettlementError("Musobaqa hali tugamagan.")
+
+    standings = compute_standings(contest)
+    if len(standings) < contest.min_participants:
+        raise SettlementError(
+            f"Ishtirokchilar yetarli emas: {len(standings)} ta, kamida {contest.min_participants} ta kerak."
+        )
+
+    prizes = (contest.prize1, contest.prize2, contest.prize3)
+    centers = get_refdata().centers_by_id
+    rows = []
+    for rank, username, (run_id, user_id, center_id, wpm, accuracy, final_score, created_at) in standings:
+        center = centers.get(center_id)
+        rows.append(ContestFinalStanding(
+            contest=contest, rank=rank, user_id=user_id, username=username,
+            center_id=center_id if center else None, center_name=center.name if center else "",
+            run_id=run_id, wpm=wpm, accuracy=accuracy, final_score=final_score,
+            prize=prizes[rank - 1] if rank <= len(prizes) else Decimal("0.00"),
+            created_at=created_at,
+        ))
+
+    with transaction.atomic():
+        # Shartli UPDATE: parallel ikkinchi yakunlash shu yerda to'xtaydi
+        updated = Contest.objects.filter(pk=contest.pk, status=contest.status).update(
+            status=Contest.SETTLED, settled_at=now
+        )
+        if not updated:
+            raise SettlementError("Musobaqa holati o'zgargan — qayta urinib ko'ring.")
+        ContestFinalStanding.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        scopes = (contest_scope(contest.pk), contest_start_scope(contest.pk))
+        transaction.on_commit(lambda: bump_version(*scopes))
+
+    contest.status = Contest.SETTLED
+    contest.settled_at = now
+    return len(rows)
@@ -0,0 +1,156 @@
+# typingapp/startpack.py
+"""
+Musobaqa start paketi: contest_start uchun kerak bo'lgan hamma narsa bitta joyda.
+
+Musobaqa boshlanganda hamma bir vaqtda "Boshlash"ni bosadi. Har so'rovda ariza,
+urinishlar soni va matnni bazadan o'qish o'rniga, har bir musobaqa uchun paket yig'iladi:
+  * musobaqa (duration bilan), tasdiqlangan (APPROVED) user ID'lar to'plami;
+  * har bir user ishlatgan urinishlar soni (bitta GROUP BY);
+  * oldindan tanlangan matnlar — TEXT_POOL tagacha, contest.id bo'yicha deterministik
+    (hamma worker'larda bir xil to'plam); har biridan faqat birinchi so'zlar oynasi
+    saqlanadi, qolgani brauzerga text_words orqali beriladi — kitob ham xotirani to'ldirmaydi.
+
+Paket birinchi contest_start so'rovida yig'iladi va keshga yoziladi; boshqa worker'lar
+uni keshdan bir marta oladi va o'z xotirasida saqlaydi. Arizalarni bulk_create/update bilan
+yozadigan kod "contest:<id>:start" versiyasini o'zi oshirishi kerak (signal yo'q). Musobaqa yoki ariza
+o'zgarsa "contest:<id>:start" scope versiyasi oshadi, matnlar o'zgarsa — "texts" — paket qayta yig'iladi.
+
+Urinishlar soni "contest:<id>" (reyting) versiyasi o'zgarganda yangilanadi: faqat
+oxirgi ko'rilgan run ID'dan keyingi runlar o'qiladi. Run o'chirilsa paket to'liq qayta yig'iladi.
+ASYNC ingest'da hali bazaga yozilmagan natijalar (shu process navbati) ham urinish sifatida sanaladi.
+"""
+import random
+import threading
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from . import ingest
+from .cache import TEXTS_SCOPE, contest_scope, contest_start_scope, get_version
+from .models import Contest, ContestEntry, ContestRun, Text
+from .texts import first_window, text_ids
+
+TEXT_POOL = 20          # bitta musobaqa uchun oldindan tanlanadigan matnlar soni
+PACKET_TIMEOUT = 6 * 3600
+
+_KEY_PREFIX = "typingapp:startpack:"
+
+
+class StartPacket:
+    def __init__(self, contest, approved, texts, attempts, watermark, runs_version):
+        self.contest = contest
+        self.duration = contest.duration.seconds
+        self.approved = approved        # frozenset(user_id)
+        self.texts = texts              # [birinchi oyna (typingapp.texts.first_window)]
+        self.attempts = attempts        # {user_id: ishlatilgan urinishlar}
+        self.watermark = watermark      # attempts hisoblangan oxirgi ContestRun.id
+        self.runs_version = runs_version
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def is_approved(self, user_id):
+        return user_id in self.approved
+
+    def attempts_used(self, user_id):
+        """Userning urinishlari soni (ingest navbatidagilari bilan); yangi natijalar bo'lsa, faqat ular o'qiladi."""
+        version = get_version(contest_scope(self.contest.id))
+        if version != self.runs_version:
+            with self.lock:
+                if version != self.runs_version:
+                    self._apply_new_runs(version)
+        return self.attempts.get(user_id, 0) + ingest.pending_contest_runs(self.contest.id, user_id)
+
+    def _apply_new_runs(self, version):
+        attempts = dict(self.attempts)
+        watermark = self.watermark
+        new_runs = (ContestRun.objects.filter(contest_id=self.contest.id, id__gt=watermark)
+                    .order_by().values_list("id", "user_id"))
+        for run_id, user_id in new_runs:
+            attempts[user_id] = attempts.get(user_id, 0) + 1
+            watermark = max(watermark, run_id)
+        self.attempts = attempts
+        self.watermark = watermark
+        self.runs_version = version
+
+    def pick_text(self):
+        """Paketdagi tasodifiy matnning birinchi oynasi (dict) yoki None."""
+        if not self.texts:
+            return None
+        return random.choice(self.texts)
+
+
+def _pick_text_ids(contest):
+    ids = sorted(text_ids(contest.language_id, contest.level_id))
+    if len(ids) <= TEXT_POOL:
+        return ids
+    return random.Random(contest.id).sample(ids, TEXT_POOL)
+
+
+def build(contest_id):
+    """Paketni bazadan yig'adi (musobaqa yo'q bo'lsa None)."""
+    contest = Contest.objects.select_related("duration").filter(id=contest_id).first()
+    if contest is None:
+        return None
+
+    approved = frozenset(
+        ContestEntry.objects.filter(contest_id=contest_id, status=ContestEntry.APPROVED)
+        .order_by().values_list("user_id", flat=True)
+    )
+
+    bodies = Text.objects.filter(id__in=_pick_text_ids(contest)).order_by("id").values_list("id", "normalized")
+    texts = [first_window(text_id, normalized) for text_id, normalized in bodies.iterator()]
+
+    # Versiya so'rovdan OLDIN o'qiladi — oraliqda yozilgan run keyingi tekshiruvda ko'rinadi
+    runs_version = get_version(contest_scope(contest_id))
+    attempts, watermark = {}, 0
+    per_user = (ContestRun.objects.filter(contest_id=contest_id).order_by()
+                .values("user_id").annotate(n=Count("id"), last=Max("id")).values_list("user_id", "n", "last"))
+    for user_id, n, last in per_user:
+        attempts[user_id] = n
+        watermark = max(watermark, last)
+
+    return StartPacket(contest, approved, texts, attempts, watermark, runs_version)
+
+
+# =========================
+# Process xotirasi + umumiy kesh
+# =========================
+_lock = threading.Lock()
+_packets = {}  # contest_id -> (versiyalar, StartPacket)
+
+
+def _versions(contest_id):
+    return get_version(contest_start_scope(contest_id)), get_version(TEXTS_SCOPE)
+
+
+def _cache_key(contest_id, versions):
+    return f"{_KEY_PREFIX}{contest_id}:{versions[0]}:{versions[1]}"
+
+
+def get_packet(contest_id):
+    """Joriy paket (xotiradan; versiya o'zgargan bo'lsa keshdan yoki bazadan) yoki None."""
+    versions = _versions(contest_id)
+    current = _packets.get(contest_id)
+    if current is not None and current[0] == versions:
+        return current[1]
+    with _lock:
+        current = _packets.get(contest_id)
+        if current is not None and current[0] == versions:
+            return current[1]
+        key = _cache_key(contest_id, versions)
+        packet = cache.get(key)
+        if packet is None:
+            packet = build(contest_id)
+            if packet is None:
+                return None
+            cache.set(key, packet, PACKET_TIMEOUT)
+        _packets[contest_id] = (versions, packet)
+        return packet
@@ -0,0 +1,108 @@
+# typingapp/storage.py
+"""
+Cheklar uchun content-addressed storage.
+
+Yuklangan fayl oqim bo'yicha (chunk'lab) vaqtinchalik faylga yoziladi va shu
+paytning o'zida sha256 hisoblanadi. Keyin fayl receipts/sha256/<ab>/<digest><ext>
+nomi bilan joyiga ko'chiriladi; xuddi shu baytlar avval yuklangan bo'lsa, yangi
+nusxa tashlab yuboriladi va mavjud fayl nomi qaytariladi — diskda har bir chek bir marta.
+
+Havolalar soni (nechta ariza shu blobga ishora qiladi) ReceiptBlob jadvalida.
+"""
+import glob
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import LazyObject
+
+CAS_PREFIX = "receipts/sha256"
+TMP_DIR = "receipts/tmp"
+
+_DIGEST_RE = re.compile(r"^receipts/sha256/[0-9a-f]{2}/([0-9a-f]{64})")
+
+
+def digest_name(digest, ext=""):
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest}{ext}"
+
+
+def receipt_digest(name):
+    """Storage'dagi nomdan sha256 ni ajratadi (eski, hash'siz nomlar uchun None)."""
+    m = _DIGEST_RE.match(name or "")
+    return m.group(1) if m else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Yakuniy nomni _save o'zi (digest bo'yicha) tanlaydi
+        return name
+
+    def find_digest(self, digest):
+        """Shu digest bilan saqlangan fayl nomi (kengaytmasi har xil bo'lishi mumkin) yoki None."""
+        matches = glob.glob(glob.escape(self.path(digest_name(digest))) + "*")
+        if not matches:
+            return None
+        return os.path.relpath(matches[0], self.location).replace(os.sep, "/")
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()[:10]
+        if getattr(content, "sha256", None) and hasattr(content, "temporary_file_path"):
+            # typingapp.uploads: fayl allaqachon tmp papkada va hash'langan — faqat ko'chiramiz
+            return self._commit(content.temporary_file_path(), content.sha256, ext)
+
+        tmp_dir = self.path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            sha = hashlib.sha256()
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in content.chunks():
+                    sha.update(chunk)
+                    fh.write(chunk)
+            return self._commit(tmp_path, sha.hexdigest(), ext)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _commit(self, tmp_path, digest, ext):
+        """tmp faylni digest nomiga ko'chiradi; shu baytlar avval bo'lsa, tmp o'chiriladi."""
+        existing = self.find_digest(digest)
+        if existing:
+            os.unlink(tmp_path)
+            return existing
+
+        final = digest_name(digest, ext)
+        full_path = self.path(final)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+        return final
+
+    def save_derived(self, name, data):
+        """Blob'dan yasalgan fayl (masalan, preview) — aynan shu nom bilan, atomik yoziladi."""
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+        return name
+
+
+class _ReceiptStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentAddressedStorage()
+
+
+receipt_storage = _ReceiptStorage()
+
+
+def get_receipt_storage():
+    """FileField(storage=...) uchun callable — migratsiyada konkret sozlama saqlanmaydi."""
+    return receipt_storage
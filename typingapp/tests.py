@@ -1,3 +1,1629 @@
-from django.test import TestCase
+# typingapp/tests.py
+"""
+Xulq-atvor testlari: denormalizatsiya jadvallari, pagination, ingest, yakunlash, cheklar, matnlar.
 
-# Create your tests here.
+    DB_DIR=/tmp/tdb python manage.py test typingapp
+
+Kesh — LocMemCache, natijalar sinxron yoziladi (RESULT_INGEST ASYNC=False), cheklar vaqtinchalik
+MEDIA_ROOT'ga. Kesh versiyalari har test boshida oshiriladi — process snapshotlari (refdata,
+text indeksi) oldingi testdan (rollback qilingan) ma'lumotni ko'rsatmasin.
+"""
+import asyncio
+import base64
+import fcntl
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import ingest, live
+from .admin import APPROVE_MESSAGE, REJECT_MESSAGE, review_entries
+from .anticheat import _apply, np, score_contest, score_runs
+from .cache import REFDATA_SCOPE, TEXTS_SCOPE, bump_version, contest_start_scope, get_version, leaderboard_scope
+from .models import (
+    Center, Contest, ContestEntry, ContestFinalStanding, ContestRun, ContestStanding, Duration, Language, Level,
+    Player, PracticeBest, PracticeDaily, PracticeRun, ReceiptBlob, Text, hist_bucket, hist_merge, hist_percentile,
+    normalize_text, word_offsets,
+)
+from .ingest import ResultIngestor
+from .pagination import KEYSET_ORDERING, KeysetPage, decode_cursor, encode_cursor
+from .settlement import SettlementError, compute_standings, settle
+from .storage import TMP_DIR, get_receipt_storage, receipt_digest
+from .startpack import get_packet
+from .thumbnails import thumb_name
+from .texts import MAX_WINDOW_WORDS, first_window, text_ids, word_window
+from .uploads import sniff_type
+
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "typingapp-tests"}}
+# collectstatic manifest testda bo'lmaydi
+TEST_STORAGES = dict(
+    settings.STORAGES, staticfiles={"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+)
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix="typingapp-tests-")
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STORAGES=TEST_STORAGES,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    RESULT_INGEST=dict(settings.RESULT_INGEST, ASYNC=False),
+    RECEIPT_UPLOAD=dict(settings.RECEIPT_UPLOAD, ASYNC_THUMBNAILS=False),
+)
+class TypingTestCase(TestCase):
+    # @read_only_db viewlar "readonly" alias'dan o'qiydi (testda default'ning MIRROR'i)
+    databases = {"default", "readonly"}
+
+    @classmethod
+    def setUpClass(cls):
+        # SQLite test bazasi xotirada: alohida ulanish test tranzaksiyasidagi qatorlarni ko'rmaydi
+        # (table is locked) — shu sababli readonly alias default ulanishni ishlatadi
+        cls._readonly_connection = connections["readonly"]
+        connections["readonly"] = connections["default"]
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name="Markaz")
+        cls.language = Language.objects.create(name="O'zbek")
+        cls.level = Level.objects.create(name="Oson")
+        cls.duration = Duration.objects.create(seconds=60)
+        cls.user = User.objects.create_user("alice", password="pw")
+        cls.player = cls.user.player
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["readonly"] = cls._readonly_connection
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        bump_version(REFDATA_SCOPE, TEXTS_SCOPE)
+
+    def practice_run(self, final_score, **kwargs):
+        fields = {
+            "player": self.player, "center": self.center, "language": self.language,
+            "level": self.level, "duration": self.duration,
+            "wpm": Decimal(final_score), "accuracy": Decimal("100"), "final_score": Decimal(final_score),
+        }
+        fields.update(kwargs)
+        return PracticeRun.objects.create(**fields)
+
+
+# =========================
+# PracticeBest (user-001)
+# =========================
+class PracticeBestTests(TypingTestCase):
+    def best(self):
+        return PracticeBest.objects.get(player=self.player)
+
+    def test_record_creates_then_keeps_only_better_run(self):
+        first = self.practice_run("40")
+        PracticeBest.record(first)
+        self.assertEqual(self.best().run_id, first.id)
+
+        worse = self.practice_run("30")
+        PracticeBest.record(worse)
+        self.assertEqual(self.best().run_id, first.id)
+
+        better = self.practice_run("55.5")
+        PracticeBest.record(better)
+        best = self.best()
+        self.assertEqual((best.run_id, best.final_score), (better.id, Decimal("55.50")))
+        self.assertEqual(PracticeBest.objects.count(), 1)
+
+    def test_each_slice_has_its_own_row(self):
+        PracticeBest.record(self.practice_run("40"))
+        PracticeBest.record(self.practice_run("20", center=None))
+        self.assertEqual(PracticeBest.objects.filter(player=self.player).count(), 2)
+
+    def test_slice_is_unique_even_with_null_fields(self):
+        PracticeBest.record(self.practice_run("40", center=None, language=None))
+        best = PracticeBest.objects.get()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PracticeBest.objects.create(
+                player=self.player, level=self.level, duration=self.duration, run=best.run,
+                final_score=Decimal("10"), created_at=best.created_at,
+            )
+
+    def test_record_after_losing_insert_race_updates_existing_row(self):
+        first, better = self.practice_run("40"), self.practice_run("60")
+        PracticeBest.record(first)
+        # parallel record(): exists() tekshiruvidan keyin qator paydo bo'lgan holat
+        with mock.patch.object(QuerySet, "exists", return_value=False):
+            PracticeBest.record(better)
+            PracticeBest.record(self.practice_run("50"))
+        best = self.best()
+        self.assertEqual((best.run_id, best.final_score), (better.id, Decimal("60.00")))
+
+    def test_deleting_best_run_falls_back_to_next_best(self):
+        runs = [self.practice_run(score) for score in ("40", "70", "55")]
+        for run in runs:
+            PracticeBest.record(run)
+        self.assertEqual(self.best().final_score, Decimal("70"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            runs[1].delete()
+        best = self.best()
+        self.assertEqual((best.run_id, best.final_score), (runs[2].id, Decimal("55.00")))
+
+    def test_deleting_last_run_removes_row(self):
+        run = self.practice_run("40")
+        PracticeBest.record(run)
+        with self.captureOnCommitCallbacks(execute=True):
+            run.delete()
+        self.assertFalse(PracticeBest.objects.exists())
+
+    def test_delete_bumps_leaderboard_versions(self):
+        run = self.practice_run("40")
+        PracticeBest.record(run)
+        before = (get_version(leaderboard_scope()), get_version(leaderboard_scope(self.center.id)))
+        with self.captureOnCommitCallbacks(execute=True):
+            run.delete()
+        after = (get_version(leaderboard_scope()), get_version(leaderboard_scope(self.center.id)))
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+
+
+# =========================
+# ContestStanding (user-004)
+# =========================
+class ContestStandingTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_center = Center.objects.create(name="Filial")
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now - timedelta(hours=1), end_at=now + timedelta(hours=1),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.RUNNING,
+        )
+
+    def contest_run(self, final_score, center=None, **kwargs):
+        run = ContestRun.objects.create(
+            contest=self.contest, user=self.user, center=center or self.center,
+            wpm=Decimal(final_score), accuracy=Decimal("100"), final_score=Decimal(final_score), **kwargs
+        )
+        ContestStanding.record(run)
+        return run
+
+    def standings(self):
+        return {s.center_id: s for s in ContestStanding.objects.filter(contest=self.contest, user=self.user)}
+
+    def test_record_keeps_latest_run_per_center(self):
+        self.contest_run("50")
+        latest = self.contest_run("30")  # oxirgi urinish — ball pastroq bo'lsa ham
+        rows = self.standings()
+        self.assertEqual(list(rows), [self.center.id])
+        self.assertEqual((rows[self.center.id].run_id, rows[self.center.id].final_score), (latest.id, Decimal("30.00")))
+
+    def test_is_latest_moves_between_centers(self):
+        self.contest_run("50")
+        self.contest_run("40", center=self.other_center)
+        rows = self.standings()
+        self.assertEqual(len(rows), 2)
+        self.assertFalse(rows[self.center.id].is_latest)
+        self.assertTrue(rows[self.other_center.id].is_latest)
+
+        self.contest_run("45")
+        rows = self.standings()
+        self.assertTrue(rows[self.center.id].is_latest)
+        self.assertFalse(rows[self.other_center.id].is_latest)
+
+    def test_deleting_run_falls_back_to_previous_attempt(self):
+        first = self.contest_run("50")
+        second = self.contest_run("30")
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        row = self.standings()[self.center.id]
+        self.assertEqual((row.run_id, row.is_latest), (first.id, True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.standings(), {})
+
+    def test_deleting_latest_center_restores_is_latest(self):
+        self.contest_run("50")
+        moved = self.contest_run("40", center=self.other_center)
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.delete()
+        rows = self.standings()
+        self.assertEqual(list(rows), [self.center.id])
+        self.assertTrue(rows[self.center.id].is_latest)
+
+
+# =========================
+# Keyset pagination (user-005)
+# =========================
+class KeysetPaginationTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        at = timezone.now()
+        # Teng ball va teng vaqtli qatorlar — tie-break id bo'yicha ham tekshiriladi
+        for i, score in enumerate(("90", "80", "80", "80", "70", "70", "60")):
+            PracticeRun.objects.create(
+                player=cls.player, language=cls.language, level=cls.level, duration=cls.duration,
+                wpm=Decimal(score), accuracy=Decimal("100"), final_score=Decimal(score),
+                created_at=at - timedelta(minutes=i % 2),
+            )
+
+    def test_cursor_round_trip(self):
+        run = PracticeRun.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(run, 40)),
+            (run.final_score, run.created_at, run.id, 40),
+        )
+
+    def test_invalid_cursor_is_ignored(self):
+        for token in ("", "bm90LWEtY3Vyc29y", "%%%"):
+            self.assertIsNone(decode_cursor(token))
+        page = KeysetPage(PracticeRun.objects.all(), "%%%", page_size=3)
+        self.assertEqual((page.offset, page.cursor, page.invalid), (0, "", True))
+        self.assertEqual(len(page.rows), 3)
+        self.assertFalse(KeysetPage(PracticeRun.objects.all(), None).invalid)
+
+    def test_forged_or_foreign_cursor_is_rejected(self):
+        run = PracticeRun.objects.first()
+        token = encode_cursor(run, 200, scope="leaderboard")
+        payload, signature = token.rsplit(":", 1)
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode()
+        forged = base64.urlsafe_b64encode(raw.replace("|200", "|0").encode()).decode().rstrip("=")
+        self.assertIsNone(decode_cursor(f"{forged}:{signature}", scope="leaderboard"))
+        # Boshqa reyting (markaz) uchun berilgan cursor — offset u yerda boshqa
+        self.assertIsNone(decode_cursor(token, scope=leaderboard_scope(self.center.id)))
+        self.assertEqual(decode_cursor(token, scope="leaderboard")[3], 200)
+
+    def test_pages_cover_full_ordering_without_gaps(self):
+        qs = PracticeRun.objects.all()
+        expected = list(qs.order_by(*KEYSET_ORDERING).values_list("id", flat=True))
+        seen, offsets, cursor = [], [], None
+        while True:
+            page = KeysetPage(qs, cursor, page_size=3)
+            offsets.append(page.offset)
+            seen.extend(row.id for row in page)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(offsets, [0, 3, 6])
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        page = KeysetPage(PracticeRun.objects.all(), page_size=7)
+        self.assertEqual(len(page.rows), 7)
+        self.assertIsNone(page.next_cursor)
+
+    def test_leaderboard_view_cursor(self):
+        runs = list(PracticeRun.objects.order_by(*KEYSET_ORDERING))
+        for run in runs:
+            run.center = self.center if run.final_score == 80 else None  # har xil kesim — alohida best qator
+            run.level = Level.objects.create(name=f"L{run.id}")
+            run.save()
+            PracticeBest.record(run)
+        url = reverse("typingapp:leaderboard")
+        after_first = PracticeBest.objects.get(run=runs[0])
+
+        response = self.client.get(url, {"cursor": encode_cursor(after_first, 1, scope=leaderboard_scope())})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page"].offset, 1)
+        self.assertEqual(len(response.context["page"].rows), len(runs) - 1)
+
+        # Yaroqsiz yoki boshqa scope'ning cursori — keshlanmaydi, birinchi sahifaga redirect
+        foreign = encode_cursor(after_first, 1, scope=leaderboard_scope(self.center.id))
+        for cursor, query in ((foreign, {}), ("garbage", {"center": self.center.id})):
+            response = self.client.get(url, {"cursor": cursor, **query})
+            expected = f"{url}?center={self.center.id}" if query else url
+            self.assertRedirects(response, expected, fetch_redirect_response=False)
+        response = self.client.get(
+            reverse("typingapp:leaderboard_center", args=[self.center.id]), {"cursor": "garbage"},
+        )
+        self.assertRedirects(response, reverse("typingapp:leaderboard_center", args=[self.center.id]),
+                             fetch_redirect_response=False)
+
+
+# =========================
+# Ingest: flush, spool replay, dead-letter (user-006)
+# =========================
+class IngestTests(TypingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.spool_dir = Path(tempfile.mkdtemp(prefix="typingapp-spool-"))
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+        # Fon oqimi ishga tushirilmaydi — flush() test ichida (shu DB ulanishida) chaqiriladi
+        self.ingestor = ResultIngestor(self.spool_dir, batch_size=50, flush_interval=0.5)
+        self.ingestor._open_spool()
+
+    def record(self, final_score, **kwargs):
+        rec = {
+            "kind": ingest.PRACTICE,
+            "created_at": (timezone.now() - timedelta(hours=1)).isoformat(),
+            "player_id": self.player.id, "center_id": self.center.id, "language_id": self.language.id,
+            "level_id": self.level.id, "duration_id": self.duration.id,
+            "wpm": final_score, "accuracy": "100", "final_score": final_score,
+        }
+        rec.update(kwargs)
+        return rec
+
+    def spool_files(self):
+        return sorted(p.name for p in self.spool_dir.glob("spool-*.jsonl") if p.stat().st_size)
+
+    def write_spool(self, name, records, tail=""):
+        path = self.spool_dir / name
+        path.write_text("".join(json.dumps(rec) + "\n" for rec in records) + tail, encoding="utf-8")
+        return path
+
+    def test_flush_writes_batch_and_removes_spool(self):
+        recs = [self.record("40"), self.record("55")]
+        for rec in recs:
+            self.ingestor.submit(rec)
+        self.assertEqual(len(self.spool_files()), 1)
+
+        self.assertEqual(self.ingestor.flush(), 2)
+        self.assertEqual(self.spool_files(), [])
+        self.assertEqual(self.ingestor.queue, [])
+        runs = PracticeRun.objects.order_by("final_score")
+        self.assertEqual([r.final_score for r in runs], [Decimal("40.00"), Decimal("55.00")])
+        # created_at — submit vaqti, flush vaqti emas
+        self.assertEqual(runs[0].created_at, parse_datetime(recs[0]["created_at"]))
+        self.assertEqual(PracticeBest.objects.get().final_score, Decimal("55.00"))
+        self.assertEqual(self.ingestor.flush(), 0)
+
+    def test_poison_record_goes_to_dead_letter(self):
+        good, poison = self.record("40"), self.record("50", player_id=None)
+        self.ingestor.submit(poison)
+        self.ingestor.submit(good)
+
+        with self.assertLogs("typingapp.ingest", "ERROR"):
+            self.ingestor.flush()
+        self.assertEqual(PracticeRun.objects.count(), 1)
+        self.assertEqual(self.ingestor.queue, [])
+        self.assertEqual(self.spool_files(), [])
+        dead = (self.spool_dir / f"dead-{self.ingestor.pid}.jsonl").read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in dead], [poison])
+
+    def test_partial_failure_requeues_only_unwritten_records(self):
+        recs = [self.record(score) for score in ("40", "50", "60")]
+        for rec in recs:
+            self.ingestor.submit(rec)
+
+        real_write = ingest.write_batch
+        calls = []
+
+        def flaky_write(records):
+            calls.append(len(records))
+            if len(calls) == 1:
+                raise IntegrityError("partiya")  # → bittalab yozish
+            if len(calls) == 3:
+                raise OperationalError("database is locked")
+            return real_write(records)
+
+        with mock.patch.object(ingest, "write_batch", flaky_write), self.assertLogs("typingapp.ingest", "ERROR"):
+            self.assertEqual(self.ingestor.flush(), 0)
+        self.assertEqual(PracticeRun.objects.count(), 1)
+        self.assertEqual(self.ingestor.queue, recs[1:])
+        # Spool'da faqat yozilmagan ikkitasi qoladi — qayta ishga tushsa dublikat bo'lmaydi
+        respooled = [fh.name for fh in self.ingestor.pending_files]
+        self.assertEqual(len(respooled), 1)
+        lines = Path(respooled[0]).read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], recs[1:])
+
+        self.assertEqual(self.ingestor.flush(), 2)
+        self.assertEqual(PracticeRun.objects.count(), 3)
+        self.assertEqual(self.spool_files(), [])
+
+    def test_recover_replays_dead_process_spool(self):
+        recs = [self.record("40"), self.record("45")]
+        spool = self.write_spool("spool-1-1.jsonl", recs, tail='{"kind": "prac')  # chala qator
+        lock = self.spool_dir / "spool-1.lock"
+        lock.touch()
+
+        with self.assertLogs("typingapp.ingest", "WARNING") as logs:
+            self.ingestor.recover()
+        self.assertIn("buzilgan qator", logs.output[0])
+        self.assertEqual(PracticeRun.objects.count(), 2)
+        self.assertFalse(spool.exists())
+        self.assertFalse(lock.exists())
+        self.assertEqual(self.ingestor.queue, [])
+
+    def test_recover_skips_live_process(self):
+        spool = self.write_spool("spool-2-1.jsonl", [self.record("40")])
+        with open(self.spool_dir / "spool-2.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # flock bitta process ichida ham fayl ochilishi bo'yicha ishlaydi
+            self.ingestor.recover()
+        self.assertTrue(spool.exists())
+        self.assertFalse(PracticeRun.objects.exists())
+
+    def test_failed_replay_adopts_records(self):
+        recs = [self.record("40"), self.record("45")]
+        spool = self.write_spool("spool-1-1.jsonl", recs)
+        (self.spool_dir / "spool-1.lock").touch()
+
+        failing = mock.patch.object(ingest, "write_batch", side_effect=OperationalError("database is locked"))
+        with failing, self.assertLogs("typingapp.ingest", "ERROR"):
+            self.ingestor.recover()
+        self.assertFalse(spool.exists())
+        self.assertEqual(self.ingestor.queue, recs)
+        self.assertEqual(len(self.ingestor.pending_files), 1)
+
+        self.assertEqual(self.ingestor.flush(), 2)
+        self.assertEqual(PracticeRun.objects.count(), 2)
+        self.assertEqual(self.spool_files(), [])
+
+
+# =========================
+# Start paketi: urinishlar limiti va ASYNC ingest navbati (user-018)
+# =========================
+class StartPacketAttemptsTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now - timedelta(hours=1), end_at=now + timedelta(hours=1),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.RUNNING,
+            attempts_per_user=1,
+        )
+        ContestEntry.objects.create(
+            user=cls.user, contest=cls.contest, receipt="receipts/test.pdf", status=ContestEntry.APPROVED,
+        )
+
+    def setUp(self):
+        super().setUp()
+        spool_dir = tempfile.mkdtemp(prefix="typingapp-spool-")
+        self.addCleanup(shutil.rmtree, spool_dir, ignore_errors=True)
+        # Fon oqimisiz ingestor — natijalar flush() chaqirilguncha navbatda turadi
+        self.ingestor = ResultIngestor(spool_dir, batch_size=50, flush_interval=0.5)
+        self.ingestor._open_spool()
+        patcher = mock.patch.object(ingest, "_ingestor", self.ingestor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def post_result(self):
+        with self.settings(RESULT_INGEST=dict(settings.RESULT_INGEST, ASYNC=True)):
+            return self.client.post(
+                reverse("typingapp:contest_result", args=[self.contest.id]), {"wpm": "60", "accuracy": "95"}
+            )
+
+    def test_queued_run_counts_as_attempt(self):
+        packet = get_packet(self.contest.id)
+        self.assertEqual(packet.attempts_used(self.user.id), 0)
+
+        self.assertEqual(self.post_result().status_code, 200)
+        self.assertFalse(ContestRun.objects.exists())
+        self.assertEqual(packet.attempts_used(self.user.id), 1)
+        start = self.client.get(reverse("typingapp:contest_start", args=[self.contest.id]))
+        self.assertRedirects(start, reverse("typingapp:contest_detail", args=[self.contest.id]))
+
+        # flush'dan keyin run bazadan sanaladi — ikki marta emas
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.ingestor.flush(), 1)
+        self.assertEqual(packet.attempts_used(self.user.id), 1)
+
+    def test_result_over_limit_is_rejected(self):
+        self.post_result()
+        response = self.post_result()  # contest_start'dan oldin ochilgan ikkinchi oyna
+        self.assertRedirects(response, reverse("typingapp:contest_detail", args=[self.contest.id]))
+        self.assertEqual(len(self.ingestor.queue), 1)
+
+
+# =========================
+# Musobaqani yakunlash (user-019)
+# =========================
+class SettlementTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now - timedelta(hours=2), end_at=now - timedelta(hours=1),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.FINISHED,
+            prize1=Decimal("300"), prize2=Decimal("200"), prize3=Decimal("100"),
+        )
+        cls.users = {"alice": cls.user}
+        for name in ("bob", "carol", "dave", "erin", "frank"):
+            cls.users[name] = User.objects.create_user(name, password="pw")
+        for name, user in cls.users.items():
+            status = ContestEntry.SUBMITTED if name == "erin" else ContestEntry.APPROVED
+            ContestEntry.objects.create(user=user, contest=cls.contest, receipt="receipts/test.pdf", status=status)
+
+        at = now - timedelta(minutes=90)
+        runs = [
+            # (user, final_score, accuracy, suspicious) — vaqt tartibida
+            ("alice", "50", "100", False),
+            ("bob", "90", "100", False),
+            ("alice", "70", "100", False),   # oxirgisi hisoblanadi
+            ("bob", "60", "100", False),     # eng yaxshisi emas, oxirgisi
+            ("carol", "70", "99", False),    # alice bilan teng ball, accuracy past
+            ("dave", "100", "100", True),    # shubhali — hisobga olinmaydi
+            ("erin", "99", "100", False),    # ariza tasdiqlanmagan
+            ("frank", "10", "100", False),
+        ]
+        for i, (name, score, acc, suspicious) in enumerate(runs):
+            ContestRun.objects.create(
+                contest=cls.contest, user=cls.users[name], center=cls.center, suspicious=suspicious,
+                wpm=Decimal(score), accuracy=Decimal(acc), final_score=Decimal(score),
+                created_at=at + timedelta(minutes=i),
+            )
+
+    def test_ranking_uses_latest_approved_clean_run(self):
+        standings = compute_standings(self.contest)
+        self.assertEqual(
+            [(rank, name, run[5]) for rank, name, run in standings],
+            [(1, "alice", Decimal("70.00")), (2, "carol", Decimal("70.00")),
+             (3, "bob", Decimal("60.00")), (4, "frank", Decimal("10.00"))],
+        )
+
+    def test_full_tie_goes_to_earlier_run(self):
+        ContestRun.objects.filter(contest=self.contest, user=self.users["carol"]).update(
+            accuracy=Decimal("100"), created_at=timezone.now() - timedelta(hours=3),
+        )
+        names = [name for _rank, name, _run in compute_standings(self.contest)]
+        self.assertEqual(names[:2], ["carol", "alice"])
+
+    def test_settle_writes_snapshot_and_prizes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(settle(self.contest), 4)
+        self.contest.refresh_from_db()
+        self.assertEqual(self.contest.status, Contest.SETTLED)
+        self.assertIsNotNone(self.contest.settled_at)
+        final = ContestFinalStanding.objects.filter(contest=self.contest)
+        self.assertEqual(
+            [(f.rank, f.username, f.prize, f.center_name) for f in final],
+            [(1, "alice", Decimal("300.00"), "Markaz"), (2, "carol", Decimal("200.00"), "Markaz"),
+             (3, "bob", Decimal("100.00"), "Markaz"), (4, "frank", Decimal("0.00"), "Markaz")],
+        )
+
+    def test_resettle_is_rejected(self):
+        settle(self.contest)
+        with self.assertRaises(SettlementError):
+            settle(self.contest)
+        # Eskirgan obyekt (boshqa process allaqachon yakunlagan) — shartli UPDATE to'xtatadi
+        stale = Contest.objects.get(pk=self.contest.pk)
+        stale.status = Contest.FINISHED
+        with self.assertRaises(SettlementError):
+            settle(stale)
+        self.assertEqual(ContestFinalStanding.objects.filter(contest=self.contest).count(), 4)
+
+    def test_running_contest_before_end_is_rejected(self):
+        Contest.objects.filter(pk=self.contest.pk).update(
+            status=Contest.RUNNING, end_at=timezone.now() + timedelta(hours=1),
+        )
+        self.contest.refresh_from_db()
+        with self.assertRaises(SettlementError):
+            settle(self.contest)
+
+    def test_too_few_participants_is_rejected(self):
+        Contest.objects.filter(pk=self.contest.pk).update(min_participants=5)
+        self.contest.refresh_from_db()
+        with self.assertRaises(SettlementError):
+            settle(self.contest)
+        self.contest.refresh_from_db()
+        self.assertEqual(self.contest.status, Contest.FINISHED)
+        self.assertFalse(ContestFinalStanding.objects.exists())
+
+
+# =========================
+# Chek yuklash: hajm limiti va magic bytes (user-015)
+# =========================
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 200
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+
+
+class ReceiptUploadTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now + timedelta(hours=1), end_at=now + timedelta(hours=2),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.OPEN,
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def join(self, name, content):
+        return self.client.post(
+            reverse("typingapp:contest_join", args=[self.contest.id]),
+            {"receipt": SimpleUploadedFile(name, content, content_type="application/octet-stream"), "phone": "+998"},
+        )
+
+    def tmp_files(self):
+        return os.listdir(get_receipt_storage().path(TMP_DIR))
+
+    def test_sniff_type(self):
+        self.assertEqual(sniff_type(PDF_BYTES), ("application/pdf", ".pdf"))
+        self.assertEqual(sniff_type(PNG_BYTES), ("image/png", ".png"))
+        self.assertEqual(sniff_type(b"\xff\xd8\xff\xe0"), ("image/jpeg", ".jpg"))
+        self.assertIsNone(sniff_type(b"GIF89a"))
+        self.assertIsNone(sniff_type(b""))
+
+    def test_type_comes_from_content_not_filename(self):
+        response = self.join("chek.png", PDF_BYTES)
+        self.assertRedirects(response, reverse("typingapp:contest_detail", args=[self.contest.id]),
+                             fetch_redirect_response=False)
+        entry = ContestEntry.objects.get(user=self.user, contest=self.contest)
+        self.assertTrue(entry.receipt.name.startswith("receipts/sha256/"))
+        self.assertTrue(entry.receipt.name.endswith(".pdf"))
+        with get_receipt_storage().open(entry.receipt.name) as fh:
+            self.assertEqual(fh.read(), PDF_BYTES)
+        self.assertEqual(entry.receipt_blob.sha256, hashlib.sha256(PDF_BYTES).hexdigest())
+        self.assertEqual(self.tmp_files(), [])
+
+    def test_short_jpeg_is_detected_on_complete(self):
+        self.join("a.bin", b"\xff\xd8\xff\xe0")
+        entry = ContestEntry.objects.get(user=self.user, contest=self.contest)
+        self.assertTrue(entry.receipt.name.endswith(".jpg"))
+
+    def test_unknown_type_is_rejected(self):
+        response = self.join("chek.pdf", b"<html>not a receipt</html>")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Faqat JPG, PNG yoki PDF")
+        self.assertFalse(ContestEntry.objects.exists())
+        self.assertEqual(self.tmp_files(), [])
+
+    def test_oversized_upload_is_rejected(self):
+        limit = 1024 * 1024
+        with self.settings(RECEIPT_UPLOAD=dict(settings.RECEIPT_UPLOAD, MAX_SIZE=limit)):
+            response = self.join("chek.png", PNG_BYTES + b"\x00" * limit)
+            self.assertContains(response, "1 MB dan oshmasligi kerak")
+            self.assertFalse(ContestEntry.objects.exists())
+
+            # Aynan limitdagi fayl qabul qilinadi
+            self.join("chek.png", PNG_BYTES + b"\x00" * (limit - len(PNG_BYTES)))
+            self.assertTrue(ContestEntry.objects.filter(user=self.user).exists())
+
+
+# =========================
+# Chekni berish: Range, If-Range, 304 (user-016)
+# =========================
+class ReceiptFileTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now + timedelta(hours=1), end_at=now + timedelta(hours=2),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.OPEN,
+        )
+        cls.entry = ContestEntry(user=cls.user, contest=cls.contest)
+        cls.entry.receipt.save("chek.pdf", ContentFile(PDF_BYTES))
+        cls.etag = f'"{hashlib.sha256(PDF_BYTES).hexdigest()}"'
+        cls.url = reverse("typingapp:receipt_file", args=[cls.entry.id])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_full_response(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, PDF_BYTES)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertIn(f"chek-{self.entry.id}.pdf", response["Content-Disposition"])
+
+    def test_range(self):
+        response, body = self.get(Range="bytes=0-9")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, PDF_BYTES[:10])
+        self.assertEqual(response["Content-Range"], f"bytes 0-9/{len(PDF_BYTES)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response, body = self.get(Range="bytes=-5")
+        self.assertEqual((response.status_code, body), (206, PDF_BYTES[-5:]))
+
+        # Oxiri fayldan tashqarida — fayl oxirigacha qisqartiriladi
+        response, body = self.get(Range="bytes=200-9999")
+        self.assertEqual((response.status_code, body), (206, PDF_BYTES[200:]))
+
+    def test_unsatisfiable_range(self):
+        response, _body = self.get(Range=f"bytes={len(PDF_BYTES)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(PDF_BYTES)}")
+
+    def test_malformed_or_multi_range_returns_full_file(self):
+        for header in ("bytes=0-1,5-6", "items=0-1", "bytes=-"):
+            response, body = self.get(Range=header)
+            self.assertEqual((response.status_code, body), (200, PDF_BYTES), header)
+
+    def test_if_range(self):
+        response, body = self.get(Range="bytes=0-3", **{"If-Range": self.etag})
+        self.assertEqual((response.status_code, body), (206, PDF_BYTES[:4]))
+
+        # Fayl o'zgargan (boshqa ETag) — oraliq emas, butun fayl
+        response, body = self.get(Range="bytes=0-3", **{"If-Range": '"eskirgan"'})
+        self.assertEqual((response.status_code, body), (200, PDF_BYTES))
+
+        last_modified = self.get()[0]["Last-Modified"]
+        response, _body = self.get(Range="bytes=0-3", **{"If-Range": last_modified})
+        self.assertEqual(response.status_code, 206)
+
+    def test_not_modified(self):
+        response, body = self.get(**{"If-None-Match": self.etag})
+        self.assertEqual((response.status_code, body), (304, b""))
+
+        last_modified = self.get()[0]["Last-Modified"]
+        response, _body = self.get(**{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        response, _body = self.get(**{"If-None-Match": '"boshqa"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_owner_or_staff(self):
+        other = User.objects.create_user("bob", password="pw")
+        self.client.force_login(other)
+        self.assertEqual(self.get()[0].status_code, 404)
+
+        other.is_staff = True
+        other.save()
+        self.assertEqual(self.get()[0].status_code, 200)
+
+    def test_sendfile_backend_returns_headers_only(self):
+        with self.settings(RECEIPT_SENDFILE={"BACKEND": "x-accel", "ACCEL_PREFIX": "/protected-media/"}):
+            response, body = self.get(Range="bytes=0-9")
+        self.assertEqual((response.status_code, body), (200, b""))
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + self.entry.receipt.name)
+        self.assertEqual(response["ETag"], self.etag)
+
+
+# =========================
+# Matn artefaktlari: word_offsets (user-022)
+# =========================
+SAMPLE_TEXTS = (
+    "",
+    "   ",
+    "bir",
+    "  bir   ikki\tuch\n\nto'rt  ",
+    "O‘zbekiston — Markaziy Osiyodagi davlat. Poytaxti: Toshkent.",
+    "Съешь же ещё этих мягких французских булок, да выпей чаю 😀 ok",
+)
+
+
+def naive_offsets(normalized):
+    offsets, pos = [], 0
+    for word in normalized.split():
+        offsets.append(pos)
+        pos += len(word) + 1
+    return offsets
+
+
+class TextArtifactTests(TypingTestCase):
+    def test_word_offsets_match_naive_split(self):
+        for content in SAMPLE_TEXTS:
+            normalized = normalize_text(content)
+            offsets = word_offsets(normalized)
+            self.assertEqual(list(offsets), naive_offsets(normalized), content)
+            self.assertEqual([normalized[o:].split(" ", 1)[0] for o in offsets], normalized.split(), content)
+
+    def test_save_computes_artifacts(self):
+        text = Text.objects.create(language=self.language, level=self.level, content=SAMPLE_TEXTS[3])
+        text.refresh_from_db()
+        self.assertEqual(text.normalized, "bir ikki uch to'rt")
+        self.assertEqual((text.word_count, text.char_count), (4, len(text.normalized)))
+        self.assertEqual(list(text.offsets), [0, 4, 9, 13])
+        self.assertEqual(text.content_hash, hashlib.sha256(text.normalized.encode()).hexdigest())
+
+    def test_update_fields_content_refreshes_artifacts(self):
+        text = Text.objects.create(language=self.language, level=self.level, content="bir ikki")
+        text.content = "uch to'rt besh"
+        text.save(update_fields=["content"])
+        text.refresh_from_db()
+        self.assertEqual((text.normalized, text.word_count), ("uch to'rt besh", 3))
+        self.assertEqual(list(text.offsets), naive_offsets(text.normalized))
+
+
+# =========================
+# So'z oynalari: word_window chegaralari (user-023)
+# =========================
+class WordWindowTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.words = [f"s{i}" + "x" * (i % 4) for i in range(10)]
+        cls.text = Text.objects.create(language=cls.language, level=cls.level, content="  ".join(cls.words))
+
+    def window(self, start, count):
+        return word_window(self.text.id, start, count)
+
+    def test_windows(self):
+        self.assertEqual(self.window(0, 3), {
+            "id": self.text.id, "start": 0, "count": 3, "text": " ".join(self.words[:3]), "words": 10, "next": 3,
+        })
+        middle = self.window(4, 3)
+        self.assertEqual((middle["text"], middle["next"]), (" ".join(self.words[4:7]), 7))
+
+    def test_last_window_is_clipped(self):
+        tail = self.window(8, 5)
+        self.assertEqual((tail["text"], tail["count"], tail["next"]), (" ".join(self.words[8:]), 2, None))
+        exact = self.window(7, 3)
+        self.assertEqual((exact["text"], exact["count"], exact["next"]), (" ".join(self.words[7:]), 3, None))
+        whole = self.window(0, 10)
+        self.assertEqual((whole["text"], whole["next"]), (self.text.normalized, None))
+
+    def test_start_past_end_is_empty(self):
+        for start in (10, 11, 500):
+            window = self.window(start, 3)
+            self.assertEqual((window["text"], window["count"], window["next"]), ("", 0, None), start)
+
+    def test_missing_and_empty_texts(self):
+        self.assertIsNone(word_window(self.text.id + 1000, 0, 3))
+        empty = Text.objects.create(language=self.language, level=self.level, content="   ")
+        self.assertEqual(word_window(empty.id, 0, 3)["words"], 0)
+        self.assertEqual(word_window(empty.id, 0, 3)["text"], "")
+
+    def test_windows_rebuild_unicode_text(self):
+        text = Text.objects.create(language=self.language, level=self.level, content=SAMPLE_TEXTS[5])
+        parts, start = [], 0
+        while start is not None:
+            window = word_window(text.id, start, 3)
+            parts.append(window["text"])
+            start = window["next"]
+        self.assertEqual(" ".join(parts), text.normalized)
+
+    def test_first_window_matches_word_window(self):
+        for count in (1, 3, 10, 50):
+            self.assertEqual(first_window(self.text.id, self.text.normalized, count), self.window(0, count))
+
+    def test_view_clamps_parameters(self):
+        self.client.force_login(self.user)
+        url = reverse("typingapp:text_words", args=[self.text.id])
+        data = self.client.get(url, {"start": -5, "count": 0}).json()
+        self.assertEqual((data["start"], data["count"], data["text"]), (0, 1, self.words[0]))
+        data = self.client.get(url, {"start": 2, "count": MAX_WINDOW_WORDS + 1}).json()
+        self.assertEqual((data["start"], data["count"], data["next"]), (2, 8, None))
+        self.assertEqual(self.client.get(url, {"start": "x"}).status_code, 400)
+        missing = reverse("typingapp:text_words", args=[self.text.id + 1000])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+
+# =========================
+# import_texts: takrorlar (user-024)
+# =========================
+class ImportTextsTests(TypingTestCase):
+    def import_file(self, body, suffix=".txt", *args):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(body)
+        out = io.StringIO()
+        call_command("import_texts", path, "--language", "o'zbek", "--level", str(self.level.id), *args,
+                     stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def contents(self):
+        return sorted(Text.objects.values_list("normalized", flat=True))
+
+    def test_duplicates_within_file(self):
+        out = self.import_file("bir ikki\nuch\n\nto'rt besh\n\nbir  ikki uch\n\n\n\n  bir\tikki\n uch \n")
+        self.assertEqual(self.contents(), ["bir ikki uch", "to'rt besh"])
+        self.assertIn("4 ta parcha o'qildi: 2 ta yangi, 2 ta takror, 0 ta bo'sh", out)
+
+    def test_duplicates_across_batches(self):
+        out = self.import_file("bir\n\nikki\n\nbir\n\nikki\n\nuch\n", ".txt", "--batch-size", "1")
+        self.assertEqual(self.contents(), ["bir", "ikki", "uch"])
+        self.assertIn("3 ta yangi, 2 ta takror", out)
+
+    def test_duplicates_against_database(self):
+        Text.objects.create(language=self.language, level=self.level, content="  mavjud   matn ")
+        out = self.import_file("mavjud matn\n\nyangi matn\n")
+        self.assertEqual(self.contents(), ["mavjud matn", "yangi matn"])
+        self.assertIn("1 ta yangi, 1 ta takror", out)
+
+    def test_jsonl_titles_and_empty_passages(self):
+        body = "\n".join(json.dumps(item) for item in (
+            {"content": "birinchi matn", "title": "Bob 1"},
+            {"content": "   "},
+            {"content": "birinchi   matn", "title": "Takror"},
+            {"content": "ikkinchi matn"},
+        ))
+        out = self.import_file(body, ".jsonl", "--title-prefix", "Parcha")
+        self.assertEqual(
+            sorted(Text.objects.values_list("title", "normalized")),
+            [("Bob 1", "birinchi matn"), ("Parcha 4", "ikkinchi matn")],
+        )
+        self.assertIn("2 ta yangi, 1 ta takror, 1 ta bo'sh", out)
+
+    def test_dry_run_writes_nothing(self):
+        out = self.import_file("bir\n\nikki\n", ".txt", "--dry-run")
+        self.assertFalse(Text.objects.exists())
+        self.assertIn("[dry-run] 2 ta parcha o'qildi: 2 ta yangi", out)
+
+    def test_created_texts_are_pickable(self):
+        self.assertEqual(text_ids(self.language.id, self.level.id), [])  # indeks shu yerda quriladi
+        self.import_file("bir\n\nikki\n")
+        # bulk_create signal yubormaydi — indeksni buyruqning o'zi eskirtiradi
+        self.assertEqual(len(text_ids(self.language.id, self.level.id)), 2)
+
+    def test_bad_input(self):
+        with self.assertRaises(CommandError):
+            self.import_file('{"content": "bir"}\n{buzuq\n', ".jsonl")
+        with self.assertRaises(CommandError):
+            self.import_file('{"title": "matnsiz"}\n', ".jsonl")
+        with self.assertRaises(CommandError):
+            call_command("import_texts", "/nonexistent.txt", "--language", "yo'q", "--level", "1")
+
+
+# =========================
+# PracticeDaily: gistogrammadan p90 (user-025)
+# =========================
+def naive_p90(values):
+    ordered = sorted(Decimal(str(v)) for v in values)
+    return ordered[math.ceil(len(ordered) * 0.9) - 1].quantize(Decimal("0.01"))
+
+
+class PracticeDailyTests(TypingTestCase):
+    def runs(self, wpms, accuracy="97.5", **kwargs):
+        return [self.practice_run(str(wpm), accuracy=Decimal(accuracy), **kwargs) for wpm in wpms]
+
+    def daily(self):
+        return PracticeDaily.objects.get(player=self.player)
+
+    def test_hist_percentile_matches_sorted_list(self):
+        rng = random.Random(25)
+        for size in (1, 2, 9, 10, 11, 57, 300):
+            values = [Decimal(rng.randint(500, 12000)) / 100 for _ in range(size)]
+            hist = {}
+            for value in values:
+                hist_merge(hist, {hist_bucket(value): 1})
+            self.assertEqual(hist_percentile(hist, 90), naive_p90(values), size)
+        self.assertEqual(hist_percentile({}, 90), Decimal("0.00"))
+
+    def test_merged_histograms_give_combined_p90(self):
+        first = [Decimal(v) / 4 for v in range(40, 120)]
+        second = [Decimal("80.15")] * 5 + [Decimal(v) + Decimal("0.37") for v in range(40, 50)]
+        a, b = {}, {}
+        for value in first:
+            hist_merge(a, {hist_bucket(value): 1})
+        for value in second:
+            hist_merge(b, {hist_bucket(value): 1})
+        self.assertEqual(hist_percentile(hist_merge(dict(a), b), 90), naive_p90(first + second))
+
+    def test_record_runs(self):
+        wpms = [Decimal(v) + Decimal("0.25") for v in range(1, 21)]
+        PracticeDaily.record_runs(self.runs(wpms))
+        row = self.daily()
+        self.assertEqual(row.runs_count, 20)
+        self.assertEqual((row.wpm_best, row.wpm_p90, row.wpm_mean),
+                         (Decimal("20.25"), Decimal("18.25"), Decimal("10.75")))
+        # p90 runlarning aniq persentili (0.01 gacha), butun qismi emas
+        self.assertEqual((row.acc_p90, row.acc_mean), (Decimal("97.50"), Decimal("97.50")))
+        self.assertEqual(row.wpm_p90, naive_p90(wpms))
+        self.assertEqual(row.wpm_hist, {str(v * 100 + 25): 1 for v in range(1, 21)})
+
+    def test_incremental_equals_single_pass(self):
+        wpms = [30, 45, 45, 52, 61, 33, 70, 48, 44, 39, 90, 41]
+        PracticeDaily.record_runs(self.runs(wpms[:5]))
+        PracticeDaily.record_runs(self.runs(wpms[5:]))
+        row = self.daily()
+        self.assertEqual((row.runs_count, row.wpm_p90, row.wpm_best), (12, naive_p90(wpms), Decimal("90")))
+        self.assertEqual(row.wpm_total, sum(Decimal(w) for w in wpms))
+
+    def test_rows_per_day_language_and_duration(self):
+        other_duration = Duration.objects.create(seconds=120)
+        yesterday = timezone.now() - timedelta(days=1)
+        PracticeDaily.record_runs(
+            self.runs([40]) + self.runs([50], duration=other_duration) + self.runs([60], created_at=yesterday)
+        )
+        self.assertEqual(PracticeDaily.objects.filter(player=self.player).count(), 3)
+
+    def test_delete_rebuilds_p90(self):
+        runs = self.runs(range(1, 11))
+        PracticeDaily.record_runs(runs)
+        self.assertEqual(self.daily().wpm_p90, Decimal("9.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            runs[-1].delete()
+            runs[-2].delete()
+        row = self.daily()
+        self.assertEqual((row.runs_count, row.wpm_best, row.wpm_p90), (8, Decimal("8.00"), Decimal("8.00")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for run in runs[:-2]:
+                run.delete()
+        self.assertFalse(PracticeDaily.objects.exists())
+
+    def test_progress_summary_merges_days(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        today_wpms, yesterday_wpms = list(range(20, 40)), list(range(60, 70))
+        PracticeDaily.record_runs(self.runs(today_wpms) + self.runs(yesterday_wpms, created_at=yesterday))
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("typingapp:progress"), {"days": 30})
+        self.assertEqual(response.status_code, 200)
+        series, summary = response.context["series"], response.context["summary"]
+        self.assertEqual([point["wpm_p90"] for point in series], [naive_p90(yesterday_wpms), naive_p90(today_wpms)])
+        self.assertEqual((summary["runs"], summary["days"]), (30, 2))
+        self.assertEqual(summary["wpm_p90"], naive_p90(today_wpms + yesterday_wpms))
+
+
+# =========================
+# Anti-cheat: vektorlashgan baholash (user-020)
+# =========================
+OFF = 1e9  # mezonni o'chirish uchun chegara
+
+
+def anticheat(**overrides):
+    return override_settings(ANTICHEAT=dict(settings.ANTICHEAT, **overrides))
+
+
+@skipIf(np is None, "NumPy o'rnatilmagan")
+class AnticheatScoreTests(TypingTestCase):
+    def score(self, runs, history, practice=None):
+        """runs: [(user, wpm, acc)], history: [(user, wpm, acc)] — massivlarga aylantirib baholaydi."""
+        run_user, run_wpm, run_acc = (np.array(col, dtype=dt) for col, dt in zip(zip(*runs), (np.int64, float, float)))
+        if history:
+            hist_user, hist_wpm, hist_acc = (
+                np.array(col, dtype=dt) for col, dt in zip(zip(*history), (np.int64, float, float))
+            )
+        else:
+            hist_user, hist_wpm, hist_acc = np.zeros(0, np.int64), np.zeros(0), np.zeros(0)
+        if practice is None:
+            practice = [False] * len(history)
+        with np.errstate(all="raise"):  # 0 ga bo'lish yoki NaN — xato
+            return score_runs(run_user, run_wpm, run_acc, hist_user, hist_wpm, hist_acc, np.array(practice, dtype=bool))
+
+    @anticheat(POPULATION_Z=OFF, JUMP_RATIO=OFF)
+    def test_user_z_is_per_user(self):
+        # Tarix aralash tartibda: 1 — wpm ~40 (std < floor → 5), acc 80; 2 — wpm 80, acc 90
+        history = [
+            (1, 40, 80), (2, 80, 90), (1, 42, 80), (2, 80, 90), (1, 38, 80),
+            (2, 80, 90), (1, 40, 80), (2, 80, 90), (1, 40, 80), (2, 80, 90),
+        ]
+        scores = self.score([(1, 55, 80), (2, 80, 90), (2, 100, 90), (1, 50, 98)], history)
+        np.testing.assert_allclose(scores, [
+            (15 / 5) / 4,             # z_wpm = 3
+            0.0,                      # o'z bazasida
+            (20 / 5) / 4,             # z_wpm = 4 → chegarada
+            ((10 / 5 + 18 / 3) / 2) / 4,  # tezlik va aniqlik birga: (2 + 6) / 2
+        ], atol=1e-6)
+        self.assertEqual((scores >= 1).tolist(), [False, False, True, True])
+
+    @anticheat(POPULATION_Z=OFF, JUMP_RATIO=OFF)
+    def test_short_history_is_ignored(self):
+        history = [(1, 40, 95)] * 4
+        np.testing.assert_array_equal(self.score([(1, 200, 100)], history), [0.0])
+
+    @anticheat(USER_Z=OFF, JUMP_RATIO=OFF)
+    def test_population_median_mad(self):
+        # median 44, MAD = 2 * 1.4826 < floor → 5
+        scores = self.score([(1, 40, 95), (2, 42, 95), (3, 44, 95), (4, 46, 95), (5, 150, 95)], [])
+        np.testing.assert_allclose(scores, [0.0, 0.0, 0.0, (2 / 5) / 6, (106 / 5) / 6], atol=1e-6)
+        self.assertEqual((scores >= 1).tolist(), [False] * 4 + [True])
+
+    @anticheat(USER_Z=OFF, POPULATION_Z=OFF)
+    def test_jump_counts_only_practice(self):
+        history = [(1, 40, 95), (1, 50, 95), (1, 120, 95), (2, 120, 95)]
+        practice = [True, True, False, False]  # 120 lar — boshqa musobaqalardagi natija
+        scores = self.score([(1, 85, 95), (1, 60, 95), (2, 300, 95)], history, practice)
+        np.testing.assert_allclose(scores, [(85 / 50 - 1) / 0.6, (60 / 50 - 1) / 0.6, 0.0], atol=1e-6)
+        self.assertEqual((scores >= 1).tolist(), [True, False, False])
+
+    def test_single_sample_and_zero_mad(self):
+        # Bitta tarix namunasi (std = 0) va bir xil runlar (MAD = 0): 0 ga bo'linmaydi
+        history, practice = [(1, 50, 95)], [True]
+        runs = [(1, 50, 95), (2, 50, 95), (3, 50, 95)]
+        np.testing.assert_array_equal(self.score(runs, history, practice), [0.0, 0.0, 0.0])
+
+        with anticheat(MIN_HISTORY=1, JUMP_RATIO=OFF):
+            scores = self.score(runs + [(1, 70, 95)], history, practice)
+        # shaxsiy: (70 - 50) / floor 5 = 4 → 1.0; umumiy: median 50, MAD 0 → 20 / 5 / 6
+        np.testing.assert_allclose(scores, [0.0, 0.0, 0.0, 1.0], atol=1e-6)
+        self.assertTrue(np.isfinite(scores).all())
+
+
+@skipIf(np is None, "NumPy o'rnatilmagan")
+class AnticheatApplyTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now - timedelta(hours=1), end_at=now + timedelta(hours=1),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.RUNNING,
+        )
+
+    def contest_run(self, user, wpm, suspicious=False):
+        return ContestRun.objects.create(
+            contest=self.contest, user=user, wpm=Decimal(wpm), accuracy=Decimal("95"),
+            final_score=Decimal(wpm), suspicious=suspicious,
+        )
+
+    def test_score_contest_flags_outlier(self):
+        for _ in range(5):
+            self.practice_run("40", accuracy=Decimal("95"))
+        runs = [self.contest_run(self.user, 40)]
+        for i, wpm in enumerate((42, 44, 46, 150)):
+            runs.append(self.contest_run(User.objects.create_user(f"u{i}", password="pw"), wpm))
+
+        self.assertEqual(score_contest(self.contest), (5, 1))
+        scores = dict(ContestRun.objects.values_list("id", "anomaly_score"))
+        flagged = set(ContestRun.objects.filter(suspicious=True).values_list("id", flat=True))
+        self.assertEqual(flagged, {runs[-1].id})
+        self.assertAlmostEqual(scores[runs[-1].id], round((106 / 5) / 6, 3))
+        self.assertAlmostEqual(scores[runs[3].id], round((2 / 5) / 6, 3))
+        self.assertEqual(scores[runs[0].id], 0.0)  # o'z tarixida, sakrash yo'q
+
+    def test_apply_only_sets_flags(self):
+        reviewed = self.contest_run(self.user, 40, suspicious=True)  # admin qo'ygan bayroq
+        high, edge = self.contest_run(self.user, 90), self.contest_run(self.user, 95)
+        run_ids = np.array([reviewed.id, high.id, edge.id], dtype=np.int64)
+
+        self.assertEqual(_apply(run_ids, np.array([0.2, 1.5, 1.0])), 2)
+        rows = {run.id: run for run in ContestRun.objects.all()}
+        self.assertEqual(
+            [(rows[pk].suspicious, rows[pk].anomaly_score) for pk in run_ids.tolist()],
+            [(True, 0.2), (True, 1.5), (True, 1.0)],
+        )
+        # Qayta baholash: yangi bayroq yo'q, pastroq score bayroqni olib tashlamaydi
+        self.assertEqual(_apply(run_ids, np.array([0.0, 0.1, 0.0])), 0)
+        self.assertEqual(ContestRun.objects.filter(suspicious=True).count(), 3)
+
+
+# =========================
+# Cheklar: content-addressed storage va refcount (user-014)
+# =========================
+class ReceiptBlobTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contest = Contest.objects.create(
+            title="Kubok", start_at=now + timedelta(hours=1), end_at=now + timedelta(hours=2),
+            language=cls.language, level=cls.level, duration=cls.duration, status=Contest.OPEN,
+        )
+        cls.bob = User.objects.create_user("bob", password="pw")
+
+    def setUp(self):
+        super().setUp()
+        self.storage = get_receipt_storage()
+        # Preview yasash bu yerda tekshirilmaydi (soxta PNG/PDF baytlari)
+        patcher = mock.patch("typingapp.thumbnails.schedule")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def entry(self, user, name, content):
+        entry = ContestEntry(user=user, contest=self.contest)
+        entry.receipt.save(name, ContentFile(content))
+        return entry
+
+    def test_storage_dedupes_identical_bytes(self):
+        first = self.storage.save("receipts/a.pdf", ContentFile(PDF_BYTES))
+        second = self.storage.save("receipts/b.PDF", ContentFile(PDF_BYTES))
+        self.assertEqual(first, second)
+        self.assertEqual(receipt_digest(first), hashlib.sha256(PDF_BYTES).hexdigest())
+        self.assertEqual(os.listdir(self.storage.path(TMP_DIR)), [])
+
+    def test_identical_uploads_share_one_blob(self):
+        a = self.entry(self.user, "a.pdf", PDF_BYTES)
+        b = self.entry(self.bob, "b.pdf", PDF_BYTES)
+        self.assertEqual(a.receipt.name, b.receipt.name)
+        blob = ReceiptBlob.objects.get()
+        self.assertEqual((blob.refcount, blob.name, blob.size), (2, a.receipt.name, len(PDF_BYTES)))
+        self.assertEqual(a.receipt_blob_id, b.receipt_blob_id)
+
+    def test_last_release_deletes_file_blob_and_thumbnail(self):
+        a = self.entry(self.user, "a.pdf", PDF_BYTES)
+        b = self.entry(self.bob, "b.pdf", PDF_BYTES)
+        name = a.receipt.name
+        thumb = self.storage.save_derived(thumb_name(receipt_digest(name)), b"\xff\xd8\xff preview")
+        ReceiptBlob.objects.update(thumbnail=thumb)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+        self.assertEqual(ReceiptBlob.objects.get().refcount, 1)
+        self.assertTrue(self.storage.exists(name))
+        self.assertTrue(self.storage.exists(thumb))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete()
+        self.assertFalse(ReceiptBlob.objects.exists())
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(self.storage.exists(thumb))
+
+    def test_file_survives_when_reuploaded_before_commit(self):
+        a = self.entry(self.user, "a.pdf", PDF_BYTES)
+        name = a.receipt.name
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+            # Xuddi shu chek o'sha tranzaksiyada qayta yuklandi — yangi blob, fayl o'chmasligi kerak
+            self.entry(self.bob, "b.pdf", PDF_BYTES)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(ReceiptBlob.objects.get().refcount, 1)
+
+    def test_replacing_receipt_releases_old_blob(self):
+        a = self.entry(self.user, "a.pdf", PDF_BYTES)
+        old_name, old_blob = a.receipt.name, a.receipt_blob_id
+        with self.captureOnCommitCallbacks(execute=True):
+            a.receipt.save("a.png", ContentFile(PNG_BYTES))
+        a.refresh_from_db()
+        self.assertNotEqual(a.receipt_blob_id, old_blob)
+        self.assertEqual(list(ReceiptBlob.objects.values_list("sha256", "refcount")),
+                         [(hashlib.sha256(PNG_BYTES).hexdigest(), 1)])
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertTrue(self.storage.exists(a.receipt.name))
+
+    def test_resaving_same_receipt_keeps_refcount(self):
+        a = self.entry(self.user, "a.pdf", PDF_BYTES)
+        a.phone = "+998"
+        a.save()
+        self.assertEqual(ReceiptBlob.objects.get().refcount, 1)
+
+
+# =========================
+# Player hisoblagichlari (user-012)
+# =========================
+class PlayerStatsTests(TypingTestCase):
+    STAT_FIELDS = ("runs_count", "best_score", "wpm_total", "last_run_at")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.bob = User.objects.create_user("bob", password="pw").player
+
+    def stats(self):
+        return list(Player.objects.order_by("pk").values_list(*self.STAT_FIELDS))
+
+    def assertMatchesRebuild(self):
+        recorded = self.stats()
+        Player.rebuild_stats()
+        self.assertEqual(recorded, self.stats())
+
+    def test_mixed_batch_matches_rebuild(self):
+        now = timezone.now()
+        runs = [
+            self.practice_run("40", created_at=now - timedelta(minutes=5)),
+            self.practice_run("70.25", player=self.bob, created_at=now - timedelta(minutes=1)),
+            self.practice_run("55.5", created_at=now - timedelta(minutes=9)),  # partiyada tartibsiz
+            self.practice_run("20", player=self.bob, created_at=now - timedelta(minutes=3)),
+        ]
+        Player.record_runs(runs[:1])
+        Player.record_runs(runs[1:])
+        self.player.refresh_from_db()
+        self.assertEqual(
+            (self.player.runs_count, self.player.best_score, self.player.wpm_total, self.player.last_run_at),
+            (2, Decimal("55.50"), Decimal("95.50"), runs[0].created_at),
+        )
+        self.assertMatchesRebuild()
+
+    def test_late_batch_does_not_move_last_run_back(self):
+        now = timezone.now()
+        newer = self.practice_run("40", created_at=now)
+        older = self.practice_run("30", created_at=now - timedelta(hours=2))  # replay / kechikkan flush
+        Player.record_runs([newer])
+        Player.record_runs([older])
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.last_run_at, newer.created_at)
+        self.assertMatchesRebuild()
+
+    def test_counters_after_delete_match_rebuild(self):
+        runs = [self.practice_run(score) for score in ("40", "90", "60")]
+        Player.record_runs(runs)
+        with self.captureOnCommitCallbacks(execute=True):
+            runs[1].delete()
+        self.player.refresh_from_db()
+        self.assertEqual((self.player.runs_count, self.player.best_score), (2, Decimal("60.00")))
+
+        Player.record_runs([self.practice_run("50", player=self.bob), self.practice_run("45")])
+        self.assertMatchesRebuild()
+
+
+# =========================
+# Admin: arizalarni ommaviy ko'rib chiqish (user-013)
+# =========================
+class ReviewEntriesTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.contests = [
+            Contest.objects.create(
+                title=f"Kubok {i}", start_at=now + timedelta(hours=1), end_at=now + timedelta(hours=2),
+                language=cls.language, level=cls.level, duration=cls.duration, status=Contest.OPEN,
+            )
+            for i in range(2)
+        ]
+        cls.admin = User.objects.create_superuser("admin", password="pw")
+        cls.entries = []
+        for i, (contest, message) in enumerate([
+            (cls.contests[0], ""), (cls.contests[0], "Qo'lda yozilgan izoh"), (cls.contests[1], ""),
+        ]):
+            user = User.objects.create_user(f"u{i}", password="pw")
+            cls.entries.append(ContestEntry.objects.create(
+                user=user, contest=contest, receipt="receipts/test.pdf", review_message=message,
+            ))
+
+    def test_single_update_and_bump_on_commit(self):
+        scopes = [contest_start_scope(contest.id) for contest in self.contests]
+        before = [get_version(scope) for scope in scopes]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            # SAVEPOINT, contest_id'lar, UPDATE, RELEASE (test tranzaksiyasi ichida atomic — savepoint)
+            with self.assertNumQueries(4) as ctx:
+                updated = review_entries(ContestEntry.objects.all(), ContestEntry.APPROVED, self.admin, APPROVE_MESSAGE)
+            self.assertEqual([get_version(scope) for scope in scopes], before)  # commit'gacha bump yo'q
+        self.assertEqual(updated, 3)
+
+        sql = [query["sql"] for query in ctx.captured_queries]
+        self.assertTrue(sql[0].startswith("SAVEPOINT"))
+        self.assertTrue(sql[-1].startswith("RELEASE SAVEPOINT"))
+        self.assertEqual(sum(statement.startswith("UPDATE") for statement in sql), 1)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual([get_version(scope) for scope in scopes], [v + 1 for v in before])
+
+    def test_review_message_only_filled_when_empty(self):
+        review_entries(ContestEntry.objects.all(), ContestEntry.REJECTED, self.admin, REJECT_MESSAGE)
+        rows = ContestEntry.objects.in_bulk([entry.id for entry in self.entries])
+        self.assertEqual(
+            [(rows[e.id].status, rows[e.id].review_message, rows[e.id].reviewed_by_id) for e in self.entries],
+            [(ContestEntry.REJECTED, REJECT_MESSAGE, self.admin.id),
+             (ContestEntry.REJECTED, "Qo'lda yozilgan izoh", self.admin.id),
+             (ContestEntry.REJECTED, REJECT_MESSAGE, self.admin.id)],
+        )
+        self.assertTrue(all(rows[e.id].reviewed_at for e in self.entries))
+
+    def test_failed_update_does_not_bump(self):
+        scope = contest_start_scope(self.contests[0].id)
+        before = get_version(scope)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with mock.patch.object(QuerySet, "update", side_effect=OperationalError("database is locked")):
+                with self.assertRaises(OperationalError):
+                    review_entries(ContestEntry.objects.all(), ContestEntry.APPROVED, self.admin, APPROVE_MESSAGE)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_version(scope), before)
+
+
+# =========================
+# Tasodifiy matn (user-021)
+# =========================
+class TextRandomTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.texts = [
+            Text.objects.create(language=cls.language, level=cls.level, content=f"matn {i}") for i in range(3)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse("typingapp:text_random", args=[self.language.id, self.level.id])
+
+    def test_redirects_to_payload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertIn(response.url, {reverse("typingapp:text_payload", args=[t.id]) for t in self.texts})
+
+    def test_stale_index_skips_deleted_text(self):
+        text_ids(self.language.id, self.level.id)  # indeks quriladi
+        survivor = self.texts[0]
+        # Boshqa worker o'chirdi, versiya hali oshmagan — indeksda o'chgan id'lar qoladi
+        Text.objects.exclude(id=survivor.id).delete()
+        self.assertEqual(len(text_ids(self.language.id, self.level.id)), 3)
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url).url, reverse("typingapp:text_payload", args=[survivor.id]))
+
+        Text.objects.all().delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+# =========================
+# Reyting fragment keshi kalitlari (user-002)
+# =========================
+class LeaderboardCacheKeyTests(TypingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        PracticeBest.record(PracticeRun.objects.create(
+            player=cls.player, center=cls.center, language=cls.language, level=cls.level, duration=cls.duration,
+            wpm=Decimal("40"), accuracy=Decimal("100"), final_score=Decimal("40"),
+        ))
+
+    def get(self, center):
+        return self.client.get(reverse("typingapp:leaderboard"), {"center": center})
+
+    def test_invalid_center_uses_global_fragment(self):
+        self.client.get(reverse("typingapp:leaderboard"))  # refdata snapshot + global fragment
+        for junk in ("abc", "99999", "1;drop", str(self.center.id + 1000)):
+            with self.assertNumQueries(0):  # yangi fragment yozilmaydi — global kesh ishlatiladi
+                response = self.get(junk)
+            self.assertEqual(response.context["current_center"], "")
+
+    def test_valid_center_is_normalized(self):
+        response = self.get(f"0{self.center.id}")
+        self.assertEqual(response.context["current_center"], str(self.center.id))
+        with self.assertNumQueries(0):
+            self.get(str(self.center.id))
+
+
+# =========================
+# /metrics himoyasi (user-011)
+# =========================
+class MetricsAccessTests(TypingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("metrics")
+
+    @override_settings(METRICS_TOKEN="")
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_bearer_token_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+
+
+# =========================
+# Ma'lumotnoma keshi: typing sahifalari refdata uchun bazaga bormaydi (user-008)
+# =========================
+class RefdataCacheTests(TypingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def pages(self):
+        lang, lvl = self.language.id, self.level.id
+        return [
+            reverse("typingapp:center_list"),
+            reverse("typingapp:select_language"),
+            reverse("typingapp:select_level", args=[lang]),
+            reverse("typingapp:select_time", args=[lang, lvl]),
+        ]
+
+    def test_warm_pages_query_only_session_and_user(self):
+        self.client.get(reverse("typingapp:select_language"))  # snapshot yuklanadi
+        for url in self.pages():
+            with self.assertNumQueries(2):  # django_session + auth_user (player JOIN bilan)
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_bump_version_reloads_snapshot(self):
+        url = reverse("typingapp:select_language")
+        self.client.get(url)
+        # .update() signal yubormaydi — snapshot eski nom bilan qoladi
+        Language.objects.filter(pk=self.language.pk).update(name="Qoraqalpoq")
+        self.assertNotContains(self.client.get(url), "Qoraqalpoq")
+
+        bump_version(REFDATA_SCOPE)
+        self.assertContains(self.client.get(url), "Qoraqalpoq")
+
+    def test_admin_save_bumps_on_commit(self):
+        url = reverse("typingapp:select_language")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Language.objects.create(name="Rus")
+        self.assertContains(self.client.get(url), "Rus")
+
+
+# =========================
+# request.player: user va player bitta so'rovda (user-009)
+# =========================
+class PlayerMiddlewareTests(TypingTestCase):
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"] or '"typingapp_player"' in q["sql"]]
+
+    def test_typing_page_costs_one_auth_query(self):
+        self.client.force_login(self.user)
+        url = reverse("typingapp:typing_practice", args=[self.language.id, self.level.id, self.duration.seconds])
+        Text.objects.create(language=self.language, level=self.level, content="bir ikki uch")
+        bump_version(TEXTS_SCOPE)
+        self.client.get(url)
+        queries = self.auth_queries(url)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN "typingapp_player"', queries[0])
+
+    def test_user_without_player_is_backfilled_once(self):
+        Player.objects.filter(user=self.user).delete()
+        self.client.force_login(self.user)
+        url = reverse("typingapp:select_language")
+        self.client.get(url)
+        self.assertTrue(Player.objects.filter(user=self.user).exists())
+        self.assertEqual(len(self.auth_queries(url)), 1)
+
+
+# =========================
+# Jonli reyting: SSE delta (user-017)
+# =========================
+def standing(user_id, score):
+    return {"id": user_id, "u": f"u{user_id}", "c": None, "wpm": score, "acc": "100.00", "score": score, "at": "-"}
+
+
+def apply_update(rows, changed, removed):
+    """Brauzerdagi algoritm: o'zgargan/chiqqanlarni olib tashlab, o'zgarganlarni rank bo'yicha qo'yish."""
+    drop = set(removed) | {row["id"] for row in changed}
+    result = [row for row in rows if row["id"] not in drop]
+    for row in sorted(changed, key=lambda r: r["rank"]):
+        result.insert(row["rank"] - 1, {k: v for k, v in row.items() if k != "rank"})
+    return result
+
+
+class LiveDiffTests(SimpleTestCase):
+    def test_only_changed_rows_are_sent_with_new_rank(self):
+        old = [standing(1, "90"), standing(2, "80"), standing(3, "70"), standing(4, "60")]
+        new = [standing(3, "95"), standing(1, "90"), standing(2, "80"), standing(5, "50")]
+        changed, removed = live._diff(old, new)
+        # 1 va 2 faqat surildi — yuborilmaydi; 3 yangilandi, 5 yangi, 4 chiqib ketdi
+        self.assertEqual([(row["id"], row["rank"]) for row in changed], [(3, 1), (5, 4)])
+        self.assertEqual(removed, [4])
+        self.assertEqual(apply_update(old, changed, removed), new)
+
+    def test_identical_rows_give_empty_delta(self):
+        rows = [standing(1, "90"), standing(2, "80")]
+        self.assertEqual(live._diff(rows, [dict(row) for row in rows]), ([], []))
+        self.assertEqual(live._diff([], []), ([], []))
+
+    def test_random_deltas_rebuild_new_ranking(self):
+        rng = random.Random(17)
+        for _ in range(200):
+            old = [standing(uid, str(rng.randint(10, 99))) for uid in rng.sample(range(1, 30), rng.randint(0, 12))]
+            old.sort(key=lambda row: -int(row["score"]))  # reyting doim tartiblangan (teng ballar o'z o'rnida)
+            new = [dict(row) for row in old if rng.random() > 0.2]
+            for row in new:
+                if rng.random() < 0.3:
+                    row.update(score=str(rng.randint(10, 99)))
+            new += [standing(uid, str(rng.randint(10, 99))) for uid in rng.sample(range(30, 40), rng.randint(0, 3))]
+            new.sort(key=lambda row: -int(row["score"]))
+            self.assertEqual(apply_update(old, *live._diff(old, new)), new)
+
+    def test_hub_publishes_update_event_after_version_change(self):
+        snapshots = [[standing(1, "90"), standing(2, "80")], [standing(2, "99"), standing(1, "90")]]
+        versions = iter([1, 2])
+
+        async def scenario():
+            hub = live.Hub(contest_id=1, loop=asyncio.get_running_loop())
+            queue = asyncio.Queue()
+            hub.subscribers.add(queue)
+            await hub._reload()  # birinchi o'qish — faqat snapshot
+            self.assertTrue(queue.empty())
+            self.assertTrue(hub.snapshot.startswith("event: snapshot\n"))
+            await hub._reload()
+            return queue.get_nowait()
+
+        with mock.patch.object(live, "get_version", lambda scope: next(versions)), \
+                mock.patch.object(live, "_load_standings", lambda contest_id: snapshots.pop(0)):
+            message = asyncio.run(scenario())
+        name, data = message.rstrip("\n").split("\n")
+        self.assertEqual(name, "event: update")
+        payload = json.loads(data.removeprefix("data: "))
+        self.assertEqual(payload, {"changed": [dict(standing(2, "99"), rank=1)], "removed": []})
@@ -0,0 +1,104 @@
+# typingapp/texts.py
+"""
+Matn tanlash: (language, level) → Text ID'lar indeksi.
+
+Indeks process xotirasida turadi va faqat ID'larni saqlaydi. Text saqlansa yoki
+o'chirilsa "texts" scope versiyasi oshadi — har bir worker indeksini qayta quradi.
+Tasodifiy matn tanlash indeksdan id oladi va uning borligini tekshiradi, xolos.
+
+Uzun matnlar (bob, kitob) sahifaga oynalar bilan beriladi: [start, start+count) so'zlar.
+Oyna bazada SUBSTR bilan kesiladi — avval offsets_blob'dan kerakli offsetlar, keyin
+normalized'dan shu oraliq — matnning o'zi Python'ga to'liq o'qilmaydi.
+"""
+import random
+import threading
+
+from django.db import models
+from django.db.models.functions import Substr
+
+from .cache import TEXTS_SCOPE, get_version
+from .models import Text, offsets_from_bytes
+
+WINDOW_WORDS = 200       # bitta oynadagi so'zlar (birinchisi sahifa bilan birga)
+MAX_WINDOW_WORDS = 1000
+
+_lock = threading.Lock()
+_index = {}
+_index_version = None
+
+
+def _build_index():
+    index = {}
+    for text_id, lang_id, level_id in Text.objects.order_by().values_list("id", "language_id", "level_id").iterator():
+        index.setdefault((lang_id, level_id), []).append(text_id)
+    return index
+
+
+def text_ids(language_id, level_id):
+    """Berilgan til/daraja uchun Text ID'lar ro'yxati (keshdan)."""
+    global _index, _index_version
+    version = get_version(TEXTS_SCOPE)
+    if version != _index_version:
+        with _lock:
+            if version != _index_version:
+                _index = _build_index()
+                _index_version = version
+    return _index.get((language_id, level_id), [])
+
+
+def pick_text_id(language_id, level_id):
+    """Tasodifiy mavjud Text ID yoki None. Matnning o'zi o'qilmaydi — faqat id tekshiriladi."""
+    ids = text_ids(language_id, level_id)
+    if not ids:
+        return None
+    # Indeks eskirgan bo'lishi mumkin: matn boshqa workerda o'chirilgan, versiya bump'i commit'ni kutmoqda
+    for text_id in random.sample(ids, min(len(ids), 3)):
+        if Text.objects.filter(id=text_id).exists():
+            return text_id
+    return Text.objects.filter(language_id=language_id, level_id=level_id).values_list("id", flat=True).first()
+
+
+# =========================
+# So'z oynalari
+# =========================
+def _window(text_id, start, count, part, word_count):
+    end = min(start + count, word_count)
+    return {
+        "id": text_id,
+        "start": start,
+        "count": max(end - start, 0),
+        "text": part,
+        "words": word_count,
+        "next": end if end < word_count else None,
+    }
+
+
+def word_window(text_id, start=0, count=WINDOW_WORDS):
+    """[start, start+count) so'zlar oynasi (dict) yoki None (matn yo'q)."""
+    row = (Text.objects.filter(id=text_id)
+           .annotate(offs=Substr("offsets_blob", 4 * start + 1, 4 * (count + 1), output_field=models.BinaryField()))
+           .values_list("word_count", "char_count", "offs")
+           .first())
+    if row is None:
+        return None
+    word_count, char_count, raw = row
+    offsets = offsets_from_bytes(raw)
+    if not offsets:
+        return _window(text_id, start, count, "", word_count)
+
+    char_start = offsets[0]
+    char_end = offsets[count] - 1 if len(offsets) > count else char_count
+    part = (Text.objects.filter(id=text_id)
+            .annotate(part=Substr("normalized", char_start + 1, char_end - char_start))
+            .values_list("part", flat=True)
+            .first())
+    if part is None:
+        return None
+    return _window(text_id, start, count, part, word_count)
+
+
+def first_window(text_id, normalized, count=WINDOW_WORDS):
+    """Xotiradagi normalized matndan birinchi oyna (word_window bilan bir xil shakl)."""
+    words = normalized.split(" ", count) if normalized else []
+    word_count = normalized.count(" ") + 1 if normalized else 0
+    return _window(text_id, 0, count, " ".join(words[:count]), word_count)
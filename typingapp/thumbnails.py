@@ -0,0 +1,130 @@
+# typingapp/thumbnails.py
+"""
+Chek preview'lari (kichik JPEG): rasm — kichraytirilgan nusxa, PDF — birinchi sahifa.
+
+Yangi ReceiptBlob commit bo'lgach, ish fon oqimiga navbatga qo'yiladi — so'rov
+kutmaydi. Preview blob'ga bog'langan (receipts/thumbs/<ab>/<digest>.jpg), shuning
+uchun bir xil cheklar uchun bir marta yasaladi.
+
+Bog'liqliklar ixtiyoriy: rasm uchun Pillow, PDF uchun poppler'ning `pdftoppm` buyrug'i.
+Yo'q bo'lsa preview yasalmaydi va admin asl faylga havola ko'rsatadi.
+Navbat process xotirasida — yo'qolgan ishlar `manage.py build_thumbnails` bilan to'ldiriladi.
+"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import ReceiptBlob
+from .storage import get_receipt_storage
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow o'rnatilmagan — rasm preview'lari yo'q
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMB_PREFIX = "receipts/thumbs"
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+def _conf(name, default):
+    return getattr(settings, "RECEIPT_UPLOAD", {}).get(name, default)
+
+
+def thumb_name(digest):
+    return f"{THUMB_PREFIX}/{digest[:2]}/{digest}.jpg"
+
+
+def _render_image(path, size):
+    if Image is None:
+        return None
+    with Image.open(path) as img:
+        img.thumbnail((size, size))
+        out = io.BytesIO()
+        img.convert("RGB").save(out, "JPEG", quality=70, optimize=True)
+        return out.getvalue()
+
+
+def _render_pdf(path, size):
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "page")
+        subprocess.run(
+            [pdftoppm, "-f", "1", "-l", "1", "-singlefile", "-jpeg", "-scale-to", str(size), path, out],
+            check=True, timeout=30, capture_output=True,
+        )
+        with open(out + ".jpg", "rb") as fh:
+            return fh.read()
+
+
+def build(blob_id):
+    """Bitta blob uchun preview yasaydi. Natija: preview nomi yoki None."""
+    blob = ReceiptBlob.objects.filter(pk=blob_id).first()
+    if blob is None or blob.thumbnail:
+        return blob.thumbnail if blob else None
+
+    storage = get_receipt_storage()
+    size = _conf("THUMB_SIZE", 320)
+    ext = os.path.splitext(blob.name)[1].lower()
+    try:
+        if ext in IMAGE_EXTS:
+            data = _render_image(storage.path(blob.name), size)
+        elif ext == ".pdf":
+            data = _render_pdf(storage.path(blob.name), size)
+        else:
+            data = None
+    except Exception:
+        logger.exception("thumbnails: %s uchun preview yasab bo'lmadi", blob.name)
+        return None
+    if data is None:
+        return None
+
+    name = storage.save_derived(thumb_name(blob.sha256), data)
+    ReceiptBlob.objects.filter(pk=blob.pk).update(thumbnail=name)
+    return name
+
+
+# =========================
+# Fon navbati (process bo'yicha)
+# =========================
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="receipt-thumbs")
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def _run(blob_id):
+    close_old_connections()
+    try:
+        build(blob_id)
+    except Exception:
+        logger.exception("thumbnails: blob #%s", blob_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(blob_id):
+    """Commit'dan keyin preview yasashni navbatga qo'yadi (ASYNC=False bo'lsa — darhol)."""
+    if _conf("ASYNC_THUMBNAILS", True):
+        transaction.on_commit(lambda: _get_executor().submit(_run, blob_id))
+    else:
+        transaction.on_commit(lambda: build(blob_id))
@@ -0,0 +1,149 @@
+# typingapp/uploads.py
+"""
+Chek yuklash: multipart oqimini to'g'ridan-to'g'ri receipts storage'ga yozadigan upload handler.
+
+  * fayl Django xotirasida/umumiy temp'da to'planmaydi — chunk'lar darhol
+    MEDIA_ROOT/receipts/tmp dagi faylga yoziladi va shu paytda sha256 hisoblanadi;
+  * hajm limiti oqim davomida tekshiriladi (Content-Length'ga ishonilmaydi);
+  * tur fayl nomidan emas, birinchi baytlardan (magic bytes) aniqlanadi.
+
+Storage (typingapp.storage) tayyor digest'ni ko'rib, faylni qayta o'qimasdan joyiga ko'chiradi.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.temp import NamedTemporaryFile
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+
+from .storage import TMP_DIR, get_receipt_storage
+
+RECEIPT_FIELD = "receipt"
+
+# (boshlanish baytlari, content_type, kengaytma)
+RECEIPT_TYPES = (
+    (b"%PDF-", "application/pdf", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+)
+_SNIFF_BYTES = 8
+
+
+def _conf(name, default):
+    return getattr(settings, "RECEIPT_UPLOAD", {}).get(name, default)
+
+
+def max_upload_size():
+    return _conf("MAX_SIZE", 5 * 1024 * 1024)
+
+
+def sniff_type(head):
+    """Birinchi baytlar bo'yicha (content_type, ext) yoki None."""
+    for magic, content_type, ext in RECEIPT_TYPES:
+        if head.startswith(magic):
+            return content_type, ext
+    return None
+
+
+class ReceiptUpload(UploadedFile):
+    """Storage'ning tmp papkasida turgan, sha256 i hisoblangan yuklama."""
+
+    def __init__(self, file, name, content_type, size, sha256):
+        super().__init__(file, name, content_type, size)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # Storage faylni joyiga ko'chirgan — o'chiradigan narsa yo'q
+            pass
+
+
+class ReceiptUploadHandler(FileUploadHandler):
+    """
+    Faqat "receipt" maydoni uchun ishlaydi, qolganlari keyingi handlerlarga o'tadi.
+    Xato bo'lsa fayl tashlab yuboriladi (request.FILES da bo'lmaydi), sababi self.error da.
+    """
+
+    # MultiPartParser handler.file'ni o'zi yopadi — shuning uchun boshqa nom: self.tmp
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = max_upload_size()
+        self.error = None
+        self.active = False
+        self.tmp = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Butun so'rov limitdan ancha katta bo'lsa, oqimni o'qishga ham arzimaydi
+        self.request_too_large = content_length > self.max_size + 64 * 1024
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.active = field_name == RECEIPT_FIELD
+        if not self.active:
+            return
+        if getattr(self, "request_too_large", False) or (content_length and content_length > self.max_size):
+            self._reject(self._too_large())
+        tmp_dir = get_receipt_storage().path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        self.tmp = NamedTemporaryFile(suffix=".upload", dir=tmp_dir)
+        self.sha = hashlib.sha256()
+        self.head = b""
+        self.detected = None
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if start + len(raw_data) > self.max_size:
+            self._reject(self._too_large())
+        if self.detected is None:
+            self.head += raw_data[:_SNIFF_BYTES]
+            if len(self.head) >= _SNIFF_BYTES:
+                self._detect()
+        self.sha.update(raw_data)
+        self.tmp.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        if self.detected is None:
+            try:
+                self._detect()
+            except SkipFile:
+                return None
+        content_type, ext = self.detected
+        self.tmp.flush()
+        self.tmp.seek(0)
+        upload = ReceiptUpload(self.tmp, RECEIPT_FIELD + ext, content_type, file_size, self.sha.hexdigest())
+        self.tmp = None  # endi ReceiptUpload'niki
+        return upload
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _detect(self):
+        self.detected = sniff_type(self.head)
+        if self.detected is None:
+            self._reject("Faqat JPG, PNG yoki PDF fayl yuklash mumkin.")
+
+    def _too_large(self):
+        return f"Fayl hajmi {self.max_size // (1024 * 1024)} MB dan oshmasligi kerak."
+
+    def _reject(self, message):
+        self.error = message
+        self.active = False
+        self._discard()
+        raise SkipFile()
+
+    def _discard(self):
+        if self.tmp is not None:
+            self.tmp.close()
+            self.tmp = None
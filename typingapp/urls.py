@@ -23,6 +23,10 @@ urlpatterns = [
     path('select-time/<int:lang_id>/<int:level_id>/', views.select_time, name='select_time'),
     path('typing/<int:lang_id>/<int:level_id>/<int:duration>/', views.typing_practice, name='typing_practice'),
     path('result/', views.result_view, name='result'),
+    path('progress/', views.progress_view, name='progress'),
+    path('texts/random/<int:lang_id>/<int:level_id>/', views.text_random, name='text_random'),
+    path('texts/<int:text_id>/', views.text_payload, name='text_payload'),
+    path('texts/<int:text_id>/words/', views.text_words, name='text_words'),
 
     # Root
     path('', views.center_list, name='home'),
@@ -32,4 +36,7 @@ urlpatterns = [
     path("contests/<int:contest_id>/start/", views.contest_start, name="contest_start"),
     path("contests/<int:contest_id>/result/", views.contest_result, name="contest_result"),
     path("contests/<int:contest_id>/leaderboard/", views.contest_leaderboard, name="contest_leaderboard"),
+    path("contests/<int:contest_id>/live/", views.contest_live, name="contest_live"),
+    path("receipts/<int:entry_id>/", views.receipt_file, name="receipt_file"),
+    path("receipts/<int:entry_id>/preview/", views.receipt_preview, name="receipt_preview"),
 ]
@@ -1,18 +1,31 @@
 # typingapp/views.py
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
 from decimal import Decimal, ROUND_HALF_UP
-import random
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import F, OuterRef, Subquery
-from django.http import HttpResponseBadRequest
+from django.db.models import F
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import get_template
 from django.urls import NoReverseMatch
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_POST
 from django.http import HttpResponse
 
+from . import ingest, live
+from .cache import LEADERBOARD_TIMEOUT, REFDATA_SCOPE, TEXTS_SCOPE, contest_scope, get_version, leaderboard_scope
+from .db import read_only_db
 from .models import (
     
     Center,
@@ -22,10 +35,24 @@ from .models import (
     Text,
     Player,
     PracticeRun,
+    PracticeBest,
+    PracticeDaily,
     Contest,
     ContestEntry,
     ContestRun,
+    ContestStanding,
+    ContestFinalStanding,
+    hist_merge,
+    hist_percentile,
 )
+from .metrics import render_prometheus
+from .pagination import KeysetPage
+from .refdata import get_or_404, get_refdata
+from .sendfile import serve_private_file
+from .startpack import get_packet
+from .storage import get_receipt_storage
+from .texts import MAX_WINDOW_WORDS, WINDOW_WORDS, pick_text_id, text_ids, word_window
+from .uploads import ReceiptUploadHandler, max_upload_size
 
 # --- Session keys ---
 SESSION_PLAYER_KEY = "player_id"
@@ -35,21 +62,15 @@ SESSION_CENTER_KEY = "center_id"
 # =========================
 # Helpers
 # =========================
-def _get_player(request):
-    """Session orqali Player obyektini qaytaradi (yo‘q bo‘lsa None)."""
-    pid = request.session.get(SESSION_PLAYER_KEY)
-    if not pid:
-        return None
-    try:
-        return Player.objects.get(id=pid)
-    except Player.DoesNotExist:
-        return None
-
-
 def _ensure_player_for_user(user):
     """User mavjud bo‘lsa, unga bog‘langan Player bo‘lmasa yaratib beradi."""
     if not user:
         return None
+    try:
+        # signal yaratgan yoki select_related bilan kelgan bo'lsa — so'rovsiz
+        return user.player
+    except Player.DoesNotExist:
+        pass
     player, _ = Player.objects.get_or_create(
         user=user,
         defaults={"name": user.get_full_name() or user.username},
@@ -57,6 +78,12 @@ def _ensure_player_for_user(user):
     return player
 
 
+def _session_center(request):
+    """Sessiondagi markaz (refdata snapshotidan) yoki None."""
+    cid = request.session.get(SESSION_CENTER_KEY)
+    return get_refdata().center(cid) if cid else None
+
+
 def _quantize_2(x):
     """Ikki kasrga yaxlitlash (HALF_UP)."""
     return Decimal(str(x)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
@@ -92,14 +119,14 @@ def register_view(request):
         # create user
         user = User.objects.create_user(username=username, password=p1, first_name=first, last_name=last)
 
-        # create/bind player (display name = full name)
+        # player'ni _auto_create_player signali yaratgan — faqat ko'rinadigan ismni yangilaymiz
         full_name = " ".join([x for x in [first, patronymic, last] if x]).strip()
-        player, _ = Player.objects.get_or_create(user=user, defaults={"name": full_name or username})
+        player = _ensure_player_for_user(user)
         if player.name != (full_name or username):
             player.name = full_name or username
             player.save(update_fields=["name"])
 
-        login(request, user)
+        login(request, user, backend="typingapp.backends.PlayerModelBackend")
         request.session[SESSION_PLAYER_KEY] = player.id
         messages.success(request, "Ro‘yxatdan o‘tish muvaffaqiyatli. Xush kelibsiz!")
         return redirect("typingapp:center_list")
@@ -144,14 +171,15 @@ def logout_view(request):
 # Centers
 # =========================
 @login_required
+@read_only_db
 def center_list(request):
-    centers = Center.objects.all().order_by("name")
+    centers = get_refdata().centers
     return render(request, "centers/list.html", {"centers": centers})
 
 
 @login_required
 def center_pick(request, center_id):
-    center = get_object_or_404(Center, id=center_id)
+    center = get_or_404(get_refdata().center(center_id))
     request.session[SESSION_CENTER_KEY] = center.id
     # namespace bilan
     try:
@@ -164,35 +192,40 @@ def center_pick(request, center_id):
 # Typing flow
 # =========================
 @login_required
+@read_only_db
 def select_language(request):
-    player = _get_player(request) or _ensure_player_for_user(request.user)
+    player = request.player  # typingapp.middleware.PlayerMiddleware
     if not player:
         return redirect("typingapp:login")
 
-    languages = Language.objects.all().order_by("name")
+    languages = get_refdata().languages
     return render(request, "select_language.html", {"languages": languages, "player": player})
 
 
 @login_required
+@read_only_db
 def select_level(request, lang_id):
-    player = _get_player(request) or _ensure_player_for_user(request.user)
+    player = request.player  # typingapp.middleware.PlayerMiddleware
     if not player:
         return redirect("typingapp:login")
 
-    language = get_object_or_404(Language, id=lang_id)
-    levels = Level.objects.all().order_by("name")
+    ref = get_refdata()
+    language = get_or_404(ref.language(lang_id))
+    levels = ref.levels
     return render(request, "select_level.html", {"language": language, "levels": levels, "player": player})
 
 
 @login_required
+@read_only_db
 def select_time(request, lang_id, level_id):
-    player = _get_player(request) or _ensure_player_for_user(request.user)
+    player = request.player  # typingapp.middleware.PlayerMiddleware
     if not player:
         return redirect("typingapp:login")
 
-    language = get_object_or_404(Language, id=lang_id)
-    level = get_object_or_404(Level, id=level_id)
-    durations = list(Duration.objects.order_by("seconds").values_list("seconds", flat=True))
+    ref = get_refdata()
+    language = get_or_404(ref.language(lang_id))
+    level = get_or_404(ref.level(level_id))
+    durations = [d.seconds for d in ref.durations]
 
     return render(
         request,
@@ -201,25 +234,110 @@ def select_time(request, lang_id, level_id):
     )
 
 
+# Shell (typing.html) ETag'i shablon matniga ham bog'liq — deploy'dan keyin eski shell 304 bilan qolmasin
+_SHELL_TEMPLATES = ("base.html", "typing.html")
+_shell_salt = None
+
+TEXT_PAYLOAD_MAX_AGE = 600  # sekund; keyin ETag bilan tekshiriladi
+
+
+def _typing_shell_salt():
+    global _shell_salt
+    if _shell_salt is None or settings.DEBUG:
+        sha = hashlib.sha256()
+        for name in _SHELL_TEMPLATES:
+            with open(get_template(name).origin.name, "rb") as fh:
+                sha.update(fh.read())
+        _shell_salt = sha.hexdigest()[:16]
+    return _shell_salt
+
+
 @login_required
 def typing_practice(request, lang_id, level_id, duration):
-    player = _get_player(request) or _ensure_player_for_user(request.user)
+    player = request.player  # typingapp.middleware.PlayerMiddleware
     if not player:
         return redirect("typingapp:login")
 
-    language = get_object_or_404(Language, id=lang_id)
-    level = get_object_or_404(Level, id=level_id)
+    ref = get_refdata()
+    language = get_or_404(ref.language(lang_id))
+    level = get_or_404(ref.level(level_id))
 
-    texts = list(Text.objects.filter(language=language, level=level))
-    if not texts:
+    # Shell'da matn ham, ID'lar ro'yxati ham yo'q — hajmi korpusga bog'liq emas.
+    # Matnni brauzer text_random orqali oladi (tanlov serverda, xotiradagi indeksdan)
+    if not text_ids(language.id, level.id):
         return render(request, "no_text.html", {"language": language, "level": level})
 
-    chosen = random.choice(texts)
-    return render(
+    key = ":".join(str(x) for x in (
+        _typing_shell_salt(), request.user.pk, player.pk, language.id, level.id, int(duration),
+        get_version(TEXTS_SCOPE), get_version(REFDATA_SCOPE),
+    ))
+    etag = quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+    # Ko'rsatilmagan flash xabar bo'lsa — 304 emas, to'liq sahifa
+    if not len(messages.get_messages(request)):
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            not_modified["Cache-Control"] = "private, no-cache"
+            return not_modified
+
+    response = render(
         request,
         "typing.html",
-        {"player": player, "language": language, "level": level, "duration": int(duration), "text": chosen.content},
+        {"player": player, "language": language, "level": level, "duration": int(duration),
+         "window_words": WINDOW_WORDS},
     )
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _text_window_response(request, text_id, start, count):
+    """So'zlar oynasi (JSON). Kuchli ETag — content_hash + oyna; 304 da matn o'qilmaydi."""
+    content_hash = Text.objects.filter(id=text_id).values_list("content_hash", flat=True).first()
+    if content_hash is None:
+        raise Http404("Matn topilmadi.")
+    etag = quote_etag(f"{content_hash}-{start}-{count}")
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        window = word_window(text_id, start, count)
+        if window is None:
+            raise Http404("Matn topilmadi.")
+        response = JsonResponse(window)
+    response["ETag"] = etag
+    response["Cache-Control"] = f"private, max-age={TEXT_PAYLOAD_MAX_AGE}"
+    return response
+
+
+@login_required
+@read_only_db
+def text_random(request, lang_id, level_id):
+    """Tasodifiy matnning text_payload manziliga redirect: tanlov keshlanmaydi, payload esa ETag bilan keshlanadi."""
+    text_id = pick_text_id(lang_id, level_id)
+    if text_id is None:
+        raise Http404("Matn topilmadi.")
+    response = redirect("typingapp:text_payload", text_id=text_id)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@login_required
+@read_only_db
+def text_payload(request, text_id):
+    """Matnning birinchi oynasi (normalized); qolgani text_words orqali, kursor oldidan."""
+    return _text_window_response(request, text_id, 0, WINDOW_WORDS)
+
+
+@login_required
+@read_only_db
+def text_words(request, text_id):
+    """?start=N&count=M — [N, N+M) so'zlar (M <= MAX_WINDOW_WORDS)."""
+    try:
+        start = max(int(request.GET.get("start", 0)), 0)
+        count = min(max(int(request.GET.get("count", WINDOW_WORDS)), 1), MAX_WINDOW_WORDS)
+    except ValueError:
+        return HttpResponseBadRequest("start/count butun son bo'lishi kerak")
+    return _text_window_response(request, text_id, start, count)
 
 
 # =========================
@@ -228,7 +346,7 @@ def typing_practice(request, lang_id, level_id, duration):
 @require_POST
 @login_required
 def result_view(request):
-    player = _get_player(request) or _ensure_player_for_user(request.user)
+    player = request.player  # typingapp.middleware.PlayerMiddleware
     if not player:
         return HttpResponseBadRequest("Player session not found")
 
@@ -237,9 +355,10 @@ def result_view(request):
     level_id = request.POST.get("level_id")
     dur_seconds = request.POST.get("duration")
 
-    language = Language.objects.filter(id=lang_id).first()
-    level = Level.objects.filter(id=level_id).first()
-    duration = Duration.objects.filter(seconds=dur_seconds).first()
+    ref = get_refdata()
+    language = ref.language(lang_id)
+    level = ref.level(level_id)
+    duration = ref.duration_by_seconds(dur_seconds)
 
     def D(s, default="0"):
         try:
@@ -267,12 +386,10 @@ def result_view(request):
         final_d = _quantize_2(wpm_d * acc_d / Decimal("100"))
 
     # Sessiondan markaz
-    center = None
-    cid = request.session.get(SESSION_CENTER_KEY)
-    if cid:
-        center = Center.objects.filter(id=cid).first()
+    center = _session_center(request)
 
-    PracticeRun.objects.create(
+    # Natija navbatga — bazaga partiya bilan yoziladi (typingapp.ingest)
+    ingest.submit_practice(
         player=player,
         center=center,
         language=language,
@@ -298,41 +415,198 @@ def result_view(request):
     )
 
 
+# =========================
+# Shaxsiy progress (PracticeDaily kunlik yig'indilari)
+# =========================
+PROGRESS_PERIODS = (30, 90, 365)  # kun
+CHART_WIDTH, CHART_HEIGHT = 720, 180
+
+
+def _progress_series(rows):
+    """Kesimlar (language, duration) bo'yicha qatorlarni kunlarga birlashtiradi; p90 gistogrammalardan."""
+    days = {}
+    for row in rows:
+        day = days.get(row.day)
+        if day is None:
+            day = days[row.day] = {
+                "day": row.day, "runs": 0, "wpm_total": Decimal("0"), "acc_total": Decimal("0"),
+                "wpm_best": row.wpm_best, "acc_best": row.acc_best, "wpm_hist": {}, "acc_hist": {},
+            }
+        day["runs"] += row.runs_count
+        day["wpm_total"] += row.wpm_total
+        day["acc_total"] += row.acc_total
+        day["wpm_best"] = max(day["wpm_best"], row.wpm_best)
+        day["acc_best"] = max(day["acc_best"], row.acc_best)
+        hist_merge(day["wpm_hist"], row.wpm_hist)
+        hist_merge(day["acc_hist"], row.acc_hist)
+
+    series = []
+    for day in sorted(days.values(), key=lambda d: d["day"]):
+        series.append({
+            "day": day["day"],
+            "runs": day["runs"],
+            "wpm_best": day["wpm_best"],
+            "wpm_mean": _quantize_2(day["wpm_total"] / day["runs"]),
+            "wpm_p90": hist_percentile(day["wpm_hist"], 90),
+            "acc_best": day["acc_best"],
+            "acc_mean": _quantize_2(day["acc_total"] / day["runs"]),
+            "acc_p90": hist_percentile(day["acc_hist"], 90),
+            "wpm_hist": day["wpm_hist"],
+            "acc_hist": day["acc_hist"],
+        })
+    return series
+
+
+def _progress_chart(series, since, period, lines, top=None):
+    """SVG polyline nuqtalari: x — sana (davr bo'yicha), y — qiymat (0..top)."""
+    if top is None:
+        top = max([float(point[key]) for point in series for key, _, _ in lines] + [10.0])
+        top = (int(top) // 10 + 1) * 10
+    step = CHART_WIDTH / max(period - 1, 1)
+    result = []
+    for key, label, color in lines:
+        dots = [
+            (f"{(point['day'] - since).days * step:.1f}", f"{CHART_HEIGHT - float(point[key]) / top * CHART_HEIGHT:.1f}")
+            for point in series
+        ]
+        points = " ".join(f"{x},{y}" for x, y in dots)
+        result.append({"label": label, "color": color, "points": points, "dots": dots})
+    return {"lines": result, "top": top, "width": CHART_WIDTH, "height": CHART_HEIGHT}
+
+
+@login_required
+@read_only_db
+def progress_view(request):
+    """Kunlik WPM/accuracy grafiklari: ?days=30|90|365, ?lang=ID, ?duration=soniya."""
+    player = request.player  # typingapp.middleware.PlayerMiddleware
+    ref = get_refdata()
+
+    period = request.GET.get("days", "")
+    period = int(period) if period.isdigit() and int(period) in PROGRESS_PERIODS else 90
+    language = ref.language(request.GET.get("lang"))
+    duration = ref.duration_by_seconds(request.GET.get("duration"))
+
+    since = timezone.localdate() - timedelta(days=period - 1)
+    rows = PracticeDaily.objects.filter(player=player, day__gte=since).only(
+        "day", "runs_count", "wpm_best", "wpm_total", "acc_best", "acc_total", "wpm_hist", "acc_hist",
+    )
+    if language:
+        rows = rows.filter(language=language)
+    if duration:
+        rows = rows.filter(duration=duration)
+    series = _progress_series(rows)
+
+    summary = None
+    if series:
+        wpm_hist, acc_hist = {}, {}
+        for point in series:
+            hist_merge(wpm_hist, point["wpm_hist"])
+            hist_merge(acc_hist, point["acc_hist"])
+        summary = {
+            "runs": sum(point["runs"] for point in series),
+            "days": len(series),
+            "wpm_best": max(point["wpm_best"] for point in series),
+            "wpm_p90": hist_percentile(wpm_hist, 90),
+            "acc_p90": hist_percentile(acc_hist, 90),
+        }
+
+    return render(
+        request,
+        "progress.html",
+        {
+            "player": player,
+            "series": series,
+            "summary": summary,
+            "since": since,
+            "period": period,
+            "periods": PROGRESS_PERIODS,
+            "languages": ref.languages,
+            "durations": ref.durations,
+            "current_language": language,
+            "current_duration": duration,
+            "charts": [
+                ("WPM", _progress_chart(series, since, period, (
+                    ("wpm_best", "Eng yaxshi", "#198754"),
+                    ("wpm_p90", "p90", "#0d6efd"),
+                    ("wpm_mean", "O'rtacha", "#6c757d"),
+                ))),
+                ("Accuracy, %", _progress_chart(series, since, period, (
+                    ("acc_p90", "p90", "#0d6efd"),
+                    ("acc_mean", "O'rtacha", "#6c757d"),
+                ), top=100)),
+            ],
+        },
+    )
+
+
 # =========================
 # Global leaderboard (+ filter)
 # =========================
-def leaderboard(request):
-    """Global reyting + ixtiyoriy ?center=ID filtri."""
-    center_id = request.GET.get("center")
-    qs = PracticeRun.objects.select_related("player__user", "center", "language", "level", "duration")
+def _leaderboard_page(request, qs, scope):
+    """Reyting sahifasi (keyset pagination, ?cursor=...). Querysetlar lazy qoladi."""
+    qs = qs.select_related("player__user", "center", "language", "level", "duration")
+    return KeysetPage(qs.annotate(username=F("player__user__username")), request.GET.get("cursor"), scope=scope)
 
-    if center_id and center_id.isdigit():
-        qs = qs.filter(center_id=center_id)
 
-    runs = qs.annotate(username=F("player__user__username")).order_by("-final_score", "-created_at")[:200]
+def _first_page_redirect(request):
+    """Yaroqsiz cursor — fragment keshlanmaydi, birinchi sahifaga qaytariladi."""
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    return redirect(f"{request.path}?{query.urlencode()}" if query else request.path)
 
-    centers = Center.objects.all().order_by("name")
+
+@read_only_db
+def leaderboard(request):
+    """Global reyting + ixtiyoriy ?center=ID filtri."""
+    ref = get_refdata()
+    # Faqat mavjud markaz — ?center=<ixtiyoriy qiymat> kesh kalitiga tushib, yangi fragment yaratmasin
+    center = ref.center(request.GET.get("center"))
+    # Har player/kesim uchun faqat eng yaxshi natija (PracticeBest)
+    qs = PracticeBest.objects.all()
+
+    if center:
+        qs = qs.filter(center=center)
+
+    # Querysetlar lazy: kesh fragmenti topilsa, ular umuman bajarilmaydi
+    scope = leaderboard_scope(center.id if center else None)
+    page = _leaderboard_page(request, qs, scope)
+    if page.invalid:
+        return _first_page_redirect(request)
     return render(
         request,
         "leaderboard.html",
-        {"runs": runs, "centers": centers, "current_center": center_id or ""},
+        {
+            "runs": page,
+            "page": page,
+            "centers": ref.centers,
+            "current_center": str(center.id) if center else "",
+            "cache_version": get_version(scope),
+            "cache_timeout": LEADERBOARD_TIMEOUT,
+        },
     )
 
 
+@read_only_db
 def leaderboard_center(request, center_id):
     """Markaz bo‘yicha reyting (alohida URL)."""
-    center = get_object_or_404(Center, id=center_id)
-    qs = (
-        PracticeRun.objects.select_related("player__user", "center", "language", "level", "duration")
-        .filter(center=center)
-    )
-    runs = qs.annotate(username=F("player__user__username")).order_by("-final_score", "-created_at")[:200]
+    center = get_or_404(get_refdata().center(center_id))
+    scope = leaderboard_scope(center.id)
+    page = _leaderboard_page(request, PracticeBest.objects.filter(center=center), scope)
+    if page.invalid:
+        return _first_page_redirect(request)
 
-    centers = Center.objects.all().order_by("name")
+    centers = get_refdata().centers
     return render(
         request,
         "leaderboard.html",
-        {"runs": runs, "centers": centers, "current_center": str(center.id)},
+        {
+            "runs": page,
+            "page": page,
+            "centers": centers,
+            "current_center": str(center.id),
+            "cache_version": get_version(scope),
+            "cache_timeout": LEADERBOARD_TIMEOUT,
+        },
     )
 
 
@@ -340,6 +614,7 @@ def leaderboard_center(request, center_id):
 # PREMIUM CONTEST
 # =========================
 @login_required
+@read_only_db
 def contests_list(request):
     now = timezone.now()
     contests = Contest.objects.all().order_by("-created_at")
@@ -370,7 +645,16 @@ def contest_detail(request, contest_id):
 
 
 @login_required
+@csrf_exempt
 def contest_join(request, contest_id):
+    # Chek oqim bo'yicha receipts storage'ga yoziladi (typingapp.uploads).
+    # Handler request.POST o'qilishidan oldin qo'yilishi kerak — shuning uchun CSRF ichkarida tekshiriladi.
+    request.upload_handlers.insert(0, ReceiptUploadHandler(request))
+    return _contest_join(request, contest_id)
+
+
+@csrf_protect
+def _contest_join(request, contest_id):
     contest = get_object_or_404(Contest, id=contest_id)
     if not contest.is_open_for_upload():
         messages.error(request, "Bu musobaqada hozir ro'yxatdan o'tib bo'lmaydi.")
@@ -381,15 +665,17 @@ def contest_join(request, contest_id):
         messages.info(request, "Arizangiz mavjud.")
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
+    max_size_mb = max_upload_size() // (1024 * 1024)
     if request.method == "POST":
+        receipt = request.FILES.get("receipt")
         telegram = (request.POST.get("telegram") or "").strip()
         phone = (request.POST.get("phone") or "").strip()
-        receipt = request.FILES.get("receipt")
         if not receipt:
+            handler = request.upload_handlers[0]
             return render(
                 request,
                 "contest/contest_join.html",
-                {"contest": contest, "error": "Chek faylini yuklang."},
+                {"contest": contest, "error": handler.error or "Chek faylini yuklang.", "max_size_mb": max_size_mb},
             )
 
         ContestEntry.objects.create(
@@ -403,16 +689,19 @@ def contest_join(request, contest_id):
         messages.success(request, "Chek yuborildi. Tekshirilishini kuting.")
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
-    return render(request, "contest/contest_join.html", {"contest": contest})
+    return render(request, "contest/contest_join.html", {"contest": contest, "max_size_mb": max_size_mb})
 
 
 @login_required
 def contest_start(request, contest_id):
-    contest = get_object_or_404(Contest, id=contest_id)
-    entry = _contest_user_entry(request.user, contest)
+    # Start paytida hamma bir vaqtda keladi — ariza, urinishlar va matn paketdan (xotiradan)
+    packet = get_packet(contest_id)
+    if packet is None:
+        raise Http404("Musobaqa topilmadi.")
+    contest = packet.contest
     now = timezone.now()
 
-    if not entry or entry.status != ContestEntry.APPROVED:
+    if not packet.is_approved(request.user.id):
         messages.error(request, "Typingga ruxsat yo'q. Avval to'lovingiz tasdiqlansin.")
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
@@ -421,23 +710,20 @@ def contest_start(request, contest_id):
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
     # Attempts limit (0 = cheksiz)
-    if contest.attempts_per_user and ContestRun.objects.filter(
-        contest=contest, user=request.user
-    ).count() >= contest.attempts_per_user:
+    if contest.attempts_per_user and packet.attempts_used(request.user.id) >= contest.attempts_per_user:
         messages.error(request, "Urinishlar limiti tugagan.")
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
-    texts = list(Text.objects.filter(language=contest.language, level=contest.level))
-    if not texts:
-        return render(request, "no_text.html", {"language": contest.language, "level": contest.level})
-
-    chosen = random.choice(texts)
-    duration = contest.duration.seconds
+    window = packet.pick_text()
+    if window is None:
+        ref = get_refdata()
+        return render(request, "no_text.html", {"language": ref.language(contest.language_id), "level": ref.level(contest.level_id)})
 
     return render(
         request,
         "contest/contest_typing.html",
-        {"contest": contest, "duration": duration, "text": chosen.content},
+        {"contest": contest, "duration": packet.duration, "text_id": window["id"], "text_window": window,
+         "window_words": WINDOW_WORDS},
     )
 
 
@@ -456,6 +742,12 @@ def contest_result(request, contest_id):
         messages.error(request, "Yaroqsiz holat.")
         return redirect("typingapp:contest_detail", contest_id=contest.id)
 
+    # Limit natija qabul qilinayotganda ham tekshiriladi — contest_start'dan keyin parallel oynalar orqali oshib ketmasin
+    packet = get_packet(contest.id)
+    if contest.attempts_per_user and packet and packet.attempts_used(request.user.id) >= contest.attempts_per_user:
+        messages.error(request, "Urinishlar limiti tugagan.")
+        return redirect("typingapp:contest_detail", contest_id=contest.id)
+
     def D(x):
         try:
             return Decimal(str(x))
@@ -474,12 +766,10 @@ def contest_result(request, contest_id):
 
     suspicious = (wpm > Decimal("200")) or (acc < Decimal("40"))
 
-    center = None
-    cid = request.session.get(SESSION_CENTER_KEY)
-    if cid:
-        center = Center.objects.filter(id=cid).first()
+    center = _session_center(request)
 
-    ContestRun.objects.create(
+    # Natija navbatga — bazaga partiya bilan yoziladi (typingapp.ingest)
+    ingest.submit_contest(
         contest=contest,
         user=request.user,
         center=center,
@@ -496,57 +786,139 @@ def contest_result(request, contest_id):
     )
 
 
+# =========================
+# Cheklar (yopiq fayllar): faqat ariza egasi yoki staff
+# =========================
+def _receipt_entry_or_404(request, entry_id):
+    entry = get_object_or_404(ContestEntry.objects.select_related("receipt_blob"), id=entry_id)
+    if entry.user_id != request.user.id and not request.user.is_staff:
+        raise Http404
+    return entry
+
+
+@login_required
+@read_only_db
+def receipt_file(request, entry_id):
+    entry = _receipt_entry_or_404(request, entry_id)
+    storage = get_receipt_storage()
+    if not entry.receipt or not storage.exists(entry.receipt.name):
+        raise Http404
+    name = entry.receipt.name
+    ext = os.path.splitext(name)[1].lower()
+    return serve_private_file(
+        request, storage.location, name,
+        content_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        filename=f"chek-{entry.id}{ext}",
+        # content-addressed: digest — kuchli ETag
+        etag=entry.receipt_blob.sha256 if entry.receipt_blob_id else None,
+    )
+
+
 @login_required
+@read_only_db
+def receipt_preview(request, entry_id):
+    entry = _receipt_entry_or_404(request, entry_id)
+    blob = entry.receipt_blob
+    if blob is None or not blob.thumbnail:
+        raise Http404
+    return serve_private_file(
+        request, get_receipt_storage().location, blob.thumbnail,
+        content_type="image/jpeg", filename=f"chek-{entry.id}-preview.jpg", etag=f"{blob.sha256}-thumb",
+    )
+
+
+@login_required
+@read_only_db
 def contest_leaderboard(request, contest_id):
     contest = get_object_or_404(Contest, id=contest_id)
 
     # ixtiyoriy filter: ?center=ID
     center_id = request.GET.get("center")
-    base_qs = ContestRun.objects.filter(contest=contest)
+
+    if contest.status == Contest.SETTLED:
+        # Yakunlangan musobaqa: faqat o'zgarmas snapshot (typingapp.settlement)
+        base_qs = ContestFinalStanding.objects.filter(contest=contest)
+        qs = base_qs.filter(center_id=center_id) if center_id and center_id.isdigit() else base_qs
+        runs = qs.order_by("rank")
+        centers = (base_qs
+                   .filter(center__isnull=False)
+                   .values("center_id", "center_name")
+                   .distinct()
+                   .order_by("center_name"))
+        return render(request, "contest/contest_leaderboard.html", {
+            "contest": contest,
+            "runs": runs,
+            "centers": centers,
+            "current_center": center_id or "",
+            "is_settled": True,
+            "is_live": False,
+            # snapshot o'zgarmaydi — versiya o'rniga doimiy kalit
+            "cache_version": "settled",
+            "cache_timeout": LEADERBOARD_TIMEOUT,
+        })
+
+    base_qs = ContestStanding.objects.filter(contest=contest)
 
     if center_id and center_id.isdigit():
-        # Tanlangan markaz bo‘yicha ko‘rsatish
+        # Tanlangan markaz bo‘yicha: har user uchun shu markazdagi OXIRGI urinish
         qs = base_qs.filter(center_id=center_id)
-
-        # HAR FOYDALANUVCHI UCHUN shu markazdagi OXIRGI urinish ID’si
-        last_id_sq = (ContestRun.objects
-                      .filter(contest=contest, user=OuterRef("user"), center_id=center_id)
-                      .order_by("-created_at")
-                      .values("id")[:1])
     else:
-        # Barcha markazlar bo‘yicha
-        qs = base_qs
-
-        # HAR FOYDALANUVCHI UCHUN OXIRGI urinish ID’si (umumiy)
-        last_id_sq = (ContestRun.objects
-                      .filter(contest=contest, user=OuterRef("user"))
-                      .order_by("-created_at")
-                      .values("id")[:1])
-
-    # Faqat o‘sha oxirgi urinishlarni qoldiramiz
-    qs = qs.annotate(last_id=Subquery(last_id_sq)).filter(id=F("last_id"))
-
-    # Nikni annotate qilib olamiz va ko‘rish uchun FK’larni tayyorlaymiz
-    runs = (qs.annotate(username=F("user__username"))
-              .select_related("center")
-              # Oxirgi urinishlar orasida ball bo‘yicha tartib (xohlasangiz created_at bo‘yicha ham qo‘yishingiz mumkin)
+        # Barcha markazlar bo‘yicha: har user uchun OXIRGI urinish (umumiy)
+        qs = base_qs.filter(is_latest=True)
+
+    # Nik va markaz nomini annotate qilib olamiz
+    runs = (qs.annotate(username=F("user__username"), center_name=F("center__name"))
               .order_by("-final_score", "-created_at"))
 
-    # Filtr tugmalari uchun markazlar
+    # Filtr tugmalari uchun markazlar (standing — har user/markaz uchun bitta qator)
     centers = (base_qs
                .filter(center__isnull=False)
-               .values("center_id", "center__name")
+               .values("center_id", center_name=F("center__name"))
                .distinct()
-               .order_by("center__name"))
+               .order_by("center_name"))
 
     return render(request, "contest/contest_leaderboard.html", {
         "contest": contest,
         "runs": runs,
         "centers": centers,
         "current_center": center_id or "",
+        # Umumiy reyting musobaqa davomida SSE orqali jonli yangilanadi (typingapp.live)
+        "is_live": contest.is_running() and not center_id,
+        "cache_version": get_version(contest_scope(contest.id)),
+        "cache_timeout": LEADERBOARD_TIMEOUT,
     })
 
 
 
+async def contest_live(request, contest_id):
+    """
+    Jonli reyting (Server-Sent Events). Faqat ASGI ostida: WSGI worker'ni
+    ulanish davomida band qilmaslik uchun u yerda 501 qaytaramiz.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Jonli reyting faqat ASGI serverda ishlaydi.", status=501, content_type="text/plain; charset=utf-8")
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not await Contest.objects.filter(id=contest_id).aexists():
+        raise Http404
+
+    response = StreamingHttpResponse(live.stream(contest_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx javobni buferlamasin
+    return response
+
+
 def healthz(request):
     return HttpResponse("ok", content_type="text/plain")
+
+
+def metrics(request):
+    """Prometheus text formatidagi metrikalar (typingapp.metrics)."""
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Token sozlanmagan — endpoint yopiq (ichki metrikalar ochiq internetga chiqmasin)
+        raise Http404
+    if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")